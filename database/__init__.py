@@ -24,6 +24,7 @@ from .database import (
     get_session, 
     init_db
 )
+from .instrumentation import track_queries, query_budget, QueryBudgetExceeded
 
 from .models import (
     Base,
@@ -33,6 +34,9 @@ from .models import (
     PendingChallenge,
     Survey,
     MetricsSurvey,
+    SurveyDailyRollup,
+    MessageSentDailyRollup,
+    FSMStateRecord,
     UserRole,
     ChallengeStatus,
     SurveyType
@@ -82,6 +86,9 @@ __all__ = [
     'PendingChallenge',
     'Survey',
     'MetricsSurvey',
+    'SurveyDailyRollup',
+    'MessageSentDailyRollup',
+    'FSMStateRecord',
     'UserRole',
     'ChallengeStatus',
     'SurveyType',
@@ -89,5 +96,8 @@ __all__ = [
     'get_viewer_roles',
     'get_all_roles',
     'is_valid_role',
-    'get_role_description'
+    'get_role_description',
+    'track_queries',
+    'query_budget',
+    'QueryBudgetExceeded'
 ]
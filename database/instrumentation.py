@@ -0,0 +1,175 @@
+"""Учет SQL-запросов в рамках одной единицы работы (апдейта, задачи планировщика)
+
+    with track_queries() as stats:
+        ...
+    stats.count, stats.duration, stats.repeated()
+
+Слушатели событий engine считают запросы в текущий QueryStats. Он лежит в
+contextvar, а asyncio.to_thread копирует контекст в поток, поэтому запросы из
+потоков учитываются в апдейте, который их запустил. Вложенный track_queries
+считает свои запросы и передает их во внешний.
+
+Один и тот же запрос (с точностью до параметров), повторенный в апдейте
+N_PLUS_ONE_THRESHOLD раз и больше, - признак N+1: report() пишет его в лог
+вместе с именем обработчика. query_budget(n) ограничивает число запросов
+функции; при QUERY_BUDGET_STRICT=true превышение - исключение QueryBudgetExceeded
+(так бюджеты проверяются в тестах и нагрузочных прогонах), иначе - предупреждение.
+"""
+import functools
+import inspect
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|(?<![:\w]):\w+")
+_PARAM_LIST_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Функция выполнила больше SQL-запросов, чем ей разрешено"""
+
+
+def statement_shape(statement: str) -> str:
+    """Запрос без параметров и литералов: одинаковая форма - один и тот же запрос"""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _PARAM_LIST_RE.sub("?, ...", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Сколько запросов выполнено, сколько времени они заняли и какие повторялись"""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        # Имя обработчика для логов; его ставит HandlerMetricsMiddleware
+        self.handler: Optional[str] = None
+
+    def record(self, statement: str, elapsed: float):
+        shape = statement_shape(statement)
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def set_handler(self, name: str):
+        stats = self
+        while stats is not None:
+            stats.handler = stats.handler or name
+            stats = stats.parent
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Формы запросов, повторенные threshold раз и больше"""
+        threshold = threshold or _settings()[0]
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def report(self, context: str = "update") -> List[Tuple[str, int]]:
+        """Записать в лог подозрения на N+1 и превышение бюджета на апдейт"""
+        threshold, budget, strict = _settings()
+        repeated = self.repeated(threshold)
+        where = self.handler or context
+        for shape, count in repeated:
+            logger.warning(
+                f"⚠️ N+1 в {where}: {count} одинаковых запросов из {self.count} "
+                f"({self.duration * 1000:.0f} мс): {shape[:300]}"
+            )
+        if budget:
+            _check_budget(where, self, budget, strict)
+        return repeated
+
+
+def _settings() -> Tuple[int, int, bool]:
+    from config import load_config
+    config = load_config()
+    return config.n_plus_one_threshold, config.query_budget_per_update, config.query_budget_strict
+
+
+def _check_budget(where: str, stats: QueryStats, limit: int, strict: bool):
+    if stats.count <= limit:
+        return
+    message = f"{where}: {stats.count} SQL-запросов при бюджете {limit}"
+    if strict:
+        raise QueryBudgetExceeded(message)
+    logger.warning(f"⚠️ Превышен бюджет запросов - {message}")
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Считать запросы внутри блока"""
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def query_budget(limit: int):
+    """Декоратор: функция (sync или async) выполняет не больше limit SQL-запросов"""
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_queries() as stats:
+                    result = await func(*args, **kwargs)
+                _check_budget(name, stats, limit, _settings()[2])
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_queries() as stats:
+                result = func(*args, **kwargs)
+            _check_budget(name, stats, limit, _settings()[2])
+            return result
+        return wrapper
+
+    return decorator
+
+
+# Время старта хранится в контексте выполнения, а не в стеке на соединении:
+# при ошибке запроса after_cursor_execute не вызывается, и стек бы рос
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = getattr(context, "_query_started_at", None)
+    stats.record(statement, time.perf_counter() - started if started is not None else 0.0)
+
+
+def instrument_engine(engine):
+    """Подключить учет запросов к engine (повторный вызов ничего не делает)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
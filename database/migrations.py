@@ -0,0 +1,293 @@
+"""Версионированные миграции схемы с онлайн-операциями
+
+    python -m database.migrations            # применить недостающие миграции
+    python -m database.migrations status     # показать, что применено
+
+Те же миграции выполняются при старте бота (init_db), если не выключен
+RUN_MIGRATIONS_ON_STARTUP. Каждая операция идемпотентна: миграция, упавшая
+посередине, при следующем запуске просто повторяется.
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import List, Optional, Sequence
+
+from sqlalchemy import text
+
+from .partitioning import is_partitioned, list_partitions
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+# Ключ advisory-lock: миграции выполняет только один процесс одновременно
+MIGRATION_LOCK_KEY = 727_002
+DEFAULT_BACKFILL_BATCH = 1000
+
+
+def _index_state(conn, name: str) -> Optional[bool]:
+    """None - индекса нет, True - валиден, False - недостроен (упавший CONCURRENTLY)"""
+    row = conn.execute(text(
+        "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": name}).first()
+    return None if row is None else bool(row[0])
+
+
+def _attached_partitions(conn, index_name: str) -> set:
+    """Партиции, индексы которых уже подключены к индексу родителя"""
+    return set(conn.execute(text(
+        "SELECT t.relname FROM pg_inherits inh "
+        "JOIN pg_class parent ON parent.oid = inh.inhparent "
+        "JOIN pg_index x ON x.indexrelid = inh.inhrelid "
+        "JOIN pg_class t ON t.oid = x.indrelid "
+        "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid)"
+    ), {"name": index_name}).scalars().all())
+
+
+class SQL:
+    """Обычный DDL/DML в отдельной транзакции (должен быть идемпотентным)"""
+
+    transactional = True
+
+    def __init__(self, statement: str):
+        self.statement = statement
+
+    def describe(self) -> str:
+        return " ".join(self.statement.split())[:80]
+
+    def apply(self, conn):
+        conn.execute(text(self.statement))
+
+
+class CreateIndex:
+    """CREATE INDEX CONCURRENTLY без блокировки записи
+
+    У партиционированной таблицы CONCURRENTLY на родителе невозможен, поэтому
+    индекс родителя создается ON ONLY, а индексы партиций строятся конкурентно
+    по одной и подключаются через ATTACH PARTITION.
+    """
+
+    transactional = False
+
+    def __init__(self, name: str, table: str, columns: Sequence[str], where: Optional[str] = None):
+        self.name = name
+        self.table = table
+        self.columns = ", ".join(columns)
+        self.where = f" WHERE {where}" if where else ""
+
+    def describe(self) -> str:
+        return f"index {self.name} ON {self.table} ({self.columns}){self.where}"
+
+    def apply(self, conn):
+        if is_partitioned(conn, self.table):
+            self._apply_partitioned(conn)
+        else:
+            self._create(conn, self.name, self.table)
+
+    def _create(self, conn, name: str, table: str):
+        state = _index_state(conn, name)
+        if state is True:
+            return
+        if state is False:
+            logger.warning(f"⚠️ Индекс {name} недостроен, пересоздаю")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY {name} ON {table} ({self.columns}){self.where}"
+        ))
+
+    def _apply_partitioned(self, conn):
+        if _index_state(conn, self.name) is True:
+            return
+
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {self.name} ON ONLY {self.table} ({self.columns}){self.where}"
+        ))
+        attached = _attached_partitions(conn, self.name)
+        for partition, _ in list_partitions(conn, self.table):
+            if partition in attached:
+                continue
+            child = f"{self.name}_{partition[len(self.table) + 1:]}"
+            self._create(conn, child, partition)
+            conn.execute(text(f"ALTER INDEX {self.name} ATTACH PARTITION {child}"))
+
+
+class Backfill:
+    """UPDATE пачками по batch_size строк, каждая пачка - отдельная транзакция (AUTOCOMMIT)
+
+    where должен перестать выбирать строку после ее обновления, иначе цикл не закончится.
+    """
+
+    transactional = False
+
+    def __init__(self, table: str, assignments: str, where: str,
+                 batch_size: int = DEFAULT_BACKFILL_BATCH, key: str = "id", pause: float = 0.05):
+        self.table = table
+        self.assignments = assignments
+        self.where = where
+        self.batch_size = batch_size
+        self.key = key
+        self.pause = pause
+
+    def describe(self) -> str:
+        return f"backfill {self.table} SET {' '.join(self.assignments.split())[:60]}"
+
+    def apply(self, conn):
+        statement = text(
+            f"UPDATE {self.table} SET {self.assignments} "
+            f"WHERE {self.key} IN (SELECT {self.key} FROM {self.table} WHERE {self.where} LIMIT :batch)"
+        )
+        total = 0
+        while True:
+            updated = conn.execute(statement, {"batch": self.batch_size}).rowcount
+            total += updated
+            if updated < self.batch_size:
+                break
+            time.sleep(self.pause)
+        logger.info(f"🔁 {self.table}: дозаполнено строк {total}")
+
+
+class Migration:
+    """Версия схемы: набор операций, применяемых по порядку"""
+
+    def __init__(self, version: int, name: str, operations: List):
+        self.version = version
+        self.name = name
+        self.operations = operations
+
+
+MIGRATIONS = [
+    Migration(1, "message_schedules.last_sent_local_date", [
+        SQL("ALTER TABLE message_schedules ADD COLUMN IF NOT EXISTS last_sent_local_date DATE"),
+        # Чтобы после обновления не повторить уже отправленные сегодня сообщения
+        Backfill(
+            "message_schedules",
+            "last_sent_local_date = ("
+            "SELECT max((l.sent_at AT TIME ZONE 'UTC' "
+            "AT TIME ZONE COALESCE(o.timezone, 'Asia/Novosibirsk'))::date) "
+            "FROM message_sent_logs l JOIN organizations o ON o.id = message_schedules.org_id "
+            "WHERE l.schedule_id = message_schedules.id AND l.status = 'sent')",
+            "last_sent_local_date IS NULL AND EXISTS ("
+            "SELECT 1 FROM message_sent_logs l JOIN organizations o ON o.id = message_schedules.org_id "
+            "WHERE l.schedule_id = message_schedules.id AND l.status = 'sent')",
+        ),
+    ]),
+    Migration(2, "message_sent_logs schedule index", [
+        CreateIndex("idx_message_sent_logs_schedule_sent", "message_sent_logs", ["schedule_id", "sent_at"]),
+    ]),
+    Migration(3, "challenges due queue", [
+        CreateIndex("idx_challenges_due", "challenges", ["status", "scheduled_for"], where="sent_at IS NULL"),
+    ]),
+    Migration(4, "surveys day lookups", [
+        CreateIndex("idx_surveys_user_date", "surveys", ["user_id", "date"]),
+        CreateIndex("idx_surveys_user_type_date", "surveys", ["user_id", "survey_type", "date"]),
+    ]),
+    Migration(5, "challenges hot paths and users.org_id", [
+        CreateIndex("idx_challenges_user_status", "challenges", ["user_id", "status"]),
+        CreateIndex("idx_challenges_user_completed", "challenges", ["user_id", "completed_at"],
+                    where="status = 'COMPLETED'"),
+        CreateIndex("idx_challenges_completed_at", "challenges", ["completed_at"],
+                    where="status = 'COMPLETED'"),
+        CreateIndex("idx_users_org_role", "users", ["org_id", "role"]),
+    ]),
+    Migration(6, "users.profile_photo_file_id", [
+        SQL("ALTER TABLE users ADD COLUMN IF NOT EXISTS profile_photo_file_id VARCHAR(255)"),
+    ]),
+]
+
+
+class MigrationRunner:
+    """Применение миграций по версиям с учетом в таблице schema_migrations"""
+
+    def __init__(self, engine, migrations: List[Migration] = MIGRATIONS):
+        self.engine = engine
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+
+    def _ensure_table(self, conn):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR(200) NOT NULL, "
+            "applied_at TIMESTAMPTZ NOT NULL DEFAULT now(), "
+            "duration_ms INTEGER)"
+        ))
+
+    def applied_versions(self, conn) -> set:
+        self._ensure_table(conn)
+        return set(conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}")).scalars().all())
+
+    def status(self) -> List[tuple]:
+        """(версия, имя, применена ли)"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            applied = self.applied_versions(conn)
+        return [(m.version, m.name, m.version in applied) for m in self.migrations]
+
+    def upgrade(self, target: Optional[int] = None) -> List[int]:
+        """Применить недостающие миграции (до target включительно)"""
+        done = []
+        # AUTOCOMMIT нужен для CONCURRENTLY; транзакционные операции идут через engine.begin()
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                applied = self.applied_versions(conn)
+                for migration in self.migrations:
+                    if migration.version in applied:
+                        continue
+                    if target is not None and migration.version > target:
+                        break
+                    self._apply(conn, migration)
+                    done.append(migration.version)
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+        if done:
+            logger.info(f"✅ Применены миграции: {done}")
+        return done
+
+    def _apply(self, conn, migration: Migration):
+        logger.info(f"🔧 Миграция {migration.version}: {migration.name}")
+        started = time.monotonic()
+
+        for operation in migration.operations:
+            logger.info(f"   → {operation.describe()}")
+            if operation.transactional:
+                with self.engine.begin() as tx:
+                    operation.apply(tx)
+            else:
+                operation.apply(conn)
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        conn.execute(text(
+            f"INSERT INTO {MIGRATIONS_TABLE} (version, name, duration_ms) "
+            "VALUES (:version, :name, :duration) ON CONFLICT (version) DO NOTHING"
+        ), {"version": migration.version, "name": migration.name, "duration": duration_ms})
+
+
+def run_migrations(engine, target: Optional[int] = None) -> List[int]:
+    """Применить недостающие миграции"""
+    return MigrationRunner(engine).upgrade(target)
+
+
+def main() -> int:
+    from database import database as db
+
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status"])
+    parser.add_argument("--target", type=int, default=None, help="применить миграции до этой версии")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    db.init_engine()
+    runner = MigrationRunner(db.engine)
+
+    if args.command == "status":
+        for version, name, applied in runner.status():
+            print(f"{'✅' if applied else '⏳'} {version:>4} {name}")
+        return 0
+
+    runner.upgrade(args.target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, BigInteger, Text, Time
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, BigInteger, Text, Time, Date
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone as tz
@@ -74,6 +74,8 @@ class User(Base):
     position = Column(String(255))
     profile_photo_path = Column(String(255), nullable=True)
     has_custom_photo = Column(Boolean, default=False)
+    # file_id фото в Telegram: профиль показывается без повторной загрузки файла
+    profile_photo_file_id = Column(String(255), nullable=True)
     
     role = Column(String(50), default=UserRole.MEMBER.value)
 
@@ -105,6 +107,11 @@ class User(Base):
     created_challenges = relationship("Challenge", back_populates="creator_rel", foreign_keys="[Challenge.created_by]")
     verifier = relationship("User", foreign_keys=[verified_by], remote_side=[user_id])
 
+    # Почти все экраны админки выбирают участников организации (часто с ролью)
+    __table_args__ = (
+        Index('idx_users_org_role', 'org_id', 'role'),
+    )
+
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, role={self.role})>"
 
@@ -122,10 +129,11 @@ class User(Base):
 class Survey(Base):
     __tablename__ = "surveys"
 
-    id = Column(Integer, primary_key=True)
+    # Таблица партиционирована по месяцам, поэтому date входит в первичный ключ
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(BigInteger, ForeignKey('users.user_id'))
     survey_type = Column(String(20))
-    date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    date = Column(DateTime, primary_key=True, default=lambda: datetime.now(timezone.utc))
 
     energy = Column(Integer)
     sleep = Column(Integer)
@@ -138,6 +146,30 @@ class Survey(Base):
 
     user = relationship("User", back_populates="surveys")
 
+    # Проверки "опрос за сегодня" идут диапазоном по date внутри пользователя
+    __table_args__ = (
+        Index('idx_surveys_user_date', 'user_id', 'date'),
+        Index('idx_surveys_user_type_date', 'user_id', 'survey_type', 'date'),
+        {'postgresql_partition_by': 'RANGE (date)'}
+    )
+
+
+class SurveyDailyRollup(Base):
+    """Дневная статистика опросов из архивированных партиций surveys"""
+    __tablename__ = "survey_daily_rollups"
+
+    user_id = Column(BigInteger, primary_key=True)  # То же значение, что и Survey.user_id
+    day = Column(Date, primary_key=True)
+    survey_type = Column(String(20), primary_key=True)
+
+    surveys_count = Column(Integer, nullable=False, default=0)
+    energy_sum = Column(Integer, nullable=False, default=0)
+    energy_count = Column(Integer, nullable=False, default=0)
+    sleep_sum = Column(Integer, nullable=False, default=0)
+    sleep_count = Column(Integer, nullable=False, default=0)
+    readiness_sum = Column(Integer, nullable=False, default=0)
+    readiness_count = Column(Integer, nullable=False, default=0)
+
 
 class MetricsSurvey(Base):
     """Модель для хранения результатов AI-опросов по метрикам ProffKonstalting"""
@@ -201,6 +233,18 @@ class Challenge(Base):
     user_rel = relationship("User", foreign_keys=[user_id], back_populates="challenges")
     creator_rel = relationship("User", foreign_keys=[created_by], back_populates="created_challenges")
 
+    __table_args__ = (
+        # Очередь ChallengeScheduler: запланированные и еще не отправленные
+        Index('idx_challenges_due', 'status', 'scheduled_for', postgresql_where=sent_at.is_(None)),
+        # Челленджи пользователя по статусу (активные, счетчики в профиле и отчетах)
+        Index('idx_challenges_user_status', 'user_id', 'status'),
+        # Выполненные за период: по пользователю и по всей команде
+        Index('idx_challenges_user_completed', 'user_id', 'completed_at',
+              postgresql_where=status == ChallengeStatus.COMPLETED.value),
+        Index('idx_challenges_completed_at', 'completed_at',
+              postgresql_where=status == ChallengeStatus.COMPLETED.value),
+    )
+
 
 
 class PendingChallenge(Base):
@@ -243,6 +287,7 @@ class MessageSchedule(Base):
     is_daily = Column(Boolean, default=True)  # Ежедневное сообщение
     day_of_week = Column(Integer, nullable=True)  # 0-6 (пн-вс), если не ежедневное
     order_index = Column(Integer, default=0)  # Порядок отображения
+    last_sent_local_date = Column(Date, nullable=True)  # Дата последней отправки (по времени организации)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -254,10 +299,11 @@ class MessageSentLog(Base):
     """Лог отправленных сообщений"""
     __tablename__ = "message_sent_logs"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Таблица партиционирована по месяцам, поэтому sent_at входит в первичный ключ
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     schedule_id = Column(Integer, ForeignKey("message_schedules.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    sent_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     status = Column(String(20), default="sent")  # sent, failed, pending
     error_message = Column(Text, nullable=True)
     
@@ -265,6 +311,35 @@ class MessageSentLog(Base):
     schedule = relationship("MessageSchedule", back_populates="sent_logs")
     user = relationship("User", back_populates="message_logs")
 
+    __table_args__ = (
+        Index('idx_message_sent_logs_schedule_sent', 'schedule_id', 'sent_at'),
+        {'postgresql_partition_by': 'RANGE (sent_at)'},
+    )
+
+
+class MessageSentDailyRollup(Base):
+    """Дневная статистика отправок из архивированных партиций message_sent_logs"""
+    __tablename__ = "message_sent_daily_rollups"
+
+    schedule_id = Column(Integer, ForeignKey("message_schedules.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    messages_count = Column(Integer, nullable=False, default=0)
+
+
+class FSMStateRecord(Base):
+    """Состояние FSM (регистрация, опросы, рассылки) для services.fsm_storage"""
+    __tablename__ = "fsm_states"
+
+    key = Column(String(255), primary_key=True)
+    state = Column(String(255), nullable=True)
+    data = Column(JSONB, nullable=False, default=dict)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('idx_fsm_states_updated_at', 'updated_at'),
+    )
+
 
 class PlayerMetrics(Base):
     """Метрики оценки игрока"""
@@ -0,0 +1,227 @@
+"""Помесячное партиционирование журнальных таблиц и их архивация"""
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .models import Base
+
+logger = logging.getLogger(__name__)
+
+# Таблица -> колонка, по которой нарезаются партиции
+PARTITIONED_TABLES = {
+    "message_sent_logs": "sent_at",
+    "surveys": "date",
+}
+
+# На сколько месяцев вперед создавать партиции
+PARTITION_MONTHS_AHEAD = 2
+
+# Перевод таблицы берет ACCESS EXCLUSIVE: не ждем занятую таблицу дольше этого,
+# а пробуем снова при следующем запуске
+CONVERSION_LOCK_TIMEOUT = "5s"
+
+# Свертка партиции в дневную статистику перед удалением
+ROLLUP_QUERIES = {
+    "message_sent_logs": """
+        INSERT INTO message_sent_daily_rollups (schedule_id, day, status, messages_count)
+        SELECT schedule_id, sent_at::date, COALESCE(status, ''), count(*)
+        FROM {partition}
+        GROUP BY schedule_id, sent_at::date, COALESCE(status, '')
+        ON CONFLICT (schedule_id, day, status) DO UPDATE
+        SET messages_count = message_sent_daily_rollups.messages_count + EXCLUDED.messages_count
+    """,
+    "surveys": """
+        INSERT INTO survey_daily_rollups (
+            user_id, day, survey_type, surveys_count,
+            energy_sum, energy_count, sleep_sum, sleep_count, readiness_sum, readiness_count
+        )
+        SELECT user_id, date::date, COALESCE(survey_type, ''), count(*),
+               COALESCE(sum(energy), 0), count(energy),
+               COALESCE(sum(sleep), 0), count(sleep),
+               COALESCE(sum(readiness), 0), count(readiness)
+        FROM {partition}
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id, date::date, COALESCE(survey_type, '')
+        ON CONFLICT (user_id, day, survey_type) DO UPDATE
+        SET surveys_count = survey_daily_rollups.surveys_count + EXCLUDED.surveys_count,
+            energy_sum = survey_daily_rollups.energy_sum + EXCLUDED.energy_sum,
+            energy_count = survey_daily_rollups.energy_count + EXCLUDED.energy_count,
+            sleep_sum = survey_daily_rollups.sleep_sum + EXCLUDED.sleep_sum,
+            sleep_count = survey_daily_rollups.sleep_count + EXCLUDED.sleep_count,
+            readiness_sum = survey_daily_rollups.readiness_sum + EXCLUDED.readiness_sum,
+            readiness_count = survey_daily_rollups.readiness_count + EXCLUDED.readiness_count
+    """,
+}
+
+_UPPER_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value: date) -> date:
+    """Первое число месяца"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Сдвинуть первое число месяца на months месяцев"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Имя месячной партиции: surveys_p202601"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    """Является ли таблица партиционированной"""
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": table}).scalar())
+
+
+def list_partitions(conn, table: str) -> List[Tuple[str, Optional[date]]]:
+    """Список партиций таблицы: (имя, верхняя граница); у DEFAULT граница None"""
+    rows = conn.execute(text(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+    ), {"table": table}).all()
+
+    result = []
+    for name, bound in rows:
+        match = _UPPER_BOUND_RE.search(bound or "")
+        upper = datetime.fromisoformat(match.group(1)).date() if match else None
+        result.append((name, upper))
+    return result
+
+
+def _convert_to_partitioned(conn, table: str, column: str):
+    """Превратить обычную таблицу в партиционированную без копирования данных
+
+    Старая таблица переименовывается и подключается как самая ранняя партиция,
+    новая родительская таблица создается по модели.
+    """
+    legacy = f"{table}_legacy"
+    logger.info(f"🔧 Перевожу {table} на помесячные партиции")
+
+    # Освобождаем имена индексов и последовательности для новой таблицы
+    index_names = conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table AND schemaname = current_schema()"
+    ), {"table": table}).scalars().all()
+    for index_name in index_names:
+        conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+    conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq RENAME TO {legacy}_id_seq"))
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+
+    # Ключ партиционирования должен быть NOT NULL
+    conn.execute(text(f"UPDATE {legacy} SET {column} = now() WHERE {column} IS NULL"))
+    conn.execute(text(f"ALTER TABLE {legacy} ALTER COLUMN {column} SET NOT NULL"))
+
+    # У партиции не может быть своего первичного ключа (id): заменяем его
+    # ключом родителя (id, column), и ATTACH подхватит его как индекс партиции
+    pk_name = conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+    ), {"table": legacy}).scalar()
+    if pk_name:
+        conn.execute(text(f'ALTER TABLE {legacy} DROP CONSTRAINT "{pk_name}"'))
+    conn.execute(text(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY (id, {column})"))
+
+    Base.metadata.tables[table].create(conn)
+
+    conn.execute(text(
+        f"SELECT setval('{table}_id_seq', (SELECT COALESCE(max(id), 0) + 1 FROM {legacy}), false)"
+    ))
+
+    # Старые данные остаются одной партицией до начала следующего месяца
+    last_value = conn.execute(text(f"SELECT max({column}) FROM {legacy}")).scalar()
+    today = datetime.now(timezone.utc).date()
+    last_day = max(last_value.date(), today) if last_value else today
+    legacy_upper = add_months(month_start(last_day), 1)
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{legacy_upper.isoformat()}')"
+    ))
+
+
+def _ensure_month_partitions(conn, table: str, months_ahead: int):
+    """Создать недостающие месячные партиции до now + months_ahead и DEFAULT"""
+    existing = list_partitions(conn, table)
+    existing_names = {name for name, _ in existing}
+
+    default_name = f"{table}_default"
+    if default_name not in existing_names and not any(upper is None for _, upper in existing):
+        conn.execute(text(f"CREATE TABLE {default_name} PARTITION OF {table} DEFAULT"))
+
+    # Начинаем с верхней границы последней партиции, чтобы диапазоны не пересекались
+    uppers = [upper for _, upper in existing if upper is not None]
+    current = month_start(datetime.now(timezone.utc).date())
+    start = max(uppers) if uppers else current
+    last = add_months(current, months_ahead)
+
+    while start <= last:
+        next_month = add_months(start, 1)
+        name = partition_name(table, start)
+        if name not in existing_names:
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{next_month.isoformat()}')"
+            ))
+            logger.info(f"📅 Создана партиция {name}")
+        start = next_month
+
+
+def ensure_partitions(engine, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Привести журнальные таблицы к партиционированному виду и создать партиции впрок
+
+    Каждая таблица переводится и дополняется партициями в своих коротких
+    транзакциях, чтобы не держать блокировки сразу на всех журналах. Ошибка
+    одной таблицы не мешает остальным; в конце она пробрасывается.
+    """
+    failed = []
+    for table, column in PARTITIONED_TABLES.items():
+        try:
+            with engine.begin() as conn:
+                if not is_partitioned(conn, table):
+                    conn.execute(text(f"SET LOCAL lock_timeout = '{CONVERSION_LOCK_TIMEOUT}'"))
+                    _convert_to_partitioned(conn, table, column)
+            with engine.begin() as conn:
+                _ensure_month_partitions(conn, table, months_ahead)
+        except Exception as e:
+            logger.error(f"❌ Партиции {table}: {e}")
+            failed.append(table)
+
+    if failed:
+        raise RuntimeError(f"Не удалось подготовить партиции: {', '.join(failed)}")
+
+
+def archive_expired_partitions(engine, table: str, retention_months: int) -> List[str]:
+    """Свернуть партиции старше срока хранения в дневную статистику и удалить их
+
+    Каждая партиция обрабатывается в своей транзакции: свертка, DETACH и DROP
+    либо проходят вместе, либо не проходят вовсе.
+    """
+    cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -retention_months)
+    archived = []
+
+    with engine.connect() as conn:
+        expired = [
+            name for name, upper in list_partitions(conn, table)
+            if upper is not None and upper <= cutoff
+        ]
+
+    for name in sorted(expired):
+        with engine.begin() as conn:
+            conn.execute(text(ROLLUP_QUERIES[table].format(partition=name)))
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+        archived.append(name)
+        logger.info(f"🗄️ Партиция {name} свернута в статистику и удалена")
+
+    return archived
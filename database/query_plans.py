@@ -0,0 +1,253 @@
+"""Проверка планов горячих запросов через EXPLAIN
+
+    python -m database.query_plans              # проверка выборок опросов
+    python -m database.query_plans --benchmark  # планы до/после индексов для топ-20 запросов
+
+Проверка завершается с ненулевым кодом, если какая-то выборка ушла в Seq Scan.
+Бенчмарк снимает "до" внутри транзакции, удаляя индексы и откатывая ее в конце:
+DROP INDEX берет эксклюзивную блокировку, поэтому запускать его стоит на копии базы.
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Узлы плана, которые считаем доступом по индексу
+INDEX_SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+# Проверки опросов "за сегодня": полуоткрытый диапазон по date внутри пользователя
+SURVEY_LOOKUPS = {
+    "survey_taken_today": (
+        "SELECT 1 FROM surveys "
+        "WHERE user_id = :user_id AND survey_type = :survey_type "
+        "AND date >= :day_start AND date < :day_end LIMIT 1"
+    ),
+    "surveys_today_count": (
+        "SELECT count(*) FROM surveys "
+        "WHERE user_id = :user_id AND date >= :day_start AND date < :day_end"
+    ),
+}
+
+# Самые частые запросы бота (обработчики, отчеты, планировщики) в виде SQL
+BENCHMARK_QUERIES = {
+    "user_by_telegram_id": "SELECT * FROM users WHERE user_id = :user_id",
+    "org_members": "SELECT * FROM users WHERE org_id = :org_id",
+    "org_members_by_role": "SELECT * FROM users WHERE org_id = :org_id AND role = 'MEMBER'",
+    "org_members_count": "SELECT count(*) FROM users WHERE org_id = :org_id",
+    "org_leaderboard": "SELECT name, points FROM users WHERE org_id = :org_id ORDER BY points DESC LIMIT 10",
+    "user_active_challenges": (
+        "SELECT * FROM challenges WHERE user_id = :user_id AND status = 'PENDING'"
+    ),
+    "user_completed_count": (
+        "SELECT count(*) FROM challenges WHERE user_id = :user_id AND status = 'COMPLETED'"
+    ),
+    "user_completed_since": (
+        "SELECT * FROM challenges WHERE user_id = :user_id AND status = 'COMPLETED' "
+        "AND completed_at >= :month_ago"
+    ),
+    "org_challenges_count": (
+        "SELECT count(*) FROM challenges WHERE user_id IN "
+        "(SELECT user_id FROM users WHERE org_id = :org_id)"
+    ),
+    "org_completed_today": (
+        "SELECT c.* FROM challenges c JOIN users u ON u.user_id = c.user_id "
+        "WHERE u.org_id = :org_id AND c.status = 'COMPLETED' "
+        "AND c.completed_at >= :day_start AND c.completed_at < :day_end"
+    ),
+    "org_recent_challenges": (
+        "SELECT * FROM challenges WHERE user_id IN "
+        "(SELECT user_id FROM users WHERE org_id = :org_id) "
+        "ORDER BY created_at DESC LIMIT 50"
+    ),
+    "completed_today_all": (
+        "SELECT count(*) FROM challenges WHERE status = 'COMPLETED' "
+        "AND completed_at >= :day_start AND completed_at < :day_end"
+    ),
+    "due_challenges": (
+        "SELECT * FROM challenges WHERE status = 'SCHEDULED' AND sent_at IS NULL "
+        "AND scheduled_for <= :now ORDER BY scheduled_for LIMIT 500"
+    ),
+    "reminder_pending": (
+        "SELECT c.* FROM challenges c JOIN users u ON u.user_id = c.user_id "
+        "WHERE u.org_id = :org_id AND c.status = 'PENDING'"
+    ),
+    **SURVEY_LOOKUPS,
+    "org_surveys_today": (
+        "SELECT s.* FROM surveys s JOIN users u ON u.id = s.user_id "
+        "WHERE u.org_id = :org_id AND s.date >= :day_start AND s.date < :day_end"
+    ),
+    "survey_history": (
+        "SELECT * FROM surveys WHERE user_id = :user_id ORDER BY date DESC LIMIT 10"
+    ),
+    "pending_generated_challenges": (
+        "SELECT * FROM pending_challenges WHERE user_id = :user_id AND expires_at > :now"
+    ),
+    "active_schedules": "SELECT * FROM message_schedules WHERE status = 'active'",
+}
+
+# Индексы, добавленные ради этих запросов: их удаляем для снимка "до"
+BENCHMARK_INDEXES = [
+    "idx_users_org_role",
+    "idx_challenges_user_status",
+    "idx_challenges_user_completed",
+    "idx_challenges_completed_at",
+    "idx_challenges_due",
+    "idx_surveys_user_date",
+    "idx_surveys_user_type_date",
+]
+
+
+def _walk(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(conn, sql: str, params: dict, analyze: bool = False) -> dict:
+    """Вернуть план запроса (EXPLAIN FORMAT JSON): корневой узел лежит в ключе Plan"""
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = conn.execute(text(f"EXPLAIN ({options}) {sql}"), params).scalar()
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    return raw[0]
+
+
+def plan_problems(plan: dict, table: str) -> List[str]:
+    """Найти последовательные сканирования таблицы (и ее партиций) в плане"""
+    problems = []
+    for node in _walk(plan):
+        relation = node.get("Relation Name") or ""
+        if node.get("Node Type") == "Seq Scan" and relation.startswith(table):
+            problems.append(f"Seq Scan по {relation}")
+    if not any(node.get("Node Type") in INDEX_SCAN_NODES for node in _walk(plan)):
+        problems.append("в плане нет доступа по индексу")
+    return problems
+
+
+def check_survey_lookup_plans(engine) -> Dict[str, List[str]]:
+    """Проверить, что выборки опросов за день идут по индексам surveys
+
+    Seq Scan запрещается на время проверки: на маленькой таблице планировщик
+    иначе честно выберет полный просмотр, и проверка ничего бы не показала.
+    """
+    day_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    params = {
+        "user_id": 1,
+        "survey_type": "morning",
+        "day_start": day_start,
+        "day_end": day_start + timedelta(days=1),
+    }
+
+    results = {}
+    with engine.connect() as conn:
+        with conn.begin():
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, sql in SURVEY_LOOKUPS.items():
+                results[name] = plan_problems(explain(conn, sql, params)["Plan"], "surveys")
+    return results
+
+
+def _sample_params(conn) -> dict:
+    """Параметры запросов: реальный участник организации, если он есть"""
+    row = conn.execute(text(
+        "SELECT id, user_id, org_id FROM users WHERE org_id IS NOT NULL LIMIT 1"
+    )).first()
+    now = datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "user_id": row.user_id if row else 0,
+        "org_id": row.org_id if row else 0,
+        "survey_type": "morning",
+        "now": now,
+        "day_start": day_start,
+        "day_end": day_start + timedelta(days=1),
+        "month_ago": now - timedelta(days=30),
+    }
+
+
+def _summarize(result: dict) -> dict:
+    """Краткое описание плана: способы доступа к таблицам, стоимость и время"""
+    scans = []
+    for node in _walk(result["Plan"]):
+        if "Scan" in node.get("Node Type", ""):
+            target = node.get("Index Name") or node.get("Relation Name") or ""
+            scans.append(f"{node['Node Type']} {target}".strip())
+    return {
+        "scans": scans,
+        "cost": result["Plan"].get("Total Cost"),
+        "time_ms": result.get("Execution Time"),
+    }
+
+
+def benchmark(engine, compare: bool = True) -> Dict[str, Dict[str, Optional[dict]]]:
+    """Снять планы топ-запросов с текущими индексами и (compare) без них
+
+    Все изменения делаются в одной транзакции, которая всегда откатывается.
+    """
+    results = {name: {"before": None, "after": None} for name in BENCHMARK_QUERIES}
+
+    with engine.connect() as conn:
+        # Транзакция открывается до первого execute: иначе его autobegin
+        # уже начнет транзакцию и conn.begin() упадет
+        trans = conn.begin()
+        try:
+            params = _sample_params(conn)
+            for name, sql in BENCHMARK_QUERIES.items():
+                results[name]["after"] = _summarize(explain(conn, sql, params, analyze=True))
+
+            if compare:
+                for index_name in BENCHMARK_INDEXES:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+                for name, sql in BENCHMARK_QUERIES.items():
+                    results[name]["before"] = _summarize(explain(conn, sql, params, analyze=True))
+        finally:
+            trans.rollback()
+
+    return results
+
+
+def _print_benchmark(results: Dict[str, Dict[str, Optional[dict]]]):
+    for name, snapshots in results.items():
+        print(f"\n📊 {name}")
+        for label in ("before", "after"):
+            snapshot = snapshots[label]
+            if snapshot is None:
+                continue
+            print(
+                f"   {label:>6}: cost={snapshot['cost']} time={snapshot['time_ms']} ms | "
+                f"{', '.join(snapshot['scans']) or '-'}"
+            )
+
+
+def main() -> int:
+    from database import database as db
+
+    parser = argparse.ArgumentParser(description="Проверка планов запросов")
+    parser.add_argument("--benchmark", action="store_true", help="планы топ-20 запросов")
+    parser.add_argument("--no-compare", action="store_true", help="без снимка до индексов")
+    args = parser.parse_args()
+
+    db.init_engine()
+
+    if args.benchmark:
+        _print_benchmark(benchmark(db.engine, compare=not args.no_compare))
+        return 0
+
+    failed = False
+    for name, problems in check_survey_lookup_plans(db.engine).items():
+        if problems:
+            failed = True
+            print(f"❌ {name}: {'; '.join(problems)}")
+        else:
+            print(f"✅ {name}: индекс")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,10 +9,21 @@ from .ai import router as ai_router
 from .admins import get_admin_router 
 from .reports import router as report_router
 from .surveys import router as surveys_router
+from services.media_registry import media_registry
+from services.monitoring import setup_metrics
+from middlewares import LogContextMiddleware
+
+
+async def _install_media_registry(bot):
+    """Статические картинки отправляются по file_id (см. services.media_registry)"""
+    media_registry.install(bot)
 
 
 def register_all_handlers(dp: Dispatcher):
     """Регистрация всех обработчиков"""
+    dp.startup.register(_install_media_registry)
+    dp.update.outer_middleware(LogContextMiddleware())
+    setup_metrics(dp)
     register_start_handlers(dp)
     register_registration_handlers(dp)
     register_profile_handlers(dp)
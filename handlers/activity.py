@@ -8,131 +8,145 @@ from keyboards import (
 )
 
 from utils import get_level_name
-from utils.time import get_current_survey_period_for_user, get_period_display_name, get_period_time_range, get_org_timezone, SUPPORTED_TIMEZONES
+from utils.time import (
+    get_current_survey_period_for_user, get_period_display_name, get_period_time_range, get_org_timezone,
+    get_user_timezone, get_zone, get_period_for_hour, local_day_bounds_utc, SUPPORTED_TIMEZONES
+)
 from utils.states import SurveyStates, ChallengeWaitStates
 from datetime import datetime, timezone as tz, timedelta
-from aiogram.types import FSInputFile
+from services.media_registry import media_registry
 from database import Survey
+from sqlalchemy import and_, exists, func, select
+from typing import Optional
 import logging
 
-activity_pic= FSInputFile('pictures/Activity.png')
-challenge_pic = FSInputFile("pictures/challenges.png")
+activity_pic= media_registry.static('pictures/Activity.png')
+challenge_pic = media_registry.static("pictures/challenges.png")
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+def load_activity_state(user_id: int) -> Optional[dict]:
+    """Состояние меню активности одним запросом
+    
+    Часовой пояс берется из кэша utils.time, по нему считаются период опроса
+    и границы локальных суток. Пользователь, число опросов за сегодня и флаг
+    "опрос этого периода уже пройден" приходят одной строкой.
+    """
+    timezone_str = get_user_timezone(user_id)
+    local_now = datetime.now(get_zone(timezone_str))
+    period = get_period_for_hour(local_now.hour)
+    day_start, day_end = local_day_bounds_utc(timezone_str, local_now.date())
+    
+    today_filter = and_(
+        Survey.user_id == User.id,
+        Survey.date >= day_start,
+        Survey.date < day_end
+    )
+    today_count = select(func.count(Survey.id)).where(today_filter).correlate(User).scalar_subquery()
+    already_taken = exists().where(today_filter, Survey.survey_type == period).correlate(User)
+    
+    session = get_session()
+    try:
+        row = session.query(
+            User.name, User.points, User.level, User.org_id,
+            today_count.label("today_count"),
+            already_taken.label("already_taken")
+        ).filter(User.user_id == user_id).first()
+    finally:
+        session.close()
+    
+    if not row:
+        return None
+    
+    return {
+        "name": row.name,
+        "points": row.points,
+        "level": row.level,
+        "org_id": row.org_id,
+        "period": period,
+        "already_taken": bool(row.already_taken),
+        "today_count": row.today_count or 0,
+        "timezone": timezone_str,
+        "local_time": local_now,
+    }
+
+def format_activity_survey_info(state: dict) -> str:
+    """Блок меню про опросы и местное время"""
+    current_period = state["period"]
+    
+    if current_period == "none":
+        survey_info = "🌙 Ночью опросы недоступны\nДоступны с 6:00 до 22:00"
+    else:
+        period_name = get_period_display_name(current_period)
+        
+        if state["already_taken"]:
+            survey_info = f"✅ {period_name} уже пройден"
+        else:
+            survey_info = f"🎯 {period_name} доступен!"
+        
+        if state["today_count"] > 0:
+            survey_info += f"\n\n📊 Сегодня пройдено: {state['today_count']}/3 опросов"
+    
+    # Показываем текущее время организации
+    if state["org_id"]:
+        time_str = state["local_time"].strftime("%H:%M")
+        timezone_display = [name for name, tz_name in SUPPORTED_TIMEZONES if tz_name == state["timezone"]]
+        timezone_display = timezone_display[0] if timezone_display else state["timezone"]
+        survey_info += f"\n\n🕐 Часовой пояс: {timezone_display}\n⏰ Местное время: {time_str}"
+    
+    return survey_info
+
+def activity_survey_button(state: dict) -> types.InlineKeyboardButton:
+    """Кнопка опроса: пройти, уже пройден или ночь"""
+    current_period = state["period"]
+    
+    if current_period != "none" and not state["already_taken"]:
+        return types.InlineKeyboardButton(
+            text=f"📝 {get_period_display_name(current_period)}", 
+            callback_data="survey_start"
+        )
+    if current_period == "none":
+        return types.InlineKeyboardButton(
+            text="🌙 Ночью опросы недоступны", 
+            callback_data="survey_unavailable"
+        )
+    return types.InlineKeyboardButton(
+        text=f"✅ {get_period_display_name(current_period)} пройден", 
+        callback_data="survey_unavailable"
+    )
+
 @router.message(F.text == "📈 Активность")
 async def show_activity_menu(message: types.Message) -> None:
     """Меню активности и опросов с учетом часового пояса организации"""
     try:
-        user_id = message.from_user.id
-        session = get_session()
-        user = session.query(User).filter(User.user_id == user_id).first()
+        state = load_activity_state(message.from_user.id)
         
-        if not user:
+        if not state:
             await message.answer("❌ Вы не зарегистрированы")
-            session.close()
             return
         
-        current_period = get_current_survey_period_for_user(user_id)
-        
-        # Формируем информацию об опросах
-        survey_info = ""
-        
-        if current_period == "none":
-            survey_info = "🌙 Ночью опросы недоступны\nДоступны с 6:00 до 22:00"
-        else:
-            period_name = get_period_display_name(current_period)
-            time_range = get_period_time_range(current_period)
-            
-            from sqlalchemy import func
-            today = datetime.now(tz.utc).date()
-            
-            # Проверяем, проходил ли уже этот опрос сегодня
-            already_taken = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                Survey.survey_type == current_period,
-                func.date(Survey.date) == today
-            ).first()
-            
-            # Получаем все опросы за сегодня для счетчика
-            today_surveys = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                func.date(Survey.date) == today
-            ).all()
-            
-            completed_count = len(today_surveys)
-            
-            if already_taken:
-                survey_info = f"✅ {period_name} уже пройден"
-            else:
-                survey_info = f"🎯 {period_name} доступен!"
-            
-            if completed_count > 0:
-                survey_info += f"\n\n📊 Сегодня пройдено: {completed_count}/3 опросов"
-        
-        # 🔴 ДОПОЛНИТЕЛЬНО: Показываем текущее время организации
-        from utils.time import get_current_org_time
-        if user.org_id:
-            org_time = get_current_org_time(user.org_id)
-            time_str = org_time.strftime("%H:%M")
-            timezone_str = get_org_timezone(user.org_id)
-            timezone_display = [name for name, tz in SUPPORTED_TIMEZONES if tz == timezone_str]
-            timezone_display = timezone_display[0] if timezone_display else timezone_str
-            survey_info += f"\n\n🕐 Часовой пояс: {timezone_display}\n⏰ Местное время: {time_str}"
-        
         activity_text = (
             f"📈 ВАША АКТИВНОСТЬ\n\n"
-            f"👤 {user.name}\n"
-            f"💎 Баллы: {user.points}\n"
-            f"🥇 Уровень: {get_level_name(user.level)}\n\n"
-            f"{survey_info}\n\n"
+            f"👤 {state['name']}\n"
+            f"💎 Баллы: {state['points']}\n"
+            f"🥇 Уровень: {get_level_name(state['level'])}\n\n"
+            f"{format_activity_survey_info(state)}\n\n"
             f"Выбери действие:"
         )
         
-        # Определяем доступность опроса
-        can_survey = False
-        if current_period != "none":
-            from sqlalchemy import func
-            today = datetime.now(tz.utc).date()
-            already_taken = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                Survey.survey_type == current_period,
-                func.date(Survey.date) == today
-            ).first()
-            can_survey = not already_taken
-        
-        inline_keyboard = []
-        
-        if can_survey:
-            inline_keyboard.append([types.InlineKeyboardButton(
-                text=f"📝 {get_period_display_name(current_period)}", 
-                callback_data="survey_start"
-            )])
-        else:
-            if current_period == "none":
-                inline_keyboard.append([types.InlineKeyboardButton(
-                    text="🌙 Ночью опросы недоступны", 
-                    callback_data="survey_unavailable"
-                )])
-            else:
-                inline_keyboard.append([types.InlineKeyboardButton(
-                    text=f"✅ {get_period_display_name(current_period)} пройден", 
-                    callback_data="survey_unavailable"
-                )])
-        
-        inline_keyboard.extend([
+        inline_keyboard = [
+            [activity_survey_button(state)],
             [types.InlineKeyboardButton(text="📊 История опросов", callback_data="survey_history")],
             [types.InlineKeyboardButton(text="📋 Опросы метрик", callback_data="user_survey")],
             [types.InlineKeyboardButton(text="⚡ Активные челленджи", callback_data="challenges_view")],
             [types.InlineKeyboardButton(text="👥 Лидерборд команды", callback_data="leaderboard_view")],
             [types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_menu")]
-        ])
+        ]
         
         kb = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
         
         await message.answer_photo(photo=activity_pic, caption=activity_text, reply_markup=kb)
-        session.close()
         
     except Exception as e:
         await message.answer(f"❌ Ошибка: {e}")
@@ -156,10 +170,10 @@ async def start_survey(callback: types.CallbackQuery, state: FSMContext) -> None
         
         current_period = get_current_survey_period_for_user(user_id)
         
-        print(f"\n🔍 DEBUG start_survey:")
-        print(f"   User: {user.name} (DB ID: {user.id}, Telegram ID: {user.user_id})")
-        print(f"   Current period: {current_period}")
-        print(f"   Org ID: {user.org_id}")
+        logger.debug(
+            f"start_survey: user_db_id={user.id}, user_id={user.user_id}, "
+            f"period={current_period}, org_id={user.org_id}"
+        )
         
         if current_period == "none":
             await callback.message.delete()
@@ -186,15 +200,17 @@ async def start_survey(callback: types.CallbackQuery, state: FSMContext) -> None
             session.close()
             return
         
-        # Остальной код остается без изменений...
-        from sqlalchemy import func
-        today = datetime.now(tz.utc).date()
+        # Полуоткрытый диапазон локальных суток организации в UTC (использует индекс)
+        day_start, day_end = local_day_bounds_utc(get_user_timezone(user_id))
         
-        already_taken = session.query(Survey).filter(
-            Survey.user_id == user.id,
-            Survey.survey_type == current_period,
-            func.date(Survey.date) == today
-        ).first()
+        already_taken = session.query(
+            exists().where(
+                Survey.user_id == user.id,
+                Survey.survey_type == current_period,
+                Survey.date >= day_start,
+                Survey.date < day_end
+            )
+        ).scalar()
         
         if already_taken:
             await callback.message.delete()
@@ -210,7 +226,7 @@ async def start_survey(callback: types.CallbackQuery, state: FSMContext) -> None
         
         await state.update_data(survey_type=current_period)
         
-        print(f"   ✅ Начинаем {current_period} опрос...")
+        logger.debug(f"✅ Начинаем {current_period} опрос...")
         await callback.message.delete()
         await callback.message.answer(
             f"{get_period_display_name(current_period)}\n\n"
@@ -220,9 +236,7 @@ async def start_survey(callback: types.CallbackQuery, state: FSMContext) -> None
         await state.set_state(SurveyStates.waiting_for_sleep)
         
     except Exception as e:
-        print(f"❌ Ошибка в start_survey: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"❌ Ошибка в start_survey: {e}", exc_info=True)
         await callback.message.answer(f"❌ Ошибка: {e}")
 
 @router.callback_query(SurveyStates.waiting_for_sleep, F.data.startswith("sleep_"))
@@ -270,8 +284,6 @@ async def process_readiness(callback: types.CallbackQuery, state: FSMContext) ->
 @router.callback_query(SurveyStates.waiting_for_mood, F.data.startswith("mood_"))
 async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None:
     """Обработка настроения - сохраняем с типом опроса"""
-    import traceback
-    
     try:
         mood_value = callback.data.replace("mood_", "")
         mood_map = {
@@ -285,9 +297,7 @@ async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None
         data = await state.get_data()
         user_id = callback.from_user.id
         
-        print(f"\n🔍 DEBUG process_mood:")
-        print(f"   User ID (Telegram): {user_id}")
-        print(f"   Data from state: {data}")
+        logger.debug(f"process_mood: user_id={user_id}, state_keys={sorted(data)}")
         
         session = get_session()
         
@@ -295,22 +305,19 @@ async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None
             user = session.query(User).filter(User.user_id == user_id).first()
             
             if not user:
-                print(f"❌ User not found in DB for telegram_id={user_id}")
+                logger.error(f"❌ User not found in DB for telegram_id={user_id}")
                 await callback.message.edit_text("❌ Пользователь не найден")
                 return
             
-            print(f"✅ User found: {user.name}, DB ID: {user.id}")
+            logger.debug(f"✅ User found: {user.name}, DB ID: {user.id}")
             
             survey_type = data.get("survey_type", "morning")
             
-            print(f"📝 Saving survey type: {survey_type}")
-            print(f"   Energy: {data.get('energy')}")
-            print(f"   Sleep: {data.get('sleep')}")
-            print(f"   Readiness: {data.get('readiness')}")
-            print(f"   Mood: {mood_text}")
+            logger.debug(
+                f"Сохранение опроса {survey_type}: energy={data.get('energy')}, "
+                f"sleep={data.get('sleep')}, readiness={data.get('readiness')}"
+            )
             
-            # Отладочный вызов
-            print(f"🔍 Calling MetricsCollector.record_survey...")
             success = MetricsCollector.record_survey(
             user_db_id=user.id,
                 survey_type=survey_type,
@@ -320,7 +327,7 @@ async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None
                 mood=mood_text
             )
             
-            print(f"✅ MetricsCollector.record_survey returned: {success}")
+            logger.debug(f"✅ MetricsCollector.record_survey returned: {success}")
             
             if success:
                 # Обновляем пользователя напрямую (на всякий случай)
@@ -332,14 +339,14 @@ async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None
                 user.mood = mood_text
                 
                 session.commit()
-                print(f"✅ User updated in DB")
+                logger.debug(f"✅ User updated in DB")
                 
                 # Добавляем Баллы
                 try:
                     MetricsCollector.add_points(user.user_id, 1, "survey_completed")
-                    print(f"✅ Points added")
+                    logger.debug(f"✅ Points added")
                 except Exception as e:
-                    print(f"⚠️ Error adding points: {e}")
+                    logger.warning(f"⚠️ Error adding points: {e}")
                 
                 from utils.time import get_period_display_name, get_current_survey_period
                 
@@ -360,16 +367,14 @@ async def process_mood(callback: types.CallbackQuery, state: FSMContext) -> None
             await callback.message.answer(response_text, reply_markup=back_to_activity_keyboard())
             
         except Exception as e:
-            print(f"❌ Error in process_mood DB operations: {e}")
-            traceback.print_exc()
+            logger.error(f"❌ Error in process_mood DB operations: {e}", exc_info=True)
             await callback.message.answer(f"❌ Ошибка при сохранении: {e}", reply_markup=back_to_activity_keyboard())
         finally:
             session.close()
             await state.clear()
             
     except Exception as e:
-        print(f"❌ General error in process_mood: {e}")
-        traceback.print_exc()
+        logger.error(f"❌ General error in process_mood: {e}", exc_info=True)
         await callback.message.answer(f"❌ Ошибка: {e}", reply_markup=back_to_activity_keyboard())
 
 
@@ -398,14 +403,16 @@ async def survey_unavailable(callback: types.CallbackQuery) -> None:
             session.close()
             return
         
-        from sqlalchemy import func
-        today = datetime.now(tz.utc).date()
+        day_start, day_end = local_day_bounds_utc(get_user_timezone(user_id))
         
-        already_taken = session.query(Survey).filter(
-            Survey.user_id == user.id,
-            Survey.survey_type == current_period,
-            func.date(Survey.date) == today
-        ).first()
+        already_taken = session.query(
+            exists().where(
+                Survey.user_id == user.id,
+                Survey.survey_type == current_period,
+                Survey.date >= day_start,
+                Survey.date < day_end
+            )
+        ).scalar()
         
         if already_taken:
             # Определяем следующий период
@@ -506,7 +513,7 @@ async def show_challenges(callback: types.CallbackQuery) -> None:
         )
         
     except Exception as e:
-        print(f"🔴 Ошибка в show_challenges: {e}")
+        logger.error(f"🔴 Ошибка в show_challenges: {e}")
         await callback.message.answer(f"❌ Ошибка: {e}", reply_markup=back_to_activity_keyboard())
 
 @router.callback_query(F.data.startswith("challenge_complete_"))
@@ -563,7 +570,7 @@ async def complete_challenge(callback: types.CallbackQuery) -> None:
         )
         
     except Exception as e:
-        print(f"🔴 Ошибка в complete_challenge: {e}")
+        logger.error(f"🔴 Ошибка в complete_challenge: {e}")
         await callback.message.edit_text(f"❌ Ошибка: {e}", reply_markup=back_to_activity_keyboard())
 
 @router.callback_query(F.data.startswith("challenge_reject_"))
@@ -627,114 +634,32 @@ async def show_leaderboard(callback: types.CallbackQuery) -> None:
 async def back_to_activity(call: types.CallbackQuery) -> None:
     """Обработчик кнопки назад для активности"""
     try:
-        user_id = call.from_user.id  # 🔴 Исправлено: call.from_user.id вместо call.message.from_user.id
-        session = get_session()
-        user = session.query(User).filter(User.user_id == user_id).first()
+        state = load_activity_state(call.from_user.id)
         
-        # 🔴 ВАЖНО: Проверяем, что пользователь найден
-        if not user:
+        if not state:
             await call.message.answer("❌ Пользователь не найден. Пройдите регистрацию.")
-            session.close()
             return
         
-        current_period = get_current_survey_period_for_user(user_id)
-        
-        # Формируем информацию об опросах
-        survey_info = ""
-        
-        if current_period == "none":
-            survey_info = "🌙 Ночью опросы недоступны\nДоступны с 6:00 до 22:00"
-        else:
-            period_name = get_period_display_name(current_period)
-            time_range = get_period_time_range(current_period)
-            
-            from sqlalchemy import func
-            today = datetime.now(tz.utc).date()
-            
-            # 🔴 Теперь user точно не None, можем безопасно использовать user.id
-            already_taken = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                Survey.survey_type == current_period,
-                func.date(Survey.date) == today
-            ).first()
-            
-            # Получаем все опросы за сегодня для счетчика
-            today_surveys = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                func.date(Survey.date) == today
-            ).all()
-            
-            completed_count = len(today_surveys)
-            
-            if already_taken:
-                survey_info = f"✅ {period_name} уже пройден"
-            else:
-                survey_info = f"🎯 {period_name} доступен!"
-            
-            if completed_count > 0:
-                survey_info += f"\n\n📊 Сегодня пройдено: {completed_count}/3 опросов"
-        
-        # 🔴 ДОПОЛНИТЕЛЬНО: Показываем текущее время организации
-        from utils.time import get_current_org_time
-        if user.org_id:
-            org_time = get_current_org_time(user.org_id)
-            time_str = org_time.strftime("%H:%M")
-            timezone_str = get_org_timezone(user.org_id)
-            timezone_display = [name for name, tz in SUPPORTED_TIMEZONES if tz == timezone_str]
-            timezone_display = timezone_display[0] if timezone_display else timezone_str
-            survey_info += f"\n\n🕐 Часовой пояс: {timezone_display}\n⏰ Местное время: {time_str}"
-        
         activity_text = (
             f"📈 *ВАША АКТИВНОСТЬ*\n\n"
-            f"👤 {user.name}\n"
-            f"💎 Баллы: {user.points}\n"
-            f"📌 Опыт: {get_level_name(user.level)}\n\n"
-            f"{survey_info}\n\n"
+            f"👤 {state['name']}\n"
+            f"💎 Баллы: {state['points']}\n"
+            f"📌 Опыт: {get_level_name(state['level'])}\n\n"
+            f"{format_activity_survey_info(state)}\n\n"
             f"Выбери действие:"
         )
         
-        # Определяем доступность опроса
-        can_survey = False
-        if current_period != "none":
-            from sqlalchemy import func
-            today = datetime.now(tz.utc).date()
-            already_taken = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                Survey.survey_type == current_period,
-                func.date(Survey.date) == today
-            ).first()
-            can_survey = not already_taken
-        
-        inline_keyboard = []
-        
-        if can_survey:
-            inline_keyboard.append([types.InlineKeyboardButton(
-                text=f"📝 {get_period_display_name(current_period)}", 
-                callback_data="survey_start"
-            )])
-        else:
-            if current_period == "none":
-                inline_keyboard.append([types.InlineKeyboardButton(
-                    text="🌙 Ночью опросы недоступны", 
-                    callback_data="survey_unavailable"
-                )])
-            else:
-                inline_keyboard.append([types.InlineKeyboardButton(
-                    text=f"✅ {get_period_display_name(current_period)} пройден", 
-                    callback_data="survey_unavailable"
-                )])
-        
-        inline_keyboard.extend([
+        inline_keyboard = [
+            [activity_survey_button(state)],
             [types.InlineKeyboardButton(text="📊 История опросов", callback_data="survey_history")],
             [types.InlineKeyboardButton(text="⚡ Активные челленджи", callback_data="challenges_view")],
             [types.InlineKeyboardButton(text="👥 Лидерборд команды", callback_data="leaderboard_view")],
             [types.InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_menu")]
-        ])
+        ]
         
         kb = types.InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
         
         await call.message.answer_photo(photo=activity_pic, parse_mode = 'Markdown', caption=activity_text, reply_markup=kb)
-        session.close()
         
     except Exception as e:
         await call.message.answer(f"❌ Ошибка: {e}")
@@ -1,6 +1,9 @@
 from aiogram import Router, Dispatcher
 from .permissions import AdminPermission, require_admin, AdminContext
 from .menu_manager import menu_manager
+import logging
+
+logger = logging.getLogger(__name__)
 
 __all__ = ['get_admin_router', 'AdminPermission', 'require_admin', 'AdminContext', 'menu_manager']
 
@@ -13,9 +16,9 @@ def register_all_handlers(dp: Dispatcher):
     try:
         admin_router = get_admin_router()
         dp.include_router(admin_router)
-        print("✅ Админ-роутер подключен")
+        logger.info("✅ Админ-роутер подключен")
     except Exception as e:
-        print(f"❌ Ошибка подключения админ-роутера: {e}")
+        logger.error(f"❌ Ошибка подключения админ-роутера: {e}")
 
 def get_admin_router() -> Router:
     """Создать и настроить роутер админ-панели"""
@@ -25,80 +28,80 @@ def get_admin_router() -> Router:
     try:
         from .modules.challenges import router as challenges_router
         admin_router.include_router(challenges_router)
-        print("✅ challenges загружен")
+        logger.info("✅ challenges загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить challenges: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить challenges: {e}")
     
     try:
         from .modules.members import router as members_router
         admin_router.include_router(members_router)
-        print("✅ members загружен")
+        logger.info("✅ members загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить members: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить members: {e}")
     
     try:
         from .modules.statistics import router as statistics_router
         admin_router.include_router(statistics_router)
-        print("✅ statistics загружен")
+        logger.info("✅ statistics загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить statistics: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить statistics: {e}")
     
     try:
         from .modules.vacancies import router as vacancies_router
         admin_router.include_router(vacancies_router)
-        print("✅ vacancies загружен")
+        logger.info("✅ vacancies загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить vacancies: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить vacancies: {e}")
     
     try:
         from .modules.broadcast import router as broadcast_router
         admin_router.include_router(broadcast_router)
-        print("✅ broadcast загружен")
+        logger.info("✅ broadcast загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить broadcast: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить broadcast: {e}")
     
     try:
         from .modules.schedule import router as schedule_router
         admin_router.include_router(schedule_router)
-        print("✅ schedule загружен")
+        logger.info("✅ schedule загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить schedule: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить schedule: {e}")
     
     try:
         from .modules.system import router as system_router
         admin_router.include_router(system_router)
-        print("✅ system загружен")
+        logger.info("✅ system загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить system: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить system: {e}")
     
     try:
         from .modules.organizations import router as organisation_router
         admin_router.include_router(organisation_router)
-        print("✅ organisation загружен")
+        logger.info("✅ organisation загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить organisation: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить organisation: {e}")
 
     try:
         from .modules.timezone import router as timezone_router
         admin_router.include_router(timezone_router)
-        print("✅ timezone загружен")
+        logger.info("✅ timezone загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить timezone: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить timezone: {e}")
 
     try:
         from .modules.verify import router as verify_router
         admin_router.include_router(verify_router)
-        print("✅ verify загружен")
+        logger.info("✅ verify загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить verify: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить verify: {e}")
 
     try:
         from .modules import metrics
         admin_router.include_router(metrics.router)
-        print("✅ metrics загружен")
+        logger.info("✅ metrics загружен")
     except ImportError as e:
-        print(f"⚠️ Не удалось загрузить metrics: {e}")
-        print(f"Ошибка: {e}")
+        logger.warning(f"⚠️ Не удалось загрузить metrics: {e}")
+        logger.error(f"Ошибка: {e}")
     
     
     return admin_router
@@ -6,6 +6,7 @@ from aiogram.fsm.context import FSMContext
 from database import get_session, UserRole
 from database.models import User, Organization
 from utils.states import BroadcastStates, GlobalBroadcastStates
+from services.monitoring import record_broadcast
 import logging
 
 router = Router()
@@ -188,6 +189,7 @@ async def confirm_broadcast(callback: types.CallbackQuery, state: FSMContext) ->
         sent_count = 0
         failed_count = 0
         failed_users = []
+        started = datetime.now()
         
         for member in members:
             try:
@@ -207,6 +209,8 @@ async def confirm_broadcast(callback: types.CallbackQuery, state: FSMContext) ->
                 failed_users.append(f"{member.name} (ID: {member.user_id})")
                 logger.warning(f"Не удалось отправить сообщение пользователю {member.user_id}: {e}")
         
+        record_broadcast("organization", sent_count, failed_count, (datetime.now() - started).total_seconds())
+        
         # Формируем отчет
         report_text = (
             f"✅ *Рассылка завершена!*\n\n"
@@ -420,6 +424,7 @@ async def confirm_global_broadcast(callback: types.CallbackQuery, state: FSMCont
 
         sent_count = 0
         failed_count = 0
+        started = datetime.now()
 
         # Отправляем сообщения
         for user in users:
@@ -434,6 +439,8 @@ async def confirm_global_broadcast(callback: types.CallbackQuery, state: FSMCont
                 logger.error(f"Failed to send message to user {user.user_id}: {e}")
                 failed_count += 1
 
+        record_broadcast("global", sent_count, failed_count, (datetime.now() - started).total_seconds())
+
         # Отчет об отправке
         result_text = (
             f"📢 *Глобальная рассылка завершена*\n\n"
@@ -8,7 +8,7 @@ from database.models import PlayerMetrics
 from utils.states import MetricsStates
 from services import MetricsCollector
 import logging
-from config import load_config
+from services.permissions import permission_service
 from .metrics import router as metrics_router
 
 router = Router()
@@ -16,78 +16,23 @@ logger = logging.getLogger(__name__)
 
 def is_super_admin(user_id: int) -> bool:
     """Проверить, является ли пользователь суперадмином"""
-    config = load_config()
-    if user_id in config.admin_ids:
-        return True
-    
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user and user.role == UserRole.SUPER_ADMIN.value:
-            return True
-        return False
-    finally:
-        session.close()
+    return permission_service.is_super_admin(user_id)
 
 def is_admin(user_id: int) -> bool:
     """Проверить что пользователь администратор (суперадмин или админ организации)"""
-    if is_super_admin(user_id):
-        return True
-    
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return False
-        
-        from database import get_admin_roles
-        admin_roles = get_admin_roles()
-        
-        logger.info(f"is_admin check: user_id={user_id}, role={user.role}, "
-                   f"admin_roles={admin_roles}, is_admin={user.role in admin_roles}")
-        
-        return user.role in admin_roles
-        
-    except Exception as e:
-        logger.error(f"Ошибка в is_admin: {e}")
-        return False
-    finally:
-        session.close()
+    return permission_service.is_org_admin(user_id)
 
 def is_trainer(user_id: int) -> bool:
     """Проверить, является ли пользователь тренером (только верифицированные!)"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        # Тренер должен быть верифицирован!
-        return user and user.role == UserRole.TRAINER.value and user.trainer_verified
-    finally:
-        session.close()
+    return permission_service.is_trainer(user_id)
 
 def is_trainer_pending(user_id: int) -> bool:
     """Проверить, является ли пользователь тренером, ожидающим верификации"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        return user and user.role == UserRole.TRAINER.value and not user.trainer_verified
-    finally:
-        session.close()
+    return permission_service.is_trainer_pending(user_id)
 
 def get_user_effective_role(user_id: int) -> str:
     """Получить фактическую роль пользователя с учетом верификации"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return UserRole.MEMBER.value
-        
-        # Если тренер не верифицирован - он участник
-        if user.role == UserRole.TRAINER.value and not user.trainer_verified:
-            return UserRole.MEMBER.value
-        
-        return user.role
-    finally:
-        session.close()
+    return permission_service.effective_role(user_id)
 
 def has_view_access(user_id: int) -> bool:
     """Проверить, имеет ли пользователь доступ к админ-панели"""
@@ -98,27 +43,7 @@ def has_view_access(user_id: int) -> bool:
 
 def get_verification_permission(user_id: int) -> bool:
     """Проверить, может ли пользователь верифицировать тренеров и управлять ролями"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return False
-        
-        # Суперадмины могут все
-        if user.role == UserRole.SUPER_ADMIN.value:
-            return True
-        
-        # Админы организаций могут верифицировать тренеров в своей организации
-        if user.role == UserRole.ORG_ADMIN.value:
-            return True
-        
-        # Тренеры не могут верифицировать других
-        return False
-    except Exception as e:
-        logger.error(f"Ошибка в get_verification_permission: {e}")
-        return False
-    finally:
-        session.close()
+    return permission_service.can_manage_roles(user_id)
 
 @router.message(Command ('admin'))
 @router.message(F.text == '👑 Админ меню')
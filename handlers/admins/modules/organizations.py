@@ -4,7 +4,9 @@ from sqlalchemy import func
 from aiogram.utils.keyboard import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command, StateFilter
 from utils.states import CreateOrganizationStates
-from database import get_session, User, Organization, Challenge, ChallengeStatus, UserRole
+from utils.time import invalidate_org_timezone, invalidate_user_org
+from services.permissions import permission_service
+from database import get_session, query_budget, User, Organization, Challenge, ChallengeStatus, UserRole
 from datetime import timezone, datetime
 from html import escape
 import logging
@@ -15,25 +17,8 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
-# Добавляем функцию is_super_admin, если ее нет в members.py
 def is_super_admin(user_id: int) -> bool:
-    try:
-        from .members import is_super_admin as members_is_super_admin
-        return members_is_super_admin(user_id)
-    except ImportError:
-        # Резервная проверка
-        from config import load_config
-        config = load_config()
-        if user_id in config.admin_ids:
-            return True
-        
-        session = get_session()
-        try:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            from database import UserRole
-            return user and user.role == UserRole.SUPER_ADMIN.value
-        finally:
-            session.close()
+    return permission_service.is_super_admin(user_id)
 
 @router.callback_query(F.data == "admin_select_organization")
 async def admin_select_organization(callback: types.CallbackQuery):
@@ -289,6 +274,7 @@ async def superadmin_view_member(callback: types.CallbackQuery):
         session.close()
 
 @router.callback_query(F.data.startswith("superadmin_org_stats_"))
+@query_budget(10)
 async def superadmin_org_stats(callback: types.CallbackQuery):
     """Статистика организации"""
     org_id = int(callback.data.replace("superadmin_org_stats_", ""))
@@ -446,6 +432,7 @@ __all__ = ['router']
 
 
 @router.callback_query(F.data.startswith("admin_view_challenges_"))
+@query_budget(5)
 async def admin_view_challenges(callback: types.CallbackQuery):
     """Просмотр всех челленджей организации"""
     org_id = int(callback.data.replace("admin_view_challenges_", ""))
@@ -512,10 +499,12 @@ async def admin_view_challenges(callback: types.CallbackQuery):
             f"📋 *Последние челленджи:*"
         )
         
-        # Показываем последние 5 челленджей
-        for i, challenge in enumerate(challenges[:5], 1):
-            # Находим пользователя по user_id (BigInteger)
-            user = session.query(User).filter(User.user_id == challenge.user_id).first()
+        # Показываем последние 5 челленджей; имена авторов - одним запросом
+        recent = challenges[:5]
+        user_names = dict(session.query(User.user_id, User.name).filter(
+            User.user_id.in_({c.user_id for c in recent})
+        ).all())
+        for i, challenge in enumerate(recent, 1):
             status_icon = {
                 "ACTIVE": "🟢",
                 "COMPLETED": "✅",
@@ -525,7 +514,7 @@ async def admin_view_challenges(callback: types.CallbackQuery):
             }.get(challenge.status, "⚪")
             
             deadline = challenge.scheduled_for.strftime("%d.%m.%Y %H:%M") if challenge.scheduled_for else "Без срока"
-            user_name = user.name if user else f"User #{challenge.user_id}"
+            user_name = user_names.get(challenge.user_id) or f"User #{challenge.user_id}"
             
             # Обрезаем текст челленджа, если он слишком длинный
             challenge_text = challenge.text[:30] + "..." if len(challenge.text) > 30 else challenge.text
@@ -1049,6 +1038,8 @@ async def finalize_organization_creation(callback: types.CallbackQuery, state: F
             session.add(user)
         
         session.commit()
+        invalidate_user_org(user_id)
+        permission_service.invalidate(user_id)
         
         # Успешное сообщение
         sport_names = {
@@ -1281,6 +1272,7 @@ async def final_delete_organization(callback: types.CallbackQuery, state: FSMCon
         
         # 2. Обновляем пользователей (убираем org_id, сбрасываем роль)
         users = session.query(User).filter(User.org_id == org_id).all()
+        detached_user_ids = [user.user_id for user in users]
         for user in users:
             user.org_id = None
             # Если пользователь был админом организации, сбрасываем роль
@@ -1293,6 +1285,11 @@ async def final_delete_organization(callback: types.CallbackQuery, state: FSMCon
         # 4. Коммитим все изменения
         session.commit()
         
+        invalidate_org_timezone(org_id)
+        for detached_user_id in detached_user_ids:
+            invalidate_user_org(detached_user_id)
+            permission_service.invalidate(detached_user_id)
+        
         # Формируем отчет об удалении
         report_text = (
             f"🗑️ *Организация удалена*\n\n"
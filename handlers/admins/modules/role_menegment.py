@@ -7,6 +7,7 @@ from utils.states import RoleManagementStates
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from database import User, Organization, UserRole, get_session
+from services.permissions import permission_service
 from datetime import datetime, timezone
 import logging
 from typing import List
@@ -16,23 +17,7 @@ router = Router()
 
 def get_verification_permission(user_id: int) -> bool:
     """Проверить, может ли пользователь управлять ролями"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return False
-        
-        # Суперадмины могут управлять всеми
-        if user.role == UserRole.SUPER_ADMIN.value:
-            return True
-        
-        # Админы организаций могут управлять в своей организации
-        if user.role == UserRole.ORG_ADMIN.value:
-            return True
-        
-        return False
-    finally:
-        session.close()
+    return permission_service.can_manage_roles(user_id)
 
 @router.callback_query(F.data == "admin_manage_roles")
 async def admin_manage_roles(callback: types.CallbackQuery, state: FSMContext):
@@ -297,6 +282,7 @@ async def set_user_role(callback: types.CallbackQuery, state: FSMContext):
             target_user.verification_requested_at = None
         
         session.commit()
+        permission_service.invalidate(target_user.user_id)
         
         # Отправляем уведомление пользователю
         role_names = {
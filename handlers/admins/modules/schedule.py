@@ -45,6 +45,9 @@ from .members import is_admin
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+import pytz
+from services.leader_election import scheduler_leader, leader_only
+from services.monitoring import instrument_scheduler
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -58,43 +61,88 @@ class BotScheduler:
     def __init__(self, bot):
         self.bot = bot
         self.scheduler = AsyncIOScheduler(timezone="UTC")
+        instrument_scheduler(self.scheduler)
         
     def start(self):
         """Запуск планировщика"""
         
-        # 1. Основная проверка - каждый час
+        # 1. Напоминания: по одной задаче на часовой пояс, срабатывает в 18:00 местного
+        #    времени. Список поясов сверяем сразу при старте и затем раз в час
         self.scheduler.add_job(
-            self._check_and_send_reminders,
-            CronTrigger(minute=0, timezone="UTC"),  # Каждый час в 00 минут
-            id="hourly_reminders",
-            name="Напоминания каждый час",
+            self._sync_reminder_jobs,
+            CronTrigger(minute=5, timezone="UTC"),
+            id="reminder_jobs_sync",
+            name="Синхронизация задач напоминаний",
+            next_run_time=datetime.now(pytz.UTC),
             replace_existing=True
         )
         
-        # 2. Для теста - каждые 10 минут
+        # 2. Обслуживание партиций журналов - раз в сутки ночью
         self.scheduler.add_job(
-            self._check_and_send_reminders,
-            CronTrigger(minute="*/10", timezone="UTC"),
-            id="test_reminders",
-            name="Тест напоминаний каждые 10 мин",
+            self._maintain_partitions,
+            CronTrigger(hour=3, minute=15, timezone="UTC"),
+            id="partition_maintenance",
+            name="Партиции и архивация журналов",
             replace_existing=True
         )
         
         self.scheduler.start()
+        scheduler_leader.ensure_started()
         logger.info("✅ Планировщик задач запущен")
-        logger.info("⏰ Напоминания будут проверяться каждый час (в 18:00 по времени организации)")
+        logger.info("⏰ Напоминания отправляются в 18:00 по времени каждой организации")
     
-    async def _check_and_send_reminders(self):
-        """Проверяем и отправляем напоминания"""
-        logger.info("⏰ Проверка напоминаний...")
+    async def _sync_reminder_jobs(self):
+        """Завести задачи напоминаний для всех часовых поясов организаций"""
+        from services.reminder import SimpleReminderService, REMINDER_HOUR
         
+        try:
+            timezones = set(SimpleReminderService.get_reminder_timezones())
+        except Exception as e:
+            logger.error(f"❌ Ошибка получения часовых поясов: {e}")
+            return
+        
+        prefix = "reminders_tz:"
+        current = {job.id[len(prefix):] for job in self.scheduler.get_jobs() if job.id.startswith(prefix)}
+        
+        for tz_name in current - timezones:
+            self.scheduler.remove_job(prefix + tz_name)
+        
+        for tz_name in timezones - current:
+            try:
+                trigger = CronTrigger(hour=REMINDER_HOUR, minute=0, timezone=tz_name)
+            except Exception:
+                logger.error(f"Неизвестный часовой пояс: {tz_name}")
+                continue
+            
+            job = self.scheduler.add_job(
+                self._send_reminders_for_timezone,
+                trigger,
+                args=[tz_name],
+                id=prefix + tz_name,
+                name=f"Напоминания {tz_name}",
+                replace_existing=True
+            )
+            logger.info(f"⏰ Напоминания для {tz_name}: следующий запуск {job.next_run_time}")
+    
+    @leader_only
+    async def _send_reminders_for_timezone(self, tz_name: str):
+        """Отправляем напоминания организациям часового пояса"""
         try:
             from services.reminder import SimpleReminderService
             service = SimpleReminderService(self.bot)
-            await service.send_daily_reminders()
+            await service.send_reminders_for_timezone(tz_name)
         except Exception as e:
             logger.error(f"❌ Ошибка отправки напоминаний: {e}")
     
+    @leader_only
+    async def _maintain_partitions(self):
+        """Создаем партиции впрок и архивируем устаревшие"""
+        try:
+            from services.retention import PartitionRetentionService
+            await asyncio.to_thread(PartitionRetentionService().run)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обслуживания партиций: {e}")
+    
     def shutdown(self):
         """Остановка планировщика"""
         if self.scheduler.running:
@@ -6,6 +6,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from database import User, Organization, get_session, UserRole
 from database.models import MessageSchedule
 from services.challenge_storage import challenge_storage
+from services.permissions import permission_service
 from datetime import datetime, timezone, time
 from ..menu_manager import AdminMenuManager
 from utils.states import TimeSettingStates
@@ -65,7 +66,7 @@ async def admin_manage_admins(callback: types.CallbackQuery):
         ).order_by(User.registered_at.desc()).all()
         
         text = "👑 АДМИНИСТРАТОРЫ СИСТЕМЫ\n\n"
-        text += f"🔐 Суперадмины (из .env): {', '.join(map(str, config.admin_ids))}\n\n"
+        text += f"🔐 Суперадмины (из .env): {', '.join(map(str, sorted(config.admin_ids)))}\n\n"
         
         if admins:
             for admin in admins:
@@ -107,6 +108,7 @@ async def promote_to_admin(message: types.Message):
             
             user.role = UserRole.ORG_ADMIN.value
             session.commit()
+            permission_service.invalidate(user.user_id)
             
             await message.answer(
                 f"✅ Пользователь {user.name} (ID: {user.user_id}) назначен администратором!\n\n"
@@ -196,6 +198,7 @@ async def set_role_command(message: types.Message):
                         return
             
             user.role = new_role
+            changed_user_ids = [user.user_id]
             
             if new_role == UserRole.ORG_ADMIN.value:
                 # Назначаем пользователя админом его организации
@@ -228,13 +231,16 @@ async def set_role_command(message: types.Message):
                             org.admin_id = any_user.user_id
                             # Сделаем его админом
                             any_user.role = UserRole.ORG_ADMIN.value
-                            print(f"⚠️ Пользователь {any_user.name} автоматически назначен админом организации {org.name}")
+                            changed_user_ids.append(any_user.user_id)
+                            logger.warning(f"⚠️ Пользователь {any_user.name} автоматически назначен админом организации {org.name}")
                         else:
                             # Если нет других пользователей, назначаем системного админа (user_id = 0)
                             org.admin_id = 0
-                            print(f"⚠️ Организация {org.name} осталась без активного админа")
+                            logger.warning(f"⚠️ Организация {org.name} осталась без активного админа")
             
             session.commit()
+            for changed_user_id in changed_user_ids:
+                permission_service.invalidate(changed_user_id)
             
             from database import get_role_description
             await message.answer(
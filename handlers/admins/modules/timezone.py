@@ -3,7 +3,7 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
 from database import get_session
 from database.models import Organization, User, UserRole
 from aiogram.fsm.context import FSMContext
-from utils.time import create_timezone_keyboard, SUPPORTED_TIMEZONES
+from utils.time import create_timezone_keyboard, SUPPORTED_TIMEZONES, invalidate_org_timezone
 from utils.states import TimezoneStates
 import logging
 
@@ -191,6 +191,7 @@ async def org_admin_confirm_timezone(callback: types.CallbackQuery, state: FSMCo
         # Обновляем часовой пояс организации
         org.timezone = selected_tz
         session.commit()
+        invalidate_org_timezone(org_id)
         
         # Получаем отображаемое имя
         new_display = "Неизвестно"
@@ -3,7 +3,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from database import get_session
 from utils.states import VacancyStates
-import json
+from services.vacancy_store import vacancy_store
 from datetime import datetime
 import logging
 
@@ -144,13 +144,8 @@ async def confirm_vacancy_add(callback: types.CallbackQuery, state: FSMContext):
     try:
         data = await state.get_data()
         
-        # Читаем существующие вакансии
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            vacancies_data = json.load(f)
-        
-        # Добавляем новую вакансию
+        # Добавляем новую вакансию (id назначает каталог)
         new_vacancy = {
-            "id": len(vacancies_data["vacancies"]) + 1,
             "title": data["title"],
             "company": data["company"],
             "type": data["type"],
@@ -160,17 +155,14 @@ async def confirm_vacancy_add(callback: types.CallbackQuery, state: FSMContext):
             "created_by": callback.from_user.id
         }
         
-        vacancies_data["vacancies"].append(new_vacancy)
-        
-        # Сохраняем
-        with open("assets/vacancies.json", "w", encoding="utf-8") as f:
-            json.dump(vacancies_data, f, ensure_ascii=False, indent=2)
+        # Атомарно сохраняем файл и обновляем каталог в памяти
+        total_vacancies = await vacancy_store.add(new_vacancy)
         
         await callback.message.edit_text(
             f"✅ Вакансия добавлена!\n\n"
             f"💼 {data['title']}\n"
             f"🏢 {data['company']}\n\n"
-            f"Всего вакансий: {len(vacancies_data['vacancies'])}"
+            f"Всего вакансий: {total_vacancies}"
         )
         
         await callback.message.answer(
@@ -222,10 +214,7 @@ async def admin_list_vacancies(callback: types.CallbackQuery):
         return
     
     try:
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         
         if not vacancies:
             await callback.message.edit_text(
@@ -331,10 +320,7 @@ async def handle_no_action(callback: types.CallbackQuery):
 async def admin_navigate_vacancies(callback: types.CallbackQuery):
     """Навигация по вакансиям в админке"""
     try:
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         
         if callback.data.startswith("admin_vac_prev_"):
             current_index = int(callback.data.replace("admin_vac_prev_", ""))
@@ -360,30 +346,18 @@ async def admin_delete_vacancy(callback: types.CallbackQuery):
         
         vacancy_index = int(parts[-1]) 
         
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        # Атомарно перезаписываем файл (id перенумеровываются) и обновляем каталог
+        deleted_vacancy = await vacancy_store.delete(vacancy_index)
         
-        if vacancy_index >= len(vacancies):
+        if deleted_vacancy is None:
             await callback.answer("❌ Вакансия не найдена", show_alert=True)
             return
         
-        deleted_vacancy = vacancies[vacancy_index]
-        
-        vacancies.pop(vacancy_index)
-        
-        for i, vac in enumerate(vacancies):
-            vac["id"] = i + 1
-        
-        with open("assets/vacancies.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
         await callback.message.edit_text(
             f"✅ *Вакансия удалена*\n\n"
             f"💼 {deleted_vacancy['title']}\n"
             f"🏢 {deleted_vacancy['company']}\n\n"
-            f"📊 Осталось вакансий: {len(vacancies)}",
+            f"📊 Осталось вакансий: {vacancy_store.count()}",
             parse_mode="Markdown"
         )
         
@@ -5,6 +5,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from .members import get_verification_permission
 from database import User, Organization, UserRole, get_session
+from services.permissions import permission_service
 from datetime import datetime, timezone
 import logging
 from typing import List
@@ -14,16 +15,7 @@ router = Router()
 
 def has_trainer_verification_permission(user_id: int) -> bool:
     """Проверить, может ли пользователь верифицировать тренеров"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            return False
-        
-        # Суперадмины и админы организаций могут верифицировать
-        return user.role in [UserRole.SUPER_ADMIN.value, UserRole.ORG_ADMIN.value]
-    finally:
-        session.close()
+    return permission_service.can_manage_roles(user_id)
 
 def get_pending_trainer_requests(org_id: int = None) -> List[User]:
     """Получить список неподтвержденных тренеров"""
@@ -236,6 +228,7 @@ async def approve_trainer(callback: types.CallbackQuery):
         trainer.verified_by = verifier_id
         
         session.commit()
+        permission_service.invalidate(trainer.user_id)
         
         # Отправляем уведомление тренеру
         try:
@@ -281,6 +274,7 @@ async def reject_trainer(callback: types.CallbackQuery):
         trainer.verification_requested_at = None
         
         session.commit()
+        permission_service.invalidate(trainer.user_id)
         
         # Отправляем уведомление пользователю
         try:
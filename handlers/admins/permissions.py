@@ -3,8 +3,8 @@ from enum import Enum
 from typing import Set, Optional, Callable
 from functools import wraps
 from aiogram.types import CallbackQuery, Message
-from database import User, Organization, get_session, UserRole
-from config import load_config
+from database import Organization, get_session, UserRole
+from services.permissions import permission_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -104,32 +104,23 @@ class AdminContext:
         self._init_context()
     
     def _init_context(self):
-        """Инициализация контекста"""
-        session = get_session()
-        try:
-            user = session.query(User).filter(User.user_id == self.user_id).first()
-            if not user:
-                return
-            
-            db_role = user.role.upper() if user.role else ""
-            
-            config = load_config()
-            if self.user_id in config.admin_ids:
-                self.user_role = "SUPER_ADMIN"
-            else:
-                self.user_role = db_role
+        """Инициализация контекста (роль берется из кэша permission_service)"""
+        access = permission_service.get(self.user_id)
+        if not access["registered"]:
+            return
         
-            
-            self.admin_role = ADMIN_ROLES.get(self.user_role)
-            
-            if self.admin_role:
-                self.permissions = self.admin_role.permissions
-            
-            if self.current_org_id is None:
-                self.current_org_id = user.org_id
-                    
-        finally:
-            session.close()
+        if permission_service.is_env_admin(self.user_id):
+            self.user_role = "SUPER_ADMIN"
+        else:
+            self.user_role = access["role"].upper() if access["role"] else ""
+        
+        self.admin_role = ADMIN_ROLES.get(self.user_role)
+        
+        if self.admin_role:
+            self.permissions = self.admin_role.permissions
+        
+        if self.current_org_id is None:
+            self.current_org_id = access["org_id"]
     
     def has_permission(self, permission: AdminPermission) -> bool:
         """Проверка разрешения"""
@@ -205,16 +196,7 @@ def require_admin(permission: AdminPermission = None):
 
 def is_super_admin(user_id: int) -> bool:
     """Проверить, является ли пользователь суперадмином"""
-    config = load_config()
-    if user_id in config.admin_ids:
-        return True
-    
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        return user and user.role == UserRole.SUPER_ADMIN.value
-    finally:
-        session.close()
+    return permission_service.is_super_admin(user_id)
 
 def is_admin(user_id: int) -> bool:
     """Проверить, является ли пользователь администратором любой роли"""
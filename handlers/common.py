@@ -1,9 +1,12 @@
 from aiogram import Router, F, types, Dispatcher
 from keyboards import get_main_menu_keyboard
-from aiogram.types import FSInputFile
+from services.media_registry import media_registry
+import logging
 
-help_pic = FSInputFile('pictures/help.png')
-mm_pic = FSInputFile('pictures/main_menu.png')
+logger = logging.getLogger(__name__)
+
+help_pic = media_registry.static('pictures/help.png')
+mm_pic = media_registry.static('pictures/main_menu.png')
 
 router = Router()
 
@@ -19,7 +22,7 @@ async def go_back(callback: types.CallbackQuery) -> None:
         )
         await callback.answer()
     except Exception as e:
-        print(f"❌ Ошибка: {e}")
+        logger.error(f"❌ Ошибка: {e}")
         await callback.answer("⚠️ Ошибка!", show_alert=True)
 
 @router.message(F.text == "❔ Справка")
@@ -8,17 +8,17 @@ from utils.states import RegistrationStates
 from datetime import datetime, timezone
 from aiogram.types import FSInputFile, InputMediaPhoto, InlineKeyboardButton, InlineKeyboardMarkup
 import asyncio
-import os
-from pathlib import Path
+from typing import Union
 from middlewares import ClearStateMiddleware
 from config import load_config
+from services.media_registry import media_registry
+from services.profile_photos import profile_photos, PROFILE_PHOTOS_DIR, STANDARD_PROFILE_PIC
+import logging
 
-PROFILE_PHOTOS_DIR = "profile_photos"
-Path(PROFILE_PHOTOS_DIR).mkdir(exist_ok=True)
+logger = logging.getLogger(__name__)
 
-STANDARD_PROFILE_PIC = FSInputFile('pictures/meprofile.png')
-stat_pic = FSInputFile('pictures/Statistic.png')
-awards_pic = FSInputFile('pictures/Awards.png')
+stat_pic = media_registry.static('pictures/Statistic.png')
+awards_pic = media_registry.static('pictures/Awards.png')
 
 
 router = Router()
@@ -70,10 +70,10 @@ async def show_profile_details(callback: types.CallbackQuery) -> None:
         
         profile_text = format_user_full_profile(user, org)
         
-        user_photo = await get_profile_photo_for_user(user_id)
+        user_photo = await get_profile_photo_for_user(user)
         
         await callback.message.delete()
-        await callback.message.answer_photo(
+        sent = await callback.message.answer_photo(
             photo=user_photo,
             caption=profile_text,
             parse_mode='Markdown',
@@ -84,73 +84,29 @@ async def show_profile_details(callback: types.CallbackQuery) -> None:
                 ]
             )
         )
+        await profile_photos.remember_file_id(user, sent)
     except Exception as e:
         await callback.message.answer(f"❌ Ошибка: {e}")
 
 def get_user_profile_photo_path(user_id: int) -> str:
     """Получить путь к фото профиля пользователя"""
-    return os.path.join(PROFILE_PHOTOS_DIR, f"user_{user_id}_profile.jpg")
+    return profile_photos.photo_path(user_id)
 
 def user_has_custom_photo(user_id: int) -> bool:
-    """Проверить, есть ли у пользователя кастомное фото"""
-    photo_path = get_user_profile_photo_path(user_id)
-    return os.path.exists(photo_path) and os.path.getsize(photo_path) > 0
+    """Проверить, есть ли у пользователя кастомное фото (флаг из БД, без диска)"""
+    return profile_photos.has_custom_photo(user_id)
 
-async def get_profile_photo_for_user(user_id: int) -> FSInputFile:
-    """Получить фото профиля для пользователя (кастомное или стандартное)"""
-    photo_path = get_user_profile_photo_path(user_id)
-    
-    if user_has_custom_photo(user_id):
-        return FSInputFile(photo_path)
-    else:
-        return STANDARD_PROFILE_PIC
+async def get_profile_photo_for_user(user: User) -> Union[str, FSInputFile]:
+    """Получить фото профиля для пользователя: file_id, файл или стандартное"""
+    return profile_photos.resolve(user)
 
 async def save_profile_photo(user_id: int, photo_file_id: str, bot) -> bool:
-    """Скачать и сохранить фото профиля"""
-    try:
-        photo = await bot.get_file(photo_file_id)
-        
-        photo_path = get_user_profile_photo_path(user_id)
-        await bot.download_file(photo.file_path, photo_path)
-        
-        session = get_session()
-        try:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            if user:
-                user.profile_photo_path = photo_path
-                user.has_custom_photo = True  
-                session.commit()
-        finally:
-            session.close()
-            
-        return True
-    except Exception as e:
-        print(f"Ошибка сохранения фото: {e}")
-        return False
+    """Скачать, уменьшить и сохранить фото профиля"""
+    return await profile_photos.save(user_id, photo_file_id, bot)
 
 async def delete_custom_photo(user_id: int) -> bool:
     """Удалить кастомное фото пользователя"""
-    try:
-        photo_path = get_user_profile_photo_path(user_id)
-        
-        if os.path.exists(photo_path):
-            os.remove(photo_path)
-            
-            session = get_session()
-            try:
-                user = session.query(User).filter(User.user_id == user_id).first()
-                if user:
-                    user.profile_photo_path = None
-                    user.has_custom_photo = False
-                    session.commit()
-            finally:
-                session.close()
-            
-            return True
-        return False
-    except Exception as e:
-        print(f"Ошибка удаления фото: {e}")
-        return False
+    return await profile_photos.delete(user_id)
     
 @router.callback_query(F.data == "change_profile_photo")
 async def request_profile_photo(callback: types.CallbackQuery, state: FSMContext) -> None:
@@ -177,7 +133,7 @@ async def request_profile_photo(callback: types.CallbackQuery, state: FSMContext
             )
         )
     except Exception as e:
-        print(f"Ошибка редактирования caption: {e}")
+        logger.error(f"Ошибка редактирования caption: {e}")
         await callback.message.answer(
             "📸 Отправьте новую фотографию для профиля:",
             reply_markup=types.InlineKeyboardMarkup(
@@ -206,10 +162,10 @@ async def back_from_photo_change(callback: types.CallbackQuery, state: FSMContex
         
         profile_text = format_user_full_profile(user, org)
         
-        user_photo = await get_profile_photo_for_user(user_id)
+        user_photo = await get_profile_photo_for_user(user)
         
         try:
-            await callback.message.edit_media(
+            sent = await callback.message.edit_media(
                 media=InputMediaPhoto(
                     media=user_photo,
                     caption=profile_text
@@ -221,9 +177,10 @@ async def back_from_photo_change(callback: types.CallbackQuery, state: FSMContex
                     ]
                 )
             )
+            await profile_photos.remember_file_id(user, sent)
         except:
             await callback.message.delete()
-            await callback.message.answer_photo(
+            sent = await callback.message.answer_photo(
                 photo=user_photo,
                 caption=profile_text,
                 reply_markup=types.InlineKeyboardMarkup(
@@ -233,11 +190,12 @@ async def back_from_photo_change(callback: types.CallbackQuery, state: FSMContex
                     ]
                 )
             )
+            await profile_photos.remember_file_id(user, sent)
         
         await callback.answer()
         
     except Exception as e:
-        print(f"Ошибка в back_from_photo_change: {e}")
+        logger.error(f"Ошибка в back_from_photo_change: {e}")
         await callback.message.delete()
         await callback.message.answer_photo(
             photo=STANDARD_PROFILE_PIC,
@@ -279,7 +237,7 @@ async def handle_profile_photo(message: types.Message, state: FSMContext) -> Non
                 
                 profile_text = format_user_full_profile(user, org)
                 
-                user_photo = await get_profile_photo_for_user(user_id)
+                user_photo = await get_profile_photo_for_user(user)
                 
                 await message.bot.edit_message_caption(
                     chat_id=message.chat.id,
@@ -306,7 +264,7 @@ async def handle_profile_photo(message: types.Message, state: FSMContext) -> Non
             await message.answer("❌ Ошибка при сохранении фотографии")
             
     except Exception as e:
-        print(f"Ошибка обработки фото: {e}")
+        logger.error(f"Ошибка обработки фото: {e}")
         await message.answer(f"❌ Ошибка: {str(e)[:100]}")
     
     finally:
@@ -353,7 +311,7 @@ async def reset_to_default_photo(callback: types.CallbackQuery, state: FSMContex
             await callback.message.edit_text("❌ Не удалось восстановить стандартную фотографию")
             
     except Exception as e:
-        print(f"Ошибка восстановления фото: {e}")
+        logger.error(f"Ошибка восстановления фото: {e}")
         await callback.message.edit_text(f"❌ Ошибка: {str(e)[:100]}")
     
     finally:
@@ -374,9 +332,9 @@ async def cancel_photo_change(callback: types.CallbackQuery, state: FSMContext)
         if user:
             profile_text = format_user_full_profile(user, org)
             
-            user_photo = await get_profile_photo_for_user(user_id)
+            user_photo = await get_profile_photo_for_user(user)
             
-            await callback.message.edit_media(
+            sent = await callback.message.edit_media(
                 media=InputMediaPhoto(
                     media=user_photo,
                     caption=profile_text
@@ -388,11 +346,12 @@ async def cancel_photo_change(callback: types.CallbackQuery, state: FSMContext)
                     ]
                 )
             )
+            await profile_photos.remember_file_id(user, sent)
         else:
             await callback.message.edit_text("❌ Пользователь не найден")
             
     except Exception as e:
-        print(f"Ошибка в cancel_photo_change: {e}")
+        logger.error(f"Ошибка в cancel_photo_change: {e}")
         await callback.message.answer(f"❌ Ошибка: {e}")
     
     await callback.answer()
@@ -489,9 +448,9 @@ async def back_to_profile_handler(callback: types.CallbackQuery, state: FSMConte
         
         profile_text = format_user_full_profile(user, org)
         
-        user_photo = await get_profile_photo_for_user(user_id)
+        user_photo = await get_profile_photo_for_user(user)
         
-        await callback.message.edit_media(
+        sent = await callback.message.edit_media(
             media=InputMediaPhoto(
                 media=user_photo,
                 caption=profile_text
@@ -503,9 +462,10 @@ async def back_to_profile_handler(callback: types.CallbackQuery, state: FSMConte
                 ]
             )
         )
+        await profile_photos.remember_file_id(user, sent)
         
     except Exception as e:
-        print(f"Ошибка в back_to_profile_handler: {e}")
+        logger.error(f"Ошибка в back_to_profile_handler: {e}")
         try:
             await callback.message.delete()
             await callback.message.answer_photo(
@@ -529,7 +489,7 @@ async def back_to_profile_menu(call: types.CallbackQuery) -> None:
         )
         
     except Exception as e:
-        print(f"Ошибка в back_to_profile_menu: {e}")
+        logger.error(f"Ошибка в back_to_profile_menu: {e}")
         await call.answer(f"❌ Ошибка: {e}", show_alert=True)
 
 
@@ -1,11 +1,13 @@
 from aiogram import Router, F, types, Dispatcher, Bot
 from aiogram.fsm.context import FSMContext
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile, InputMediaPhoto
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
+from services.media_registry import media_registry
 from aiogram.filters import StateFilter
 from datetime import datetime, timezone as tz
 from database import User, Organization, UserRole, Challenge, get_session
 from keyboards import org_type_keyboard, get_main_menu_keyboard
-from utils.time import get_user_timezone, format_datetime, get_current_org_time
+from utils.time import get_user_timezone, format_datetime, get_current_org_time, invalidate_user_org
+from services.permissions import permission_service
 from utils.states import RegistrationStates
 from utils.validators import validate_phone_number
 from aiogram.enums import ParseMode
@@ -17,8 +19,8 @@ import logging
 logger = logging.getLogger(__name__)
 router = Router()
 
-registartion_pic = FSInputFile('pictures/register.png')
-sucсefulreg_pic = FSInputFile('pictures/succeful_register.png')
+registartion_pic = media_registry.static('pictures/register.png')
+sucсefulreg_pic = media_registry.static('pictures/succeful_register.png')
 
 # Карта команд и организаций
 TEAM_MAP = {
@@ -132,6 +134,8 @@ async def _save_user_to_db(callback, state: FSMContext, data=None):
             existing_user.org_id = org.id
             existing_user.last_active = datetime.now()
             session.commit()
+            invalidate_user_org(user_id)
+            permission_service.invalidate(user_id)
             user = existing_user
         else:
             # Создаем нового пользователя
@@ -154,6 +158,8 @@ async def _save_user_to_db(callback, state: FSMContext, data=None):
             )
             session.add(user)
             session.commit()
+            invalidate_user_org(user_id)
+            permission_service.invalidate(user_id)
         
         # Формируем сообщение об успехе
         sport_emojis = {
@@ -735,20 +741,7 @@ async def process_role(callback: types.CallbackQuery, state: FSMContext) -> None
     await _save_user_to_db(callback, state, data)
 
 def is_super_admin(user_id: int) -> bool:
-    try:
-        from config import load_config
-        config = load_config()
-        if user_id in config.admin_ids:
-            return True
-        
-        session = get_session()
-        try:
-            user = session.query(User).filter(User.user_id == user_id).first()
-            return user and user.role == UserRole.SUPER_ADMIN.value
-        finally:
-            session.close()
-    except:
-        return False
+    return permission_service.is_super_admin(user_id)
 
 @router.callback_query(F.data.startswith("superadmin_edit_member_"))
 async def superadmin_edit_member(callback: types.CallbackQuery, state: FSMContext):
@@ -894,6 +887,8 @@ async def confirm_delete_member(callback: types.CallbackQuery):
         # Delete user
         session.delete(member)
         session.commit()
+        invalidate_user_org(member.user_id)
+        permission_service.invalidate(member.user_id)
         
         await callback.message.edit_text("✅ Участник удален")
         
@@ -4,14 +4,18 @@ from aiogram.fsm.context import FSMContext
 from database import User, get_session
 from keyboards import get_main_menu_keyboard
 from utils.states import RegistrationStates
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile, InputMediaPhoto
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
+from services.media_registry import media_registry
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramBadRequest
 import asyncio
+import logging
 
+logger = logging.getLogger(__name__)
 
-welocome_pic = FSInputFile ('pictures/welcome.png')
-registartion_pic = FSInputFile('pictures/register.png')
+
+welocome_pic = media_registry.static('pictures/welcome.png')
+registartion_pic = media_registry.static('pictures/register.png')
 
 router = Router()
 
@@ -167,7 +171,7 @@ async def process_name(message: types.Message, state: FSMContext) -> None:
                 reply_markup=confirm_keyboard
             )
         except Exception as e:
-            print(f"Ошибка редактирования: {e}")
+            logger.error(f"Ошибка редактирования: {e}")
             await send_confirmation_step(message.bot, message.chat.id, name, confirm_keyboard)
     else:
         await send_confirmation_step(message.bot, message.chat.id, name, confirm_keyboard)
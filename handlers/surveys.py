@@ -2,6 +2,7 @@ import logging
 from aiogram import Router, types, F
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, BufferedInputFile
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from keyboards.factory import cached_keyboard, PARAMETRIZED_CACHE_SIZE
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -23,6 +24,7 @@ class SurveyStates(StatesGroup):
 metrics_analyzer = ProffKonstaltingMetrics()
 
 # Клавиатуры для ответов
+@cached_keyboard(maxsize=PARAMETRIZED_CACHE_SIZE)
 def get_rating_keyboard(metric_key: str, question_index: int, max_rating: int) -> InlineKeyboardMarkup:
     """Клавиатура для оценки по шкале"""
     builder = InlineKeyboardBuilder()
@@ -43,6 +45,7 @@ def get_rating_keyboard(metric_key: str, question_index: int, max_rating: int) -
 
     return builder.as_markup()
 
+@cached_keyboard
 def get_metrics_selection_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора метрики для опроса"""
     builder = InlineKeyboardBuilder()
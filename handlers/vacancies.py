@@ -1,10 +1,11 @@
 from aiogram import Router, F, types, Dispatcher
-from aiogram.types import FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
-import json
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 import random
+from services.vacancy_store import vacancy_store
+from services.media_registry import media_registry
 
 router = Router()
-search_job_pic = FSInputFile('pictures/searchjob.png')
+search_job_pic = media_registry.static('pictures/searchjob.png')
 
 user_vacancy_state = {}
 
@@ -24,10 +25,7 @@ async def admin_show_vacancies_intro(message: types.Message) -> None:
         return
 
     try:
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         total_vacancies = len(vacancies)
         if not vacancies:
             await message.answer("❌ Нет доступных вакансий", show_alert=True)
@@ -81,10 +79,7 @@ async def show_vacancies_intro(message: types.Message) -> None:
 async def show_random_vacancy(callback: types.CallbackQuery) -> None:
     """Показать случайную вакансию"""
     try:
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         if not vacancies:
             # Используем answer для алерта вместо edit_text
             await callback.answer("❌ Нет доступных вакансий", show_alert=True)
@@ -121,10 +116,7 @@ async def show_random_vacancy(callback: types.CallbackQuery) -> None:
 async def navigate_vacancies(callback: types.CallbackQuery) -> None:
     """Навигация по вакансиям"""
     try:
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         total_vacancies = len(vacancies)
         
         if callback.data.startswith("vac_prev_"):
@@ -164,14 +156,13 @@ async def show_vacancy_details(callback: types.CallbackQuery) -> None:
     try:
         vacancy_id = int(callback.data.replace("vac_details_", ""))
         
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        vacancies = vacancy_store.all()
         
-        if vacancy_id >= len(data["vacancies"]):
+        if vacancy_id >= len(vacancies):
             await callback.answer("❌ Вакансия не найдена", show_alert=True)
             return
         
-        vacancy = data["vacancies"][vacancy_id]
+        vacancy = vacancies[vacancy_id]
         
         vacancy_text = (
             f"💼 {vacancy['title']}\n\n"
@@ -188,7 +179,7 @@ async def show_vacancy_details(callback: types.CallbackQuery) -> None:
         from keyboards import vacancy_navigation_keyboard
         await callback.message.edit_text(
             vacancy_text,
-            reply_markup=vacancy_navigation_keyboard(vacancy_id, len(data["vacancies"])),
+            reply_markup=vacancy_navigation_keyboard(vacancy_id, len(vacancies)),
             disable_web_page_preview=False
         )
         
@@ -203,10 +194,7 @@ async def back_to_vacancies_list(callback: types.CallbackQuery) -> None:
     try:
         user_id = callback.from_user.id
         
-        with open("assets/vacancies.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        vacancies = data["vacancies"]
+        vacancies = vacancy_store.all()
         
         if user_id not in user_vacancy_state or user_vacancy_state[user_id] >= len(vacancies):
             current_index = random.randint(0, len(vacancies) - 1)
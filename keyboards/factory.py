@@ -0,0 +1,60 @@
+"""Кэширование готовых клавиатур
+
+    python -m keyboards.factory    # микробенчмарк: сборка разметки против кэша
+
+Разметка клавиатуры - дерево pydantic-моделей, и собирать его заново на каждом
+шаге опроса незачем: для одинаковых аргументов результат одинаковый. Функции
+под @cached_keyboard возвращают один общий объект, поэтому менять его нельзя -
+клавиатуры, которые дополняются кнопками, собираются без кэша.
+"""
+import functools
+import sys
+import timeit
+from typing import Callable, Optional
+
+# Предел кэша для клавиатур с параметрами (пагинация, шкалы оценок)
+PARAMETRIZED_CACHE_SIZE = 256
+
+
+def cached_keyboard(func: Optional[Callable] = None, *, maxsize: Optional[int] = None):
+    """Декоратор: одна разметка на набор аргументов
+
+    Без аргументов (@cached_keyboard) кэш неограничен - для статических клавиатур
+    это одна запись. Для клавиатур с параметрами задается maxsize (LRU).
+    Исходная функция доступна как .__wrapped__, статистика - .cache_info().
+    """
+    if func is None:
+        return functools.partial(cached_keyboard, maxsize=maxsize)
+    return functools.lru_cache(maxsize=maxsize)(func)
+
+
+def _bench(func: Callable, args: tuple, number: int) -> float:
+    """Среднее время вызова в микросекундах"""
+    return timeit.timeit(lambda: func(*args), number=number) / number * 1_000_000
+
+
+def main() -> int:
+    from handlers.surveys import get_rating_keyboard
+    from keyboards.main_menu import (
+        energy_keyboard, mood_keyboard, sleep_quality_keyboard, vacancy_navigation_keyboard,
+    )
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    cases = [
+        ("energy_keyboard", energy_keyboard, ()),
+        ("mood_keyboard", mood_keyboard, ()),
+        ("sleep_quality_keyboard", sleep_quality_keyboard, ()),
+        ("vacancy_navigation_keyboard", vacancy_navigation_keyboard, (3, 20)),
+        ("get_rating_keyboard", get_rating_keyboard, ("motivation", 2, 10)),
+    ]
+
+    print(f"⏱ {number} вызовов, мкс на вызов")
+    for name, func, args in cases:
+        built = _bench(func.__wrapped__, args, number)
+        cached = _bench(func, args, number)
+        print(f"   {name:<28} сборка {built:8.2f} | кэш {cached:6.2f} | x{built / cached:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
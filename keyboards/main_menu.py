@@ -2,6 +2,8 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMar
 from database import User, UserRole, get_session
 import json
 
+from .factory import cached_keyboard, PARAMETRIZED_CACHE_SIZE
+
 def get_main_menu_keyboard(user_id: int):
     """Главное меню в зависимости от роли пользователя"""
     session = get_session()
@@ -16,6 +18,7 @@ def get_main_menu_keyboard(user_id: int):
     finally:
         session.close()
 
+@cached_keyboard
 def main_menu_keyboard():
     """Главное меню - БЕЗ кнопки Челленджи"""
     return ReplyKeyboardMarkup(
@@ -28,6 +31,7 @@ def main_menu_keyboard():
         one_time_keyboard=False
     )
 
+@cached_keyboard
 def superadmin_main_menu_keyboard():
     """Главное меню для суперадминов"""
     return ReplyKeyboardMarkup(
@@ -40,6 +44,7 @@ def superadmin_main_menu_keyboard():
         one_time_keyboard=False
     )
 
+@cached_keyboard
 def admin_main_menu_keyboard():
     """Главное меню для админов"""
     return ReplyKeyboardMarkup(
@@ -51,6 +56,7 @@ def admin_main_menu_keyboard():
         one_time_keyboard=False
     )
 
+@cached_keyboard
 def org_type_keyboard():
     """Выбор типа организации"""
     return InlineKeyboardMarkup(
@@ -59,6 +65,7 @@ def org_type_keyboard():
         ]
     )
 
+@cached_keyboard
 def energy_keyboard():
     """Энергия (1-10)"""
     buttons = []
@@ -66,6 +73,7 @@ def energy_keyboard():
         buttons.append(InlineKeyboardButton(text=str(i), callback_data=f"energy_{i}"))
     return InlineKeyboardMarkup(inline_keyboard=[buttons[i:i+5] for i in range(0, 10, 5)])
 
+@cached_keyboard
 def mood_keyboard():
     """Настроение"""
     return InlineKeyboardMarkup(
@@ -78,6 +86,7 @@ def mood_keyboard():
         ]
     )
 
+@cached_keyboard
 def sleep_quality_keyboard():
     """Качество сна (1-10)"""
     buttons = []
@@ -85,6 +94,7 @@ def sleep_quality_keyboard():
         buttons.append(InlineKeyboardButton(text=str(i), callback_data=f"sleep_{i}"))
     return InlineKeyboardMarkup(inline_keyboard=[buttons[i:i+5] for i in range(0, 10, 5)])
 
+@cached_keyboard
 def readiness_keyboard():
     """Готовность (1-10)"""
     buttons = []
@@ -92,6 +102,7 @@ def readiness_keyboard():
         buttons.append(InlineKeyboardButton(text=str(i), callback_data=f"readiness_{i}"))
     return InlineKeyboardMarkup(inline_keyboard=[buttons[i:i+5] for i in range(0, 10, 5)])
 
+@cached_keyboard
 def challenge_response_keyboard():
     """Принять/отказать челлендж"""
     return InlineKeyboardMarkup(
@@ -103,6 +114,7 @@ def challenge_response_keyboard():
         ]
     )
 
+@cached_keyboard
 def yes_no_keyboard():
     """Да/нет"""
     return InlineKeyboardMarkup(
@@ -114,6 +126,7 @@ def yes_no_keyboard():
         ]
     )
 
+@cached_keyboard
 def profile_menu_keyboard():
     """Меню профиля (3 раздела)"""
     return InlineKeyboardMarkup(
@@ -126,6 +139,7 @@ def profile_menu_keyboard():
         ]
     )
 
+@cached_keyboard
 def admin_menu_keyboard():
     """Админ-меню"""
     return InlineKeyboardMarkup(
@@ -140,6 +154,7 @@ def admin_menu_keyboard():
         ]
     )
 
+@cached_keyboard
 def back_button_to_profile():
     """Кнопка назад для профиля"""
     return InlineKeyboardMarkup(
@@ -148,6 +163,7 @@ def back_button_to_profile():
         ]
     )
 
+@cached_keyboard
 def back_to_activity_keyboard():
     """Кнопка назад для активности"""
     return InlineKeyboardMarkup(
@@ -156,6 +172,7 @@ def back_to_activity_keyboard():
         ]
     )
 
+@cached_keyboard
 def back_button_to_vacansies():
     """Кнопка назад для поиска работы"""
     return InlineKeyboardMarkup(
@@ -164,6 +181,7 @@ def back_button_to_vacansies():
         ]
     )  
 
+@cached_keyboard
 def vacancies_menu_keyboard():
     """Клавиатура для меню вакансий"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -171,6 +189,7 @@ def vacancies_menu_keyboard():
         [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_menu")]
     ])
 
+@cached_keyboard(maxsize=PARAMETRIZED_CACHE_SIZE)
 def vacancy_navigation_keyboard(current_index: int, total_vacancies: int):
     """Клавиатура для навигации по вакансиям"""
     keyboard = []
@@ -199,12 +218,14 @@ def vacancy_navigation_keyboard(current_index: int, total_vacancies: int):
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@cached_keyboard
 def no_action_button():
     """Кнопка-заглушка без действия"""
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="⏸️", callback_data="no_action")]
     ])
 
+@cached_keyboard
 def admin_vacancy_menu_keyboard():
     """Админ-меню для управления вакансиями"""
     return InlineKeyboardMarkup(
@@ -216,6 +237,7 @@ def admin_vacancy_menu_keyboard():
         ]
     )
 
+@cached_keyboard
 def premium_keyboard():
     """Премиум подписка"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -224,6 +246,7 @@ def premium_keyboard():
         [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_menu")]
     ])
 
+@cached_keyboard
 def update_member_fields_keyboard():
     """Выбор поля для обновления"""
     return InlineKeyboardMarkup(inline_keyboard=[
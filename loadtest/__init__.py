@@ -0,0 +1,10 @@
+"""Нагрузочное тестирование без Telegram: заглушка Bot API и генератор апдейтов"""
+from .fake_api import FakeBotAPI, start_fake_api
+from .scenarios import ScenarioGenerator, UpdateFactory
+
+__all__ = [
+    'FakeBotAPI',
+    'start_fake_api',
+    'ScenarioGenerator',
+    'UpdateFactory'
+]
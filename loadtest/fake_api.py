@@ -0,0 +1,189 @@
+"""Заглушка Telegram Bot API на aiohttp
+
+Принимает запросы aiogram по адресам /bot<token>/<method> и
+/file/bot<token>/<path> и отвечает правдоподобными объектами: sendMessage,
+editMessageText, sendPhoto, getFile, answerCallbackQuery и т.д. Задержка
+ответа и доля ответов 429 (RetryAfter) задаются параметрами.
+
+    python -m loadtest.fake_api --port 8081 --latency-ms 30 --retry-after-rate 0.01
+
+Бот направляется сюда через TELEGRAM_API_URL=http://127.0.0.1:8081.
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {"id": 100000, "is_bot": True, "first_name": "LoadTestBot", "username": "load_test_bot"}
+
+# Методы, которые возвращают отправленное или измененное сообщение
+MESSAGE_METHODS = {
+    "sendMessage", "sendPhoto", "sendDocument", "sendVideo", "sendAnimation", "sendAudio",
+    "sendVoice", "sendSticker", "sendLocation", "sendContact", "copyMessage", "forwardMessage",
+    "editMessageText", "editMessageCaption", "editMessageMedia", "editMessageReplyMarkup",
+}
+MEDIA_FIELDS = {
+    "sendPhoto": "photo", "sendDocument": "document", "sendVideo": "video",
+    "sendAnimation": "animation", "sendAudio": "audio", "sendVoice": "voice",
+}
+
+
+class FakeBotAPI:
+    """Bot API в памяти с задержкой и RetryAfter"""
+
+    def __init__(self, latency_ms: float = 30, jitter_ms: float = 10,
+                 retry_after_rate: float = 0.0, retry_after: int = 1):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._file_bytes: Optional[bytes] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle_method)
+        app.router.add_get("/file/bot{token}/{path:.+}", self.handle_file)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def _delay(self):
+        delay = random.gauss(self.latency, self.jitter) if self.jitter else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    def _throttle(self, method: str) -> Optional[web.Response]:
+        if self.retry_after_rate and random.random() < self.retry_after_rate:
+            self.throttled[method] += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        return None
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = dict(await request.post()) if request.can_read_body else dict(request.query)
+
+        await self._delay()
+        throttled = self._throttle(method)
+        if throttled is not None:
+            return throttled
+
+        if method in MESSAGE_METHODS:
+            if method.startswith("edit") and params.get("inline_message_id"):
+                return self._ok(True)
+            return self._ok(self._message(method, params))
+        if method == "getMe":
+            return self._ok(BOT_USER)
+        if method == "getFile":
+            file_id = str(params.get("file_id", "file"))
+            return self._ok({
+                "file_id": file_id,
+                "file_unique_id": f"u_{file_id}",
+                "file_size": len(self._sample_file()),
+                "file_path": f"photos/{file_id}.jpg",
+            })
+        if method == "getUpdates":
+            # Апдейты в нагрузочном тесте подаются напрямую в диспетчер
+            await asyncio.sleep(min(float(params.get("timeout", 0) or 0), 1.0))
+            return self._ok([])
+        if method == "getChat":
+            return self._ok({"id": int(params.get("chat_id", 0)), "type": "private"})
+        return self._ok(True)
+
+    def _message(self, method: str, params: dict) -> dict:
+        chat_id = params.get("chat_id")
+        message = {
+            "message_id": int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id) if chat_id else 0, "type": "private"},
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+
+        field = MEDIA_FIELDS.get(method)
+        if method == "editMessageMedia":
+            try:
+                field = json.loads(params.get("media", "{}")).get("type", "photo")
+            except ValueError:
+                field = "photo"
+        if field:
+            n = next(self._file_ids)
+            media = {"file_id": f"{field}_{n}", "file_unique_id": f"u_{field}_{n}", "file_size": 1024}
+            if field == "photo":
+                message["photo"] = [dict(media, width=640, height=480)]
+            else:
+                message[field] = media
+        return message
+
+    def _sample_file(self) -> bytes:
+        """Небольшая JPEG-картинка для getFile / скачивания файлов"""
+        if self._file_bytes is None:
+            from PIL import Image
+            buffer = io.BytesIO()
+            Image.new("RGB", (64, 64), (40, 120, 200)).save(buffer, format="JPEG")
+            self._file_bytes = buffer.getvalue()
+        return self._file_bytes
+
+    async def handle_file(self, request: web.Request) -> web.Response:
+        self.calls["file"] += 1
+        await self._delay()
+        return web.Response(body=self._sample_file(), content_type="image/jpeg")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {"calls": dict(self.calls), "throttled": dict(self.throttled)}
+
+
+async def start_fake_api(api: FakeBotAPI, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+    """Запустить заглушку в текущем event loop; остановка - await runner.cleanup()"""
+    runner = web.AppRunner(api.create_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"🧪 Заглушка Bot API: http://{host}:{port}")
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.retry_after_rate, args.retry_after)
+    web.run_app(api.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Замер get_state/get_data хранилища FSM на SQLite
+
+    python -m loadtest.fsm_bench [N]
+
+Сначала читает из кэша процесса, затем с выключенным кэшем (каждое чтение -
+запрос к SQLite).
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from aiogram.fsm.storage.base import StorageKey
+
+from services.fsm_storage import SqliteStorage
+
+
+async def run_benchmark(number: int):
+    directory = tempfile.mkdtemp()
+    storage = SqliteStorage(os.path.join(directory, "fsm.sqlite3"), ttl=timedelta(hours=1))
+    keys = [StorageKey(bot_id=1, chat_id=i, user_id=i) for i in range(100)]
+    for key in keys:
+        await storage.set_state(key, "RegistrationStates:waiting_for_name")
+        await storage.update_data(key, {"name": "Тест", "phone": "+70000000000"})
+    await storage.flush()
+
+    started = time.perf_counter()
+    for i in range(number):
+        key = keys[i % len(keys)]
+        await storage.get_state(key)
+        await storage.get_data(key)
+    elapsed = (time.perf_counter() - started) / number * 1_000_000
+    print(f"⏱ get_state + get_data: {elapsed:.2f} мкс (из кэша)")
+
+    storage.local_cache = False
+    started = time.perf_counter()
+    for i in range(min(number, 2000)):
+        await storage.get_state(keys[i % len(keys)])
+    elapsed = (time.perf_counter() - started) / min(number, 2000) * 1_000_000
+    print(f"⏱ get_state без кэша (SQLite): {elapsed:.2f} мкс")
+
+    await storage.close()
+
+
+def main() -> int:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    asyncio.run(run_benchmark(number))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Нагрузочный прогон бота против заглушки Bot API
+
+    python -m loadtest --rate 20 --duration 60 --mix "registration=1,survey=4,challenge=3,admin_report=1"
+
+Поднимает заглушку Bot API (loadtest.fake_api), собирает тот же Dispatcher,
+что и webhook.py, и с заданной частотой запускает сценарии пользователей
+(loadtest.scenarios), подавая апдейты прямо в диспетчер. В конце печатает
+пропускную способность и p50/p95/p99 по каждому обработчику и сценарию.
+
+Запускать против тестовой БД (DATABASE_URL); FSM_STORAGE=memory убирает
+хранилище состояний из замеров, QUERY_BUDGET_STRICT=true превращает
+превышение бюджетов запросов в ошибки обработчиков.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from config import load_config
+from loadtest.fake_api import FakeBotAPI, start_fake_api
+from loadtest.scenarios import DEFAULT_MIX, ScenarioGenerator, parse_range
+
+logger = logging.getLogger(__name__)
+
+# Токен только для заглушки: настоящий токен в нагрузочный прогон не нужен
+LOAD_TOKEN = "123456:LOADTEST"
+
+_probe: ContextVar[Optional[dict]] = ContextVar("loadtest_probe", default=None)
+
+
+class HandlerProbe(BaseMiddleware):
+    """Запоминает, какой обработчик принял апдейт"""
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        from services.monitoring import handler_labels
+
+        probe = _probe.get()
+        if probe is not None:
+            router, name = handler_labels(data.get("handler"), data.get("event_router"))
+            probe["handler"] = f"{router}.{name}"
+        return await handler(event, data)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по отсортированному списку (nearest rank)"""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, math.ceil(q * len(values)) - 1))]
+
+
+class LatencyRecorder:
+    """Замеры длительности по ключам (обработчик, сценарий)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    def add(self, key: str, seconds: float, error: bool = False):
+        self.samples[key].append(seconds)
+        if error:
+            self.errors[key] += 1
+
+    def rows(self, elapsed: float) -> List[dict]:
+        rows = []
+        for key, values in self.samples.items():
+            values = sorted(values)
+            rows.append({
+                "name": key,
+                "count": len(values),
+                "errors": self.errors[key],
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            })
+        return sorted(rows, key=lambda row: row["count"], reverse=True)
+
+
+class LoadTest:
+    """Открытая модель нагрузки: сценарии стартуют с заданной частотой"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.handlers = LatencyRecorder()
+        self.scenarios = LatencyRecorder()
+        self.api = FakeBotAPI(args.latency_ms, args.jitter_ms, args.retry_after_rate, args.retry_after)
+        self.started_scenarios = 0
+
+    async def _feed(self, dispatcher, bot: Bot, update: dict):
+        probe = {"handler": None}
+        token = _probe.set(probe)
+        started = time.perf_counter()
+        error = False
+        try:
+            await dispatcher.feed_raw_update(bot, update)
+        except Exception as e:
+            error = True
+            logger.debug(f"Ошибка апдейта {update['update_id']}: {e}")
+        finally:
+            _probe.reset(token)
+        event_type = next(key for key in update if key != "update_id")
+        self.handlers.add(probe["handler"] or f"unhandled:{event_type}", time.perf_counter() - started, error)
+        return error
+
+    async def _scenario(self, dispatcher, bot: Bot, name: str, updates: List[dict], semaphore: asyncio.Semaphore):
+        started = time.perf_counter()
+        failed = False
+        try:
+            for update in updates:
+                failed = await self._feed(dispatcher, bot, update) or failed
+        finally:
+            self.scenarios.add(name, time.perf_counter() - started, failed)
+            semaphore.release()
+
+    async def run(self) -> dict:
+        from webhook import build_dispatcher
+
+        args = self.args
+        config = load_config()
+        runner = await start_fake_api(self.api, args.api_host, args.api_port)
+        bot = Bot(
+            token=LOAD_TOKEN,
+            session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://{args.api_host}:{args.api_port}"))
+        )
+        # Планировщики в замерах не участвуют: их рассылки исказили бы нагрузку
+        dispatcher = build_dispatcher(init_database=args.init_db, schedulers=False)
+        probe = HandlerProbe()
+        for name, observer in dispatcher.observers.items():
+            if name not in ("update", "error"):
+                observer.middleware(probe)
+
+        generator = ScenarioGenerator(
+            mix=args.mix,
+            users=parse_range(args.users, range(10_000, 11_000)),
+            admins=parse_range(args.admins, sorted(config.admin_ids)),
+            org_id=args.org_id,
+            challenge_ids=parse_range(args.challenge_ids, range(1, 101)),
+        )
+
+        await dispatcher.emit_startup(bot=bot, dispatcher=dispatcher)
+        logger.info(f"🚀 Нагрузка: {args.rate} сценариев/с, {args.duration} с, смесь {args.mix}")
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        tasks = set()
+        started = loop.time()
+        next_at = started
+        try:
+            while loop.time() - started < args.duration:
+                name, updates = generator.next()
+                # При заполнении лимита новые сценарии ждут: фактическая частота будет ниже заданной
+                await semaphore.acquire()
+                task = asyncio.create_task(self._scenario(dispatcher, bot, name, updates, semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                self.started_scenarios += 1
+
+                next_at += 1 / args.rate
+                delay = next_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            elapsed = loop.time() - started
+        finally:
+            await dispatcher.emit_shutdown(bot=bot, dispatcher=dispatcher)
+            await dispatcher.storage.close()
+            await bot.session.close()
+            await runner.cleanup()
+
+        return {
+            "elapsed": round(elapsed, 2),
+            "target_rate": args.rate,
+            "achieved_rate": round(self.started_scenarios / elapsed, 2) if elapsed else 0.0,
+            "updates": sum(len(values) for values in self.handlers.samples.values()),
+            "handlers": self.handlers.rows(elapsed),
+            "scenarios": self.scenarios.rows(elapsed),
+            "bot_api": self.api.stats(),
+        }
+
+
+def _print_table(title: str, rows: List[dict]):
+    print(f"\n{title}")
+    print(f"{'':<52}{'count':>8}{'err':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for row in rows:
+        print(
+            f"{row['name'][:50]:<52}{row['count']:>8}{row['errors']:>6}{row['rps']:>8}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}"
+        )
+
+
+def print_report(result: dict):
+    print(
+        f"\n📊 {result['elapsed']} с: сценариев {result['achieved_rate']}/с "
+        f"(цель {result['target_rate']}/с), апдейтов {result['updates']} "
+        f"({result['updates'] / result['elapsed']:.1f}/с)"
+    )
+    _print_table("По обработчикам:", result["handlers"])
+    _print_table("По сценариям:", result["scenarios"])
+    api = result["bot_api"]
+    print(f"\nBot API: {sum(api['calls'].values())} вызовов, 429: {sum(api['throttled'].values())}")
+    for method, count in sorted(api["calls"].items(), key=lambda item: -item[1]):
+        print(f"  {method:<28}{count:>8}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон бота против заглушки Bot API")
+    parser.add_argument("--rate", type=float, default=10, help="сценариев в секунду")
+    parser.add_argument("--duration", type=float, default=30, help="длительность, с")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="веса сценариев")
+    parser.add_argument("--concurrency", type=int, default=200, help="сценариев одновременно")
+    parser.add_argument("--users", help="ID существующих пользователей, например 10000-10999")
+    parser.add_argument("--admins", help="ID админов для admin_report (по умолчанию ADMIN_IDS)")
+    parser.add_argument("--org-id", type=int, default=1)
+    parser.add_argument("--challenge-ids", help="ID челленджей, например 1-100")
+    parser.add_argument("--api-host", default="127.0.0.1")
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=30, help="задержка ответа Bot API")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--init-db", action="store_true", help="создать таблицы и применить миграции")
+    parser.add_argument("--json", help="сохранить результат в JSON-файл")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    result = asyncio.run(LoadTest(args).run())
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
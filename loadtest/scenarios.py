@@ -0,0 +1,159 @@
+"""Генератор апдейтов: типичные сценарии пользователей бота
+
+Сценарий - последовательность апдейтов одного пользователя (шаги FSM идут
+строго по очереди). Смесь сценариев задается весами:
+"registration=1,survey=4,challenge=3,admin_report=1".
+"""
+import itertools
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from loadtest.fake_api import BOT_USER
+
+NAMES = [
+    "Иванов Иван Иванович", "Петров Петр Петрович", "Смирнова Анна Сергеевна",
+    "Кузнецов Алексей Дмитриевич", "Соколова Мария Андреевна", "Попов Сергей Николаевич",
+]
+
+DEFAULT_MIX = "registration=1,survey=4,challenge=3,admin_report=1"
+
+
+class UpdateFactory:
+    """Сборка JSON-апдейтов в формате Bot API"""
+
+    def __init__(self):
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}", "username": f"load_{user_id}"}
+
+    def message(self, user_id: int, text: str) -> dict:
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text,
+            },
+        }
+
+    def callback(self, user_id: int, data: str) -> dict:
+        update_id = next(self._update_ids)
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "from": BOT_USER,
+                    "text": "...",
+                },
+            },
+        }
+
+
+class ScenarioGenerator:
+    """Случайные сценарии по весам смеси"""
+
+    def __init__(self, mix: str = DEFAULT_MIX, users: Sequence[int] = range(10_000, 11_000),
+                 admins: Sequence[int] = (), org_id: int = 1,
+                 challenge_ids: Sequence[int] = range(1, 101), new_user_start: int = 5_000_000):
+        self.factory = UpdateFactory()
+        self.users = list(users)
+        self.admins = list(admins) or self.users[:1]
+        self.org_id = org_id
+        self.challenge_ids = list(challenge_ids)
+        self._new_users = itertools.count(new_user_start)
+
+        builders: Dict[str, Callable[[], List[dict]]] = {
+            "registration": self.registration,
+            "survey": self.survey,
+            "challenge": self.challenge,
+            "admin_report": self.admin_report,
+        }
+        weights = parse_mix(mix)
+        unknown = set(weights) - set(builders)
+        if unknown:
+            raise ValueError(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+        self._names = [name for name in weights if weights[name] > 0]
+        self._weights = [weights[name] for name in self._names]
+        self._builders = builders
+
+    def next(self) -> tuple:
+        """(имя сценария, список апдейтов)"""
+        name = random.choices(self._names, self._weights)[0]
+        return name, self._builders[name]()
+
+    def registration(self) -> List[dict]:
+        """Новый пользователь: /start, согласие, ФИО, направление"""
+        user_id = next(self._new_users)
+        f = self.factory
+        return [
+            f.message(user_id, "/start"),
+            f.callback(user_id, "acceptpolicy"),
+            f.message(user_id, random.choice(NAMES)),
+            f.callback(user_id, "confirm_name"),
+            f.callback(user_id, "dir_sport"),
+        ]
+
+    def survey(self) -> List[dict]:
+        """Ежедневный опрос: меню активности и четыре ответа"""
+        user_id = random.choice(self.users)
+        f = self.factory
+        return [
+            f.message(user_id, "📈 Активность"),
+            f.callback(user_id, "survey_start"),
+            f.callback(user_id, f"sleep_{random.randint(1, 10)}"),
+            f.callback(user_id, f"energy_{random.randint(1, 10)}"),
+            f.callback(user_id, f"readiness_{random.randint(1, 10)}"),
+            f.callback(user_id, random.choice(["mood_happy", "mood_neutral", "mood_sad"])),
+        ]
+
+    def challenge(self) -> List[dict]:
+        """Просмотр челленджей и отметка о выполнении"""
+        user_id = random.choice(self.users)
+        f = self.factory
+        return [
+            f.callback(user_id, "challenges_view"),
+            f.callback(user_id, f"challenge_complete_{random.choice(self.challenge_ids)}"),
+            f.callback(user_id, "leaderboard_view"),
+        ]
+
+    def admin_report(self) -> List[dict]:
+        """Админ смотрит статистику и челленджи организации"""
+        user_id = random.choice(self.admins)
+        f = self.factory
+        return [
+            f.callback(user_id, f"superadmin_org_stats_{self.org_id}"),
+            f.callback(user_id, f"admin_view_challenges_{self.org_id}"),
+        ]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'survey=4,challenge=3' -> {'survey': 4.0, 'challenge': 3.0}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def parse_range(spec: Optional[str], default: Sequence[int]) -> List[int]:
+    """'1-100' или '5,7,9' -> список чисел"""
+    if not spec:
+        return list(default)
+    result = []
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        result.extend(range(int(start), int(end) + 1) if end else [int(start)])
+    return result
@@ -0,0 +1,47 @@
+"""Точка входа бота
+
+    python main.py
+
+BOT_MODE выбирает способ приема апдейтов: polling (по умолчанию) - long
+polling через getUpdates, webhook - aiohttp-сервер из webhook.py. В обоих
+режимах диспетчер один и тот же, планировщики стартуют вместе с ним.
+"""
+import asyncio
+import logging
+
+from config import load_config
+from utils.logging_setup import setup_logging
+from webhook import build_dispatcher, create_bot, run_webhook
+
+logger = logging.getLogger(__name__)
+
+BOT_MODES = ("polling", "webhook")
+
+
+async def run_polling(bot, dispatcher):
+    """Long polling до остановки (Ctrl+C или SIGTERM)"""
+    await bot.delete_webhook(drop_pending_updates=False)
+    logger.info("🚀 Бот запущен: прием через getUpdates")
+    try:
+        # start_polling сам вызывает startup/shutdown и закрывает сессию бота
+        await dispatcher.start_polling(bot, allowed_updates=dispatcher.resolve_used_update_types())
+    finally:
+        await dispatcher.storage.close()
+
+
+def main():
+    config = load_config()
+    setup_logging(config)
+    if config.bot_mode not in BOT_MODES:
+        raise SystemExit(f"BOT_MODE должен быть одним из: {', '.join(BOT_MODES)} (сейчас {config.bot_mode!r})")
+
+    bot = create_bot(config)
+    dispatcher = build_dispatcher()
+    if config.bot_mode == "webhook":
+        run_webhook(bot, dispatcher, config)
+    else:
+        asyncio.run(run_polling(bot, dispatcher))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ from .middlewares import (
     LoggingMiddleware,
     AntiFloodMiddleware,
     CacheMiddleware,
-    DatabaseSessionMiddleware
+    DatabaseSessionMiddleware,
+    UpdateMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    LogContextMiddleware
 )
 
 __all__ = [
@@ -13,5 +16,8 @@ __all__ = [
     'LoggingMiddleware',
     'AntiFloodMiddleware',
     'DatabaseSessionMiddleware',
-    'CacheMiddleware'
+    'CacheMiddleware',
+    'UpdateMetricsMiddleware',
+    'HandlerMetricsMiddleware',
+    'LogContextMiddleware'
 ]
\ No newline at end of file
@@ -1,13 +1,17 @@
 
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, Update
 from typing import Callable, Dict, Any, Awaitable
 from aiogram.fsm.context import FSMContext
 from utils.cache import UserCache, user_cache
+from utils.logging_setup import log_context, redact_text
 import logging
+import time
 
 
 logger = logging.getLogger(__name__)
+# Отдельный логгер входящих событий: его удобно сэмплировать (LOG_SAMPLING)
+events_logger = logging.getLogger("bot.events")
 
 class ClearStateMiddleware(BaseMiddleware):
     """Мидлварь для очистки состояния при определенных callback данных"""
@@ -86,7 +90,7 @@ class AutoRegisterUserMiddleware(BaseMiddleware):
 
 
 class LoggingMiddleware(BaseMiddleware):
-    """Логирование всех событий"""
+    """Логирование всех событий (текст сообщений не пишется, только длина)"""
     
     async def __call__(
         self,
@@ -95,9 +99,9 @@ class LoggingMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         if isinstance(event, Message):
-            logger.info(f"Message: {event.text} from {event.from_user.id} ({event.from_user.username})")
+            events_logger.info(f"Message: {redact_text(event.text or event.caption)} from {event.from_user.id}")
         elif isinstance(event, CallbackQuery):
-            logger.info(f"Callback: {event.data} from {event.from_user.id} ({event.from_user.username})")
+            events_logger.info(f"Callback: {event.data} from {event.from_user.id}")
         
         return await handler(event, data)
 
@@ -165,3 +169,88 @@ class CacheMiddleware(BaseMiddleware):
         # Добавляем кэш в данные
         data['user_cache'] = user_cache
         return await handler(event, data)
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """update_id, user_id и тип события во всех записях лога апдейта (outer на dp.update)"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        with log_context(
+            update_id=event.update_id,
+            user_id=user.id if user else None,
+            event_type=getattr(event, 'event_type', None)
+        ):
+            return await handler(event, data)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Метрики апдейта целиком: счетчик, время, ошибки, запросы к БД (outer на dp.update)"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        from database.instrumentation import track_queries
+        from services.monitoring import (
+            UPDATES_TOTAL, UPDATE_ERRORS_TOTAL, UPDATES_IN_FLIGHT, UPDATE_DURATION,
+            DB_QUERIES_PER_UPDATE, DB_TIME_PER_UPDATE
+        )
+        
+        event_type = getattr(event, 'event_type', 'unknown')
+        UPDATES_TOTAL.labels(event_type=event_type).inc()
+        UPDATES_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                result = await handler(event, data)
+            except Exception:
+                UPDATE_ERRORS_TOTAL.labels(event_type=event_type).inc()
+                raise
+            finally:
+                UPDATES_IN_FLIGHT.dec()
+                UPDATE_DURATION.labels(event_type=event_type).observe(time.perf_counter() - started)
+                DB_QUERIES_PER_UPDATE.observe(queries.count)
+                DB_TIME_PER_UPDATE.observe(queries.duration)
+        
+        # Повторяющиеся запросы (N+1) и бюджет на апдейт
+        queries.report(event_type)
+        return result
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Время и ошибки конкретного обработчика (inner на событиях диспетчера)"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        from services.monitoring import (
+            HANDLER_DURATION, HANDLER_ERRORS_TOTAL, HANDLERS_IN_FLIGHT, handler_labels
+        )
+        
+        from database.instrumentation import current_query_stats
+        
+        router, name = handler_labels(data.get('handler'), data.get('event_router'))
+        queries = current_query_stats()
+        if queries is not None:
+            queries.set_handler(f"{router}.{name}")
+        HANDLERS_IN_FLIGHT.labels(router=router).inc()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS_TOTAL.labels(router=router, handler=name).inc()
+            raise
+        finally:
+            HANDLERS_IN_FLIGHT.labels(router=router).dec()
+            HANDLER_DURATION.labels(router=router, handler=name).observe(time.perf_counter() - started)
@@ -7,6 +7,16 @@ from .shedule_manager import ScheduleManager
 from .timezone_scheduler import TimezoneMessageScheduler
 from .reminder import SimpleReminderService
 from .monthly_report import MonthlyReportService
+from .retention import PartitionRetentionService
+from .leader_election import SchedulerLeader, scheduler_leader, leader_only
+from .vacancy_store import VacancyStore, vacancy_store
+from .media_registry import MediaRegistry, media_registry
+from .permissions import PermissionService, permission_service
+from .fsm_storage import PostgresStorage, SqliteStorage, create_fsm_storage
+from .profile_photos import ProfilePhotoService, profile_photos
+from .monitoring import record_broadcast, tracked_sleep, instrument_scheduler, setup_metrics
+from .loop_monitor import LoopLagMonitor, loop_monitor
+from .scheduler_runner import SchedulerRunner, scheduler_runner, setup_schedulers
 
 __all__ = [
     'MetricsCollector',
@@ -21,5 +31,29 @@ __all__ = [
     'ScheduleManager',
     'TimezoneMessageScheduler',
     'SimpleReminderService',
-    'MonthlyReportService'
+    'MonthlyReportService',
+    'PartitionRetentionService',
+    'SchedulerLeader',
+    'scheduler_leader',
+    'leader_only',
+    'VacancyStore',
+    'vacancy_store',
+    'ProfilePhotoService',
+    'profile_photos',
+    'MediaRegistry',
+    'media_registry',
+    'PermissionService',
+    'permission_service',
+    'PostgresStorage',
+    'SqliteStorage',
+    'create_fsm_storage',
+    'record_broadcast',
+    'tracked_sleep',
+    'instrument_scheduler',
+    'setup_metrics',
+    'LoopLagMonitor',
+    'loop_monitor',
+    'SchedulerRunner',
+    'scheduler_runner',
+    'setup_schedulers'
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ from services.report_formatter import ReportFormatter
 from services.ai_service import AIService
 from services.metrics_analyzer import ProffKonstaltingMetrics
 from database import get_session, User, Organization, Challenge, Survey, MetricsSurvey
+from utils.time import get_org_timezone, get_zone, local_day_bounds_utc
 
 logger = logging.getLogger(__name__)
 
@@ -47,8 +48,10 @@ class AIReportAnalyzer:
             if not users:
                 return {"error": "В команде нет пользователей"}
             
-            # Собираем данные за сегодня
-            today = datetime.now().date()
+            # Собираем данные за сегодня (локальные сутки организации)
+            org_timezone = get_org_timezone(org_id)
+            today = datetime.now(get_zone(org_timezone)).date()
+            day_start, day_end = local_day_bounds_utc(org_timezone, today)
             daily_stats = {
                 "total_members": len(users),
                 "active_today": 0,
@@ -76,11 +79,11 @@ class AIReportAnalyzer:
                             challenge.completed_at.date() == today):
                             challenges_today.append(challenge)
 
-                    # Получаем опросы пользователя за сегодня с правильной фильтрацией по времени
-                    from sqlalchemy import func
+                    # Получаем опросы пользователя за сегодня: диапазон по индексу (user_id, date)
                     surveys_today = session.query(Survey).filter(
                         Survey.user_id == user.id,
-                        func.date(Survey.date) == today
+                        Survey.date >= day_start,
+                        Survey.date < day_end
                     ).all()
 
                     # Подсчитываем Баллы, заработанные сегодня
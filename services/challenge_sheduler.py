@@ -6,15 +6,22 @@ from typing import List
 from aiogram import Bot
 from database import get_session, User, Challenge, ChallengeStatus
 from sqlalchemy import and_, or_
+from services.rate_limited_sender import RateLimitedSender
+from services.leader_election import scheduler_leader
+from services.monitoring import record_broadcast, tracked_sleep
 
 logger = logging.getLogger(__name__)
 
+# Сколько челленджей выбирать из очереди за один проход
+DISPATCH_BATCH_SIZE = 500
+
 class ChallengeScheduler:
     """Сервис для отправки запланированных челленджей"""
     
     def __init__(self, bot: Bot):
         self.bot = bot
         self.is_running = False
+        self.sender = RateLimitedSender()
     
     async def start(self):
         """Запуск планировщика"""
@@ -23,6 +30,7 @@ class ChallengeScheduler:
             return
             
         self.is_running = True
+        scheduler_leader.ensure_started()
         logger.info("✅ Планировщик челленджей запущен")
         
         # Запускаем в фоновой задаче
@@ -36,84 +44,85 @@ class ChallengeScheduler:
     async def _run_scheduler(self):
         """Основной цикл планировщика"""
         while self.is_running:
+            # Очередь разбирает только узел-лидер
+            if not scheduler_leader.is_leader:
+                await asyncio.sleep(scheduler_leader.check_interval)
+                continue
+            
             try:
                 await self._check_and_send_challenges()
             except Exception as e:
                 logger.error(f"Ошибка в планировщике: {e}", exc_info=True)
             
             # Проверяем каждую минуту
-            await asyncio.sleep(60)
+            await tracked_sleep("challenges", 60)
     
     async def _check_and_send_challenges(self):
         """Проверка и отправка запланированных челленджей"""
+        # Отправляем пачками, пока очередь не опустеет (догоняем после простоя)
+        while self.is_running:
+            processed = await self._dispatch_due_batch()
+            if processed < DISPATCH_BATCH_SIZE:
+                break
+    
+    async def _dispatch_due_batch(self) -> int:
+        """Отправить одну пачку наступивших и еще не отправленных челленджей"""
         session = get_session()
         try:
             now = datetime.now()
-            current_minute = now.replace(second=0, microsecond=0)
             
             logger.debug(f"Проверка запланированных челленджей в {now.strftime('%H:%M:%S')}")
             
-            # Находим челленджи, которые нужно отправить
-            challenges = session.query(Challenge).filter(
-                Challenge.scheduled_for.isnot(None),
+            # Все, что уже наступило и не отправлено - без нижней границы,
+            # чтобы ничего не потерять после простоя (индекс idx_challenges_due)
+            rows = session.query(Challenge, User.chat_id).outerjoin(
+                User, User.user_id == Challenge.user_id
+            ).filter(
                 Challenge.status == ChallengeStatus.SCHEDULED.value,
-                Challenge.scheduled_for <= current_minute + timedelta(minutes=1),
-                Challenge.scheduled_for >= current_minute,
-                Challenge.sent_at.is_(None)
-            ).all()
+                Challenge.sent_at.is_(None),
+                Challenge.scheduled_for <= now
+            ).order_by(Challenge.scheduled_for).limit(DISPATCH_BATCH_SIZE).all()
             
-            if not challenges:
+            if not rows:
                 logger.debug("Нет челленджей для отправки")
-                return
+                return 0
             
-            logger.info(f"Найдено {len(challenges)} челленджей для отправки")
+            logger.info(f"Найдено {len(rows)} челленджей для отправки")
+            
+            deliverable = []
+            for challenge, chat_id in rows:
+                if not chat_id:
+                    logger.warning(f"Пользователь {challenge.user_id} не найден или у него нет chat_id")
+                    challenge.status = ChallengeStatus.FAILED.value
+                    continue
+                deliverable.append((challenge, chat_id))
+            
+            started = asyncio.get_running_loop().time()
+            results = await self.sender.send_many(
+                deliverable,
+                lambda item: self._send_challenge(item[0], item[1])
+            )
+            duration = asyncio.get_running_loop().time() - started
             
             sent_count = 0
-            for challenge in challenges:
-                try:
-                    # Получаем пользователя
-                    user = session.query(User).filter(
-                        User.user_id == challenge.user_id,
-                        User.chat_id.isnot(None)
-                    ).first()
-                    
-                    if not user:
-                        logger.warning(f"Пользователь {challenge.user_id} не найден")
-                        challenge.status = ChallengeStatus.FAILED.value
-                        session.add(challenge)
-                        continue
-                    
-                    if not user.chat_id:
-                        logger.warning(f"У пользователя {user.user_id} нет chat_id")
-                        challenge.status = ChallengeStatus.FAILED.value
-                        session.add(challenge)
-                        continue
-                    
-                    # Отправляем челлендж
-                    await self._send_challenge(challenge, user.chat_id)
-                    
-                    # Обновляем статус
+            for (challenge, chat_id), _, error in results:
+                if error is None:
                     challenge.sent_at = now
                     challenge.status = ChallengeStatus.PENDING.value
-                    session.add(challenge)
                     sent_count += 1
-                    
-                    logger.info(f"✅ Челлендж отправлен пользователю {user.user_id}")
-                    
-                    # Небольшая задержка между отправками
-                    await asyncio.sleep(0.1)
-                    
-                except Exception as e:
-                    logger.error(f"Ошибка отправки челленджа {challenge.id}: {e}")
+                else:
+                    logger.error(f"Ошибка отправки челленджа {challenge.id}: {error}")
                     challenge.status = ChallengeStatus.FAILED.value
-                    session.add(challenge)
             
             session.commit()
+            record_broadcast("challenge", sent_count, len(deliverable) - sent_count, duration)
             logger.info(f"✅ Успешно отправлено {sent_count} челленджей")
+            return len(rows)
             
         except Exception as e:
             logger.error(f"Ошибка проверки челленджей: {e}", exc_info=True)
             session.rollback()
+            return 0
         finally:
             session.close()
     
@@ -2,6 +2,9 @@ import os
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.rl_config import defaultPageSize
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_fonts():
     """Регистрация шрифтов для ReportLab"""
@@ -21,9 +24,9 @@ def register_fonts():
                     font_name = os.path.basename(font_path).split('.')[0]
                     pdfmetrics.registerFont(TTFont(font_name, font_path))
                     registered_fonts.append(font_name)
-                    print(f"✅ Шрифт зарегистрирован: {font_name}")
+                    logger.info(f"✅ Шрифт зарегистрирован: {font_name}")
                 except Exception as e:
-                    print(f"⚠️ Не удалось зарегистрировать {font_path}: {e}")
+                    logger.warning(f"⚠️ Не удалось зарегистрировать {font_path}: {e}")
         
         if registered_fonts:
             from reportlab.lib.fonts import addMapping
@@ -38,11 +41,11 @@ def register_fonts():
             
             return True
         
-        print("⚠️ Шрифты Arial не найдены, использую стандартные")
+        logger.warning("⚠️ Шрифты Arial не найдены, использую стандартные")
         return False
         
     except Exception as e:
-        print(f"❌ Ошибка регистрации шрифтов: {e}")
+        logger.error(f"❌ Ошибка регистрации шрифтов: {e}")
         return False
 
 fonts_initialized = register_fonts()
\ No newline at end of file
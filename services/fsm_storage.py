@@ -0,0 +1,332 @@
+"""Постоянное хранилище FSM (регистрация, опросы, рассылки, оценка метрик)
+
+    dp = Dispatcher(storage=create_fsm_storage())
+    python -m loadtest.fsm_bench [N]    # замер get_state/get_data на SQLite
+
+Состояние переживает перезапуск: оно пишется в Postgres (таблица fsm_states)
+или, для одного узла, во встроенную SQLite. Чтение идет из памяти процесса
+(не больше LOCAL_CACHE_SIZE последних ключей), запись копится и уходит в базу пакетом раз в FLUSH_INTERVAL секунд. Сценарии,
+брошенные дольше FSM_STATE_TTL_HOURS, забываются и удаляются из базы.
+Данные состояния должны сериализоваться в JSON (прочее сохраняется строкой).
+"""
+import abc
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Как часто сбрасывать накопленные изменения в базу
+FLUSH_INTERVAL = 0.05
+# Как часто удалять просроченные состояния
+EXPIRE_INTERVAL = 600
+# Сколько последних ключей держать в памяти процесса
+LOCAL_CACHE_SIZE = 10_000
+
+# (state, data, updated_at)
+Record = Tuple[Optional[str], Dict[str, Any], datetime]
+
+
+def _storage_key(key: StorageKey) -> str:
+    parts = [str(key.bot_id), str(key.chat_id), str(key.user_id)]
+    if key.thread_id:
+        parts.append(str(key.thread_id))
+    parts.append(key.destiny)
+    return ":".join(parts)
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+def _jsonable(data: Mapping[str, Any]) -> Dict[str, Any]:
+    return json.loads(json.dumps(dict(data), ensure_ascii=False, default=str))
+
+
+class BufferedStorage(BaseStorage):
+    """Кэш состояний в памяти и пакетная запись в базу (общая часть бэкендов)
+
+    Без local_cache каждое чтение идет в базу: так можно, когда апдейты одного
+    пользователя попадают в разные процессы без привязки к процессу.
+    """
+
+    def __init__(self, ttl: timedelta, flush_interval: float = FLUSH_INTERVAL, local_cache: bool = True,
+                 cache_size: int = LOCAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.local_cache = local_cache
+        self.cache_size = cache_size
+        # LRU: get_state вызывается на каждый апдейт, поэтому кэш ограничен по размеру
+        self._records: "OrderedDict[str, Record]" = OrderedDict()
+        self._dirty: Dict[str, Record] = {}
+        self._flushing: Dict[str, Record] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._expired_at = time.monotonic()
+
+    # Бэкенд: вызываются в потоке
+    @abc.abstractmethod
+    def _read(self, name: str) -> Optional[Record]:
+        """Состояние по ключу или None"""
+
+    @abc.abstractmethod
+    def _write(self, batch: Dict[str, Record]):
+        """Записать пакет; пустые состояния удаляются"""
+
+    @abc.abstractmethod
+    def _delete_expired(self, cutoff: datetime) -> int:
+        """Удалить состояния старше cutoff, вернуть их число"""
+
+    def _close(self):
+        pass
+
+    def _remember(self, name: str, record: Record):
+        self._records[name] = record
+        self._records.move_to_end(name)
+        while len(self._records) > self.cache_size:
+            self._records.popitem(last=False)
+
+    async def _get(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        name = _storage_key(key)
+        record = self._dirty.get(name) or self._flushing.get(name)
+        if record is None and self.local_cache:
+            record = self._records.get(name)
+            if record is not None:
+                self._records.move_to_end(name)
+        if record is None:
+            record = await asyncio.to_thread(self._read, name)
+            if record is None:
+                record = (None, {}, datetime.now(timezone.utc))
+            if self.local_cache:
+                self._remember(name, record)
+
+        state, data, updated_at = record
+        if datetime.now(timezone.utc) - updated_at > self.ttl:
+            # Брошенный сценарий: из кэша убираем сразу, из базы - в expire()
+            self._records.pop(name, None)
+            return None, {}
+        return state, data
+
+    def _put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        name = _storage_key(key)
+        record = (state, data, datetime.now(timezone.utc))
+        if self.local_cache:
+            self._remember(name, record)
+        self._dirty[name] = record
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        _, data = await self._get(key)
+        self._put(key, _state_name(state), data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._get(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        state, _ = await self._get(key)
+        self._put(key, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._get(key)
+        return dict(data)
+
+    async def flush(self):
+        """Записать накопленные изменения одним пакетом"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._flushing, self._dirty = self._dirty, {}
+            try:
+                await asyncio.to_thread(self._write, self._flushing)
+            except Exception as e:
+                logger.error(f"❌ Не удалось записать состояния FSM ({len(self._flushing)}): {e}")
+                # Не затираем изменения, сделанные во время записи
+                for name, record in self._flushing.items():
+                    self._dirty.setdefault(name, record)
+            finally:
+                self._flushing = {}
+
+    async def expire(self) -> int:
+        """Удалить состояния, не менявшиеся дольше ttl"""
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        removed = await asyncio.to_thread(self._delete_expired, cutoff)
+        self._records = OrderedDict(
+            (name, record) for name, record in self._records.items() if record[2] >= cutoff
+        )
+        if removed:
+            logger.info(f"🧹 Удалено брошенных состояний FSM: {removed}")
+        return removed
+
+    async def _run(self):
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._expired_at > EXPIRE_INTERVAL:
+                    self._expired_at = time.monotonic()
+                    await self.expire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка обслуживания хранилища FSM: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        await asyncio.to_thread(self._close)
+
+
+class PostgresStorage(BufferedStorage):
+    """Состояния FSM в таблице fsm_states"""
+
+    def _read(self, name: str) -> Optional[Record]:
+        from database import FSMStateRecord, get_session
+
+        session = get_session()
+        try:
+            row = session.query(
+                FSMStateRecord.state, FSMStateRecord.data, FSMStateRecord.updated_at
+            ).filter(FSMStateRecord.key == name).first()
+        finally:
+            session.close()
+        return (row.state, row.data or {}, row.updated_at) if row else None
+
+    def _write(self, batch: Dict[str, Record]):
+        from sqlalchemy.dialects.postgresql import insert
+        from database import FSMStateRecord, get_session
+
+        # Пустое состояние хранить незачем: такая запись удаляется
+        deleted = [name for name, (state, data, _) in batch.items() if state is None and not data]
+        rows = [
+            {"key": name, "state": state, "data": _jsonable(data), "updated_at": updated_at}
+            for name, (state, data, updated_at) in batch.items() if state is not None or data
+        ]
+
+        session = get_session()
+        try:
+            if rows:
+                statement = insert(FSMStateRecord).values(rows)
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=[FSMStateRecord.key],
+                    set_={
+                        "state": statement.excluded.state,
+                        "data": statement.excluded.data,
+                        "updated_at": statement.excluded.updated_at,
+                    },
+                ))
+            if deleted:
+                session.query(FSMStateRecord).filter(
+                    FSMStateRecord.key.in_(deleted)
+                ).delete(synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _delete_expired(self, cutoff: datetime) -> int:
+        from database import FSMStateRecord, get_session
+
+        session = get_session()
+        try:
+            removed = session.query(FSMStateRecord).filter(
+                FSMStateRecord.updated_at < cutoff
+            ).delete(synchronize_session=False)
+            session.commit()
+            return removed
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class SqliteStorage(BufferedStorage):
+    """Состояния FSM во встроенной SQLite (один узел, без Postgres)"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fsm_states ("
+            "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_states_updated_at ON fsm_states (updated_at)")
+        self._conn.commit()
+
+    def _read(self, name: str) -> Optional[Record]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, data, updated_at FROM fsm_states WHERE key = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), datetime.fromtimestamp(row[2], timezone.utc)
+
+    def _write(self, batch: Dict[str, Record]):
+        deleted = [(name,) for name, (state, data, _) in batch.items() if state is None and not data]
+        rows = [
+            (name, state, json.dumps(_jsonable(data), ensure_ascii=False), updated_at.timestamp())
+            for name, (state, data, updated_at) in batch.items() if state is not None or data
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO fsm_states (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, "
+                    "data = excluded.data, updated_at = excluded.updated_at",
+                    rows,
+                )
+                self._conn.executemany("DELETE FROM fsm_states WHERE key = ?", deleted)
+
+    def _delete_expired(self, cutoff: datetime) -> int:
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(
+                    "DELETE FROM fsm_states WHERE updated_at < ?", (cutoff.timestamp(),)
+                ).rowcount
+
+    def _close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_fsm_storage(config=None) -> BaseStorage:
+    """Хранилище FSM по настройке FSM_STORAGE (postgres, sqlite или memory)"""
+    config = config or load_config()
+    options = {
+        "ttl": timedelta(hours=config.fsm_state_ttl_hours),
+        "local_cache": config.fsm_local_cache,
+    }
+
+    if config.fsm_storage == "memory":
+        logger.warning("⚠️ FSM в памяти: незавершенные сценарии потеряются при перезапуске")
+        return MemoryStorage()
+    if config.fsm_storage == "sqlite":
+        logger.info(f"💾 FSM: SQLite {config.fsm_sqlite_path}")
+        return SqliteStorage(config.fsm_sqlite_path, **options)
+    if config.fsm_storage != "postgres":
+        logger.warning(f"⚠️ Неизвестное FSM_STORAGE={config.fsm_storage}, использую postgres")
+    logger.info("💾 FSM: Postgres (fsm_states)")
+    return PostgresStorage(**options)
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+
+from config import load_config
+from database import database as db
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-lock, которым владеет узел, управляющий планировщиками
+SCHEDULER_LOCK_KEY = 727_001
+# Как часто ведомые пытаются захватить лидерство, а лидер проверяет соединение
+LEADER_CHECK_INTERVAL = 5
+
+class SchedulerLeader:
+    """Выбор единственного узла, который запускает планировщики (Postgres advisory lock)
+
+    Блокировка сессионная и держится на отдельном соединении: если процесс лидера
+    падает или теряет соединение, Postgres снимает ее сам, и другой узел
+    подхватывает таймеры в течение LEADER_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self, lock_key: int = SCHEDULER_LOCK_KEY, check_interval: float = LEADER_CHECK_INTERVAL):
+        self.lock_key = lock_key
+        self.check_interval = check_interval
+        self.is_leader = False
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self):
+        """Запустить фоновый цикл выборов (повторный вызов ничего не делает)
+
+        При шардировании (sharding.py) в выборах участвует только процесс
+        SCHEDULER_SHARD: остальные шарды планировщиков не запускают.
+        """
+        config = load_config()
+        if config.shard_id is not None and config.shard_id != config.scheduler_shard:
+            logger.info(f"⏸ Шард {config.shard_id}: планировщики работают в шарде {config.scheduler_shard}")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить цикл и отдать лидерство"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self._release)
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    await asyncio.to_thread(self._heartbeat)
+                else:
+                    acquired = await asyncio.to_thread(self._try_acquire)
+                    if acquired:
+                        logger.info("👑 Узел стал лидером: планировщики активны")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.is_leader:
+                    logger.error(f"❌ Потеряно лидерство: {e}")
+                else:
+                    logger.debug(f"Не удалось захватить лидерство: {e}")
+                self._drop_connection()
+
+            await asyncio.sleep(self.check_interval)
+
+    def _try_acquire(self) -> bool:
+        if db.engine is None:
+            db.init_engine()
+
+        if self._connection is None:
+            self._connection = db.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+        acquired = self._connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+        ).scalar()
+        self.is_leader = bool(acquired)
+        return self.is_leader
+
+    def _heartbeat(self):
+        """Лидер проверяет, что соединение (а значит и блокировка) живо"""
+        self._connection.execute(text("SELECT 1"))
+
+    def _release(self):
+        if self._connection is not None and self.is_leader:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            except Exception as e:
+                logger.warning(f"Не удалось снять блокировку лидера: {e}")
+        self._drop_connection()
+
+    def _drop_connection(self):
+        self.is_leader = False
+        if self._connection is not None:
+            try:
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+def leader_only(func):
+    """Декоратор для задач планировщика: выполнять только на узле-лидере"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not scheduler_leader.is_leader:
+            logger.debug(f"Пропуск {func.__name__}: узел не лидер")
+            return None
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+
+scheduler_leader = SchedulerLeader()
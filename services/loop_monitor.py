@@ -0,0 +1,167 @@
+"""Задержка event loop и поиск блокирующего кода
+
+Задача-сторож засыпает на interval и замеряет, насколько позже проснулась:
+это и есть задержка loop (lag). Она идет в гистограмму и в окно, по которому
+считаются p50/p95/p99 (bot_event_loop_lag_quantile_seconds).
+
+Пока loop заблокирован, сторож не работает, поэтому стеки снимает отдельный
+поток: если сторож не отмечался дольше порога, поток берет кадр потока loop
+(sys._current_frames) - это и есть код, который держит loop. Когда блокировка
+заканчивается, в лог уходит самый частый стек и длительность.
+
+    python -m services.loop_monitor    # демонстрация на time.sleep
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from services.monitoring import EVENT_LOOP_LAG, EVENT_LOOP_LAG_QUANTILE, EVENT_LOOP_BLOCKS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.05
+DEFAULT_THRESHOLD = 0.1
+LAG_WINDOW = 2048
+STACK_DEPTH = 12
+# Как часто пересчитывать перцентили (в замерах)
+QUANTILE_EXPORT_EVERY = 20
+RECENT_BLOCKS = 20
+
+
+def _format_stack(frame) -> str:
+    """Стек кадра, начиная с самого внутреннего вызова"""
+    entries = traceback.extract_stack(frame, limit=STACK_DEPTH)
+    return "\n".join(
+        f"  {entry.filename}:{entry.lineno} {entry.name}" for entry in reversed(entries)
+    )
+
+
+class LoopLagMonitor:
+    """Сторож задержки event loop с поточным сэмплером стеков"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, threshold: float = DEFAULT_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.recent_blocks: deque = deque(maxlen=RECENT_BLOCKS)
+        self._lags: deque = deque(maxlen=LAG_WINDOW)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Запустить сторожа в текущем event loop"""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._watch())
+        self._thread = threading.Thread(target=self._sample, name="loop-lag-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Монитор event loop: порог {self.threshold * 1000:.0f} мс")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        measured = 0
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+
+            lag = max(0.0, now - started - self.interval)
+            self._lags.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+            measured += 1
+            if measured % QUANTILE_EXPORT_EVERY == 0:
+                for name, value in self.percentiles().items():
+                    EVENT_LOOP_LAG_QUANTILE.labels(quantile=name).set(value)
+
+    def _sample(self):
+        """Поток-сэмплер: стеки потока loop, пока тот не отвечает"""
+        sample_every = max(self.threshold / 4, 0.01)
+        stacks: Counter = Counter()
+        worst = 0.0
+
+        while not self._stop.wait(sample_every):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled >= self.threshold:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stacks[_format_stack(frame)] += 1
+                worst = max(worst, stalled)
+            elif stacks:
+                self._report(worst, stacks)
+                stacks = Counter()
+                worst = 0.0
+
+    def _report(self, duration: float, stacks: Counter):
+        stack, hits = stacks.most_common(1)[0]
+        total = sum(stacks.values())
+        EVENT_LOOP_BLOCKS_TOTAL.inc()
+        self.recent_blocks.append({
+            "at": time.time(),
+            "duration": round(duration, 3),
+            "samples": total,
+            "stack": stack,
+        })
+        logger.warning(
+            f"🐢 Event loop заблокирован на {duration * 1000:.0f} мс "
+            f"(стек в {hits} из {total} снимков):\n{stack}"
+        )
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 и максимум задержки по последним замерам, в секундах"""
+        if not self._lags:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        lags = sorted(self._lags)
+        last = len(lags) - 1
+
+        def pick(q: float) -> float:
+            return round(lags[min(last, int(q * len(lags)))], 4)
+
+        return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(lags[last], 4)}
+
+
+loop_monitor = LoopLagMonitor()
+
+
+async def _demo():
+    monitor = LoopLagMonitor(threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.3)
+    print("Блокируем loop на 300 мс через time.sleep...")
+    time.sleep(0.3)
+    await asyncio.sleep(0.5)
+    print(f"Перцентили: {monitor.percentiles()}")
+    blocks: List[dict] = list(monitor.recent_blocks)
+    print(f"Обнаружено блокировок: {len(blocks)}")
+    for block in blocks:
+        print(f"{block['duration'] * 1000:.0f} мс:\n{block['stack']}")
+    await monitor.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_demo())
@@ -0,0 +1,202 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageMedia, SendPhoto
+from aiogram.types import FSInputFile, InputMediaPhoto, Message
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Права нового файла, если прежнего еще нет
+DEFAULT_FILE_MODE = 0o644
+
+
+class MediaRegistry:
+    """file_id статических картинок меню: файл загружается в Telegram один раз
+
+    Картинки объявляются через static() и дальше передаются в answer_photo и
+    InputMediaPhoto как обычный FSInputFile. Middleware сессии бота подменяет
+    такой файл на сохраненный file_id, а после первой загрузки запоминает
+    file_id из ответа. Если Telegram отклонил file_id или файл на диске
+    изменился (другой mtime), картинка загружается заново.
+
+    Файл file_id (MEDIA_FILE_IDS_PATH) общий для процессов-шардов: каждое
+    изменение перечитывает его и записывает под межпроцессной блокировкой,
+    поэтому записи разных процессов не затирают друг друга.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._lock = threading.Lock()
+        # bot_id -> путь картинки -> {"file_id", "mtime"}
+        self._file_ids: Dict[str, Dict[str, dict]] = {}
+        self._static: set = set()
+        self._loaded = False
+
+    @property
+    def path(self) -> str:
+        return self._path or load_config().media_file_ids_path
+
+    def static(self, path: str) -> FSInputFile:
+        """Объявить статическую картинку, file_id которой нужно кэшировать"""
+        self._static.add(path)
+        return FSInputFile(path)
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._file_ids = self._read_file()
+            self._loaded = True
+
+    def _read_file(self) -> Dict[str, Dict[str, dict]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось прочитать {self.path}: {e}")
+            return {}
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def get(self, bot_id: int, path: str) -> Optional[str]:
+        """Сохраненный file_id картинки или None, если ее нужно загрузить"""
+        self._load()
+        entry = self._file_ids.get(str(bot_id), {}).get(path)
+        if entry is None:
+            return None
+        if entry.get("mtime") != self._mtime(path):
+            logger.info(f"🖼 Картинка {path} изменилась, загружаю заново")
+            return None
+        return entry["file_id"]
+
+    async def remember(self, bot_id: int, path: str, file_id: str):
+        self._load()
+        entry = {"file_id": file_id, "mtime": self._mtime(path)}
+        if self._file_ids.get(str(bot_id), {}).get(path) == entry:
+            return
+        self._file_ids.setdefault(str(bot_id), {})[path] = entry
+        await asyncio.to_thread(self._update, bot_id, path, entry)
+
+    async def invalidate(self, bot_id: int, path: str):
+        """Забыть file_id: следующая отправка загрузит файл заново"""
+        self._load()
+        if self._file_ids.get(str(bot_id), {}).pop(path, None) is not None:
+            logger.warning(f"⚠️ file_id картинки {path} отклонен, загружаю заново")
+            await asyncio.to_thread(self._update, bot_id, path, None)
+
+    @contextmanager
+    def _file_lock(self):
+        """Блокировка файла file_id между процессами"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _update(self, bot_id: int, path: str, entry: Optional[dict]):
+        """Перечитать файл, изменить одну запись (None - удалить) и записать обратно"""
+        with self._lock, self._file_lock():
+            file_ids = self._read_file()
+            entries = file_ids.setdefault(str(bot_id), {})
+            if entry is None:
+                entries.pop(path, None)
+            else:
+                entries[path] = entry
+            self._write(file_ids)
+            # Заодно подхватываем file_id, сохраненные другими процессами
+            self._file_ids = file_ids
+
+    def _write(self, file_ids: Dict[str, Dict[str, dict]]):
+        """Атомарно записать file_id на диск"""
+        data = json.dumps(file_ids, ensure_ascii=False, indent=2)
+        directory = os.path.dirname(self.path) or "."
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".media_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp создает файл с правами 0600: возвращаем права прежнего файла
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _static_path(self, media) -> Optional[str]:
+        if isinstance(media, FSInputFile) and str(media.path) in self._static:
+            return str(media.path)
+        return None
+
+    def install(self, bot):
+        """Подключить подмену file_id к сессии бота"""
+        bot.session.middleware(MediaRegistryMiddleware(self))
+
+
+class MediaRegistryMiddleware(BaseRequestMiddleware):
+    """Подмена статических FSInputFile на file_id в SendPhoto и EditMessageMedia"""
+
+    def __init__(self, registry: MediaRegistry):
+        self.registry = registry
+
+    async def __call__(self, make_request, bot, method):
+        if isinstance(method, SendPhoto):
+            path = self.registry._static_path(method.photo)
+            replace = lambda file: method.model_copy(update={"photo": file})
+        elif isinstance(method, EditMessageMedia) and isinstance(method.media, InputMediaPhoto):
+            path = self.registry._static_path(method.media.media)
+            replace = lambda file: method.model_copy(
+                update={"media": method.media.model_copy(update={"media": file})}
+            )
+        else:
+            path = None
+
+        if path is None:
+            return await make_request(bot, method)
+
+        file_id = self.registry.get(bot.id, path)
+        if file_id is not None:
+            try:
+                return await make_request(bot, replace(file_id))
+            except TelegramBadRequest as e:
+                # Прочие ошибки (подпись, "message is not modified") к file_id не относятся
+                if "file" not in str(e).lower():
+                    raise
+                await self.registry.invalidate(bot.id, path)
+
+        # make_request сессии возвращает уже сам результат метода (Message)
+        response = await make_request(bot, method)
+        if isinstance(response, Message) and response.photo:
+            await self.registry.remember(bot.id, path, response.photo[-1].file_id)
+        return response
+
+
+media_registry = MediaRegistry()
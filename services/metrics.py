@@ -1,8 +1,11 @@
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import func, and_
-from database import User, Survey, Challenge, Organization, get_session, SurveyType, ChallengeStatus
+from database import User, Survey, Challenge, Organization, get_session, SurveyType, ChallengeStatus, SurveyDailyRollup
 from typing import Dict, List, Tuple
-import pytz
+from utils.time import get_zone, local_day_bounds_utc
+import logging
+
+logger = logging.getLogger(__name__)
 
 class MetricsCollector:
     """Сбор и анализ метрик активности пользователей"""
@@ -16,10 +19,28 @@ class MetricsCollector:
             if not user:
                 return None
             
-            nsk_tz = pytz.timezone('Asia/Novosibirsk')
+            nsk_tz = get_zone('Asia/Novosibirsk')
             now_nsk = datetime.now(nsk_tz)
             
-            total_surveys = session.query(Survey).filter(Survey.user_id == user.id).count()
+            # Суммы по текущим опросам и по архиву (свернутые старые партиции)
+            raw = session.query(
+                func.count(Survey.id),
+                func.coalesce(func.sum(Survey.energy), 0), func.count(Survey.energy),
+                func.coalesce(func.sum(Survey.sleep), 0), func.count(Survey.sleep),
+                func.coalesce(func.sum(Survey.readiness), 0), func.count(Survey.readiness)
+            ).filter(Survey.user_id == user.id).one()
+            archived = session.query(
+                func.coalesce(func.sum(SurveyDailyRollup.surveys_count), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.energy_sum), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.energy_count), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.sleep_sum), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.sleep_count), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.readiness_sum), 0),
+                func.coalesce(func.sum(SurveyDailyRollup.readiness_count), 0)
+            ).filter(SurveyDailyRollup.user_id == user.id).one()
+            totals = [int(a) + int(b) for a, b in zip(raw, archived)]
+            
+            total_surveys = totals[0]
             completed_challenges = session.query(Challenge).filter(
                 Challenge.user_id == user.id,
                 Challenge.status == ChallengeStatus.COMPLETED.value
@@ -30,9 +51,9 @@ class MetricsCollector:
             ).count()
             
             if total_surveys > 0:
-                avg_energy = session.query(func.avg(Survey.energy)).filter(Survey.user_id == user.id).scalar() or 0
-                avg_sleep = session.query(func.avg(Survey.sleep)).filter(Survey.user_id == user.id).scalar() or 0
-                avg_readiness = session.query(func.avg(Survey.readiness)).filter(Survey.user_id == user.id).scalar() or 0
+                avg_energy = totals[1] / totals[2] if totals[2] else 0
+                avg_sleep = totals[3] / totals[4] if totals[4] else 0
+                avg_readiness = totals[5] / totals[6] if totals[6] else 0
             else:
                 avg_energy = 0
                 avg_sleep = 0
@@ -40,7 +61,7 @@ class MetricsCollector:
             
             if total_surveys > 0 and user.registered_at:
                 if user.registered_at.tzinfo is None:
-                    registered_at_nsk = nsk_tz.localize(user.registered_at)
+                    registered_at_nsk = user.registered_at.replace(tzinfo=nsk_tz)
                 else:
                     registered_at_nsk = user.registered_at.astimezone(nsk_tz)
                 
@@ -99,9 +120,15 @@ class MetricsCollector:
                     "total_points": 0
                 }
             
-            total_surveys = session.query(func.count(Survey.id)).filter(
-                Survey.user_id.in_([u.id for u in users])
+            # Текущие опросы плюс архив (свернутые старые партиции), как в get_user_stats
+            member_ids = [u.id for u in users]
+            raw_surveys = session.query(func.count(Survey.id)).filter(
+                Survey.user_id.in_(member_ids)
             ).scalar()
+            archived_surveys = session.query(
+                func.coalesce(func.sum(SurveyDailyRollup.surveys_count), 0)
+            ).filter(SurveyDailyRollup.user_id.in_(member_ids)).scalar()
+            total_surveys = int(raw_surveys) + int(archived_surveys)
             
             avg_level = session.query(func.avg(User.level)).filter(
                 User.org_id == org_id
@@ -158,16 +185,9 @@ class MetricsCollector:
         """Ежедневный отчет"""
         session = get_session()
         try:
-            # Часовой пояс Новосибирска
-            nsk_tz = pytz.timezone('Asia/Novosibirsk')
-            
-            # Начало и конец дня в Новосибирске
-            today_start_nsk = datetime.now(nsk_tz).replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end_nsk = today_start_nsk + timedelta(days=1)
-            
-            # Конвертируем в UTC для запросов к БД
-            today_start_utc = today_start_nsk.astimezone(timezone.utc)
-            today_end_utc = today_end_nsk.astimezone(timezone.utc)
+            # Начало и конец дня в Новосибирске, в UTC для запросов к БД
+            today_start_utc, today_end_utc = local_day_bounds_utc('Asia/Novosibirsk')
+            today_start_nsk = today_start_utc.astimezone(get_zone('Asia/Novosibirsk'))
             
             users = session.query(User).filter(User.org_id == org_id).all()
             
@@ -207,23 +227,18 @@ class MetricsCollector:
     @staticmethod
     def record_survey(user_db_id: int, survey_type: str, energy: int, sleep: int, readiness: int, mood: str) -> bool:
         """Сохранить опрос в историю"""
-        import traceback
-        
         try:
-            print(f"\n📥 METRICS COLLECTOR: record_survey called")
-            print(f"   user_db_id: {user_db_id}")
-            print(f"   survey_type: {survey_type}")
-            print(f"   energy: {energy}, sleep: {sleep}, readiness: {readiness}, mood: {mood}")
+            logger.debug(f"record_survey: user_db_id={user_db_id}, survey_type={survey_type}")
             
             session = get_session()
             
             user = session.query(User).filter(User.id == user_db_id).first()
             if not user:
-                print(f"❌ User with DB ID {user_db_id} not found!")
+                logger.error(f"❌ User with DB ID {user_db_id} not found!")
                 session.close()
                 return False
             
-            print(f"✅ User found: {user.name} (Telegram ID: {user.user_id})")
+            logger.debug(f"✅ User found: {user.name} (Telegram ID: {user.user_id})")
             
             survey = Survey(
                 user_id=user_db_id,
@@ -236,8 +251,6 @@ class MetricsCollector:
                 answers=f"energy={energy},sleep={sleep},readiness={readiness},mood={mood}"
             )
             
-            print(f"📝 Survey object created")
-            
             session.add(survey)
             
             user.energy = energy
@@ -247,17 +260,14 @@ class MetricsCollector:
             user.last_survey_at = datetime.now(timezone.utc)
             user.last_survey_type = survey_type
             
-            print(f"📝 User fields updated")
-            
             session.commit()
-            print(f"✅ Survey saved successfully with ID: {survey.id}")
+            logger.debug(f"✅ Survey saved successfully with ID: {survey.id}")
             
             session.close()
             return True
             
         except Exception as e:
-            print(f"❌ Error in record_survey: {e}")
-            traceback.print_exc()
+            logger.error(f"❌ Error in record_survey: {e}", exc_info=True)
             if 'session' in locals():
                 try:
                     session.rollback()
@@ -272,12 +282,12 @@ class MetricsCollector:
         """Получить опросы пользователя за сегодня"""
         try:
             session = get_session()
-            today = datetime.now(timezone.utc).date()
-            
+            day_start, day_end = local_day_bounds_utc("UTC")
 
             surveys = session.query(Survey).filter(
                 Survey.user_id == user_id,
-                func.date(Survey.date) == today  
+                Survey.date >= day_start,
+                Survey.date < day_end
             ).order_by(Survey.date.desc()).all()  
             
             result = []
@@ -295,7 +305,7 @@ class MetricsCollector:
             return result
             
         except Exception as e:
-            print(f"❌ Ошибка получения опросов: {e}")
+            logger.error(f"❌ Ошибка получения опросов: {e}")
             return []
         
     @staticmethod
@@ -303,19 +313,22 @@ class MetricsCollector:
         """Проверить, проходил ли пользователь опрос определенного типа сегодня"""
         try:
             session = get_session()
-            today = datetime.now(timezone.utc).date()
-            
-            count = session.query(Survey).filter(
-                Survey.user_id == user_id,
-                Survey.survey_type == survey_type,
-                func.date(Survey.date) == today  # ← ИСПРАВЛЕНО
-            ).count()
+            day_start, day_end = local_day_bounds_utc("UTC")
+            
+            taken = session.query(
+                session.query(Survey.id).filter(
+                    Survey.user_id == user_id,
+                    Survey.survey_type == survey_type,
+                    Survey.date >= day_start,
+                    Survey.date < day_end
+                ).exists()
+            ).scalar()
             
             session.close()
-            return count > 0
+            return bool(taken)
             
         except Exception as e:
-            print(f"❌ Ошибка проверки опроса: {e}")
+            logger.error(f"❌ Ошибка проверки опроса: {e}")
             return False
     
     @staticmethod
@@ -336,7 +349,7 @@ class MetricsCollector:
             session.commit()
             return True
         except Exception as e:
-            print(f"❌ Ошибка при добавлении баллов: {e}")
+            logger.error(f"❌ Ошибка при добавлении баллов: {e}")
             return False
         finally:
             session.close()
@@ -383,18 +396,15 @@ class FootballMetrics(MetricsCollector):
 
 def get_nsk_time():
     """Получить текущее время в Новосибирске"""
-    nsk_tz = pytz.timezone('Asia/Novosibirsk')
-    return datetime.now(nsk_tz)
+    return datetime.now(get_zone('Asia/Novosibirsk'))
 
 def get_nsk_today_start():
     """Получить начало текущего дня в Новосибирске"""
-    nsk_tz = pytz.timezone('Asia/Novosibirsk')
-    now_nsk = datetime.now(nsk_tz)
+    now_nsk = datetime.now(get_zone('Asia/Novosibirsk'))
     return now_nsk.replace(hour=0, minute=0, second=0, microsecond=0)
 
 def convert_to_utc_for_db(nsk_datetime):
     """Конвертировать время Новосибирска в UTC для запросов к БД"""
     if nsk_datetime.tzinfo is None:
-        nsk_tz = pytz.timezone('Asia/Novosibirsk')
-        nsk_datetime = nsk_tz.localize(nsk_datetime)
+        nsk_datetime = nsk_datetime.replace(tzinfo=get_zone('Asia/Novosibirsk'))
     return nsk_datetime.astimezone(timezone.utc)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Метрики Prometheus: обработчики, апдейты, запросы к БД, планировщики, рассылки, event loop
+
+Метрики отдаются локальным HTTP-сервером на METRICS_HOST:METRICS_PORT/metrics
+(в шардах - METRICS_PORT + номер шарда). METRICS_PORT=0 выключает сервер.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from config import load_config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300)
+BROADCAST_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+UPDATES_TOTAL = Counter(
+    "bot_updates_total", "Полученные апдейты", ["event_type"]
+)
+UPDATE_ERRORS_TOTAL = Counter(
+    "bot_update_errors_total", "Апдейты, обработка которых завершилась исключением", ["event_type"]
+)
+UPDATES_IN_FLIGHT = Gauge(
+    "bot_updates_in_flight", "Апдейты в обработке"
+)
+UPDATE_DURATION = Histogram(
+    "bot_update_duration_seconds", "Полное время обработки апдейта", ["event_type"],
+    buckets=LATENCY_BUCKETS,
+)
+HANDLER_DURATION = Histogram(
+    "bot_handler_duration_seconds", "Время работы обработчика", ["router", "handler"],
+    buckets=LATENCY_BUCKETS,
+)
+HANDLER_ERRORS_TOTAL = Counter(
+    "bot_handler_errors_total", "Исключения в обработчиках", ["router", "handler"]
+)
+HANDLERS_IN_FLIGHT = Gauge(
+    "bot_handlers_in_flight", "Обработчики, выполняющиеся сейчас", ["router"]
+)
+DB_QUERIES_PER_UPDATE = Histogram(
+    "bot_db_queries_per_update", "SQL-запросов на один апдейт",
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME_PER_UPDATE = Histogram(
+    "bot_db_seconds_per_update", "Время SQL-запросов на один апдейт",
+    buckets=LATENCY_BUCKETS,
+)
+SCHEDULER_LAG = Histogram(
+    "bot_scheduler_lag_seconds", "Опоздание запуска задачи относительно расписания", ["job"],
+    buckets=LAG_BUCKETS,
+)
+SCHEDULER_MISSED_TOTAL = Counter(
+    "bot_scheduler_missed_total", "Пропущенные запуски задач APScheduler", ["job"]
+)
+BROADCAST_MESSAGES_TOTAL = Counter(
+    "bot_broadcast_messages_total", "Сообщения рассылок", ["kind", "status"]
+)
+BROADCAST_DURATION = Histogram(
+    "bot_broadcast_duration_seconds", "Длительность рассылки", ["kind"],
+    buckets=BROADCAST_BUCKETS,
+)
+BROADCAST_THROUGHPUT = Gauge(
+    "bot_broadcast_messages_per_second", "Скорость последней рассылки", ["kind"]
+)
+EVENT_LOOP_LAG = Histogram(
+    "bot_event_loop_lag_seconds", "Задержка event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_LAG_QUANTILE = Gauge(
+    "bot_event_loop_lag_quantile_seconds", "Перцентили задержки event loop по последним замерам",
+    ["quantile"]
+)
+EVENT_LOOP_BLOCKS_TOTAL = Counter(
+    "bot_event_loop_blocks_total", "Блокировки event loop дольше порога"
+)
+
+_server_started = False
+
+
+def handler_labels(handler, router=None) -> tuple:
+    """Метки (router, handler) для обработчика aiogram
+
+    Роутеры в проекте создаются без имени (имя по умолчанию - hex id), поэтому
+    вместо него берется модуль, в котором объявлен обработчик.
+    """
+    callback = getattr(handler, "callback", handler)
+    module = getattr(callback, "__module__", None) or "unknown"
+    name = getattr(callback, "__qualname__", None) or getattr(callback, "__name__", "unknown")
+    router_name = getattr(router, "name", None)
+    if not router_name or router_name.startswith("0x"):
+        router_name = module.rsplit(".", 1)[-1]
+    return router_name, name
+
+
+def record_broadcast(kind: str, sent: int, failed: int, duration: float):
+    """Итоги рассылки: сколько отправлено, сколько не дошло и за сколько"""
+    BROADCAST_MESSAGES_TOTAL.labels(kind=kind, status="sent").inc(sent)
+    BROADCAST_MESSAGES_TOTAL.labels(kind=kind, status="failed").inc(failed)
+    BROADCAST_DURATION.labels(kind=kind).observe(duration)
+    if duration > 0:
+        BROADCAST_THROUGHPUT.labels(kind=kind).set((sent + failed) / duration)
+
+
+async def tracked_sleep(job: str, seconds: float):
+    """asyncio.sleep для циклов планировщиков: насколько позже срока проснулись"""
+    started = time.monotonic()
+    await asyncio.sleep(seconds)
+    SCHEDULER_LAG.labels(job=job).observe(max(0.0, time.monotonic() - started - seconds))
+
+
+def instrument_scheduler(scheduler):
+    """Опоздание и пропуски задач APScheduler"""
+    from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+
+    def listener(event):
+        job = scheduler.get_job(event.job_id)
+        label = job.name if job is not None else event.job_id
+        if event.code == EVENT_JOB_MISSED:
+            SCHEDULER_MISSED_TOTAL.labels(job=label).inc()
+            return
+        if event.scheduled_run_times:
+            lag = (datetime.now(timezone.utc) - max(event.scheduled_run_times)).total_seconds()
+            SCHEDULER_LAG.labels(job=label).observe(max(0.0, lag))
+
+    scheduler.add_listener(listener, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED)
+
+
+def start_metrics_server(config=None) -> bool:
+    """Поднять HTTP-сервер /metrics (один раз на процесс)"""
+    global _server_started
+    config = config or load_config()
+    if _server_started or not config.metrics_port:
+        return False
+
+    port = config.metrics_port + (config.shard_id or 0)
+    try:
+        start_http_server(port, addr=config.metrics_host)
+    except OSError as e:
+        logger.error(f"❌ Не удалось запустить сервер метрик на {config.metrics_host}:{port}: {e}")
+        return False
+
+    _server_started = True
+    logger.info(f"📈 Метрики: http://{config.metrics_host}:{port}/metrics")
+    return True
+
+
+async def _on_startup():
+    start_metrics_server()
+
+    config = load_config()
+    if config.loop_monitor:
+        from services.loop_monitor import loop_monitor
+        loop_monitor.threshold = config.loop_lag_threshold_ms / 1000
+        loop_monitor.start()
+
+
+async def _on_shutdown():
+    from services.loop_monitor import loop_monitor
+    await loop_monitor.stop()
+
+
+def setup_metrics(dp):
+    """Мидлвари метрик на все события диспетчера и сервер /metrics при старте"""
+    from middlewares import UpdateMetricsMiddleware, HandlerMetricsMiddleware
+
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    # Inner-мидлвари диспетчера действуют и во вложенных роутерах
+    handler_middleware = HandlerMetricsMiddleware()
+    for name, observer in dp.observers.items():
+        if name not in ("update", "error"):
+            observer.middleware(handler_middleware)
+    dp.startup.register(_on_startup)
+    dp.shutdown.register(_on_shutdown)
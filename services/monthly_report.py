@@ -1,12 +1,22 @@
 # services/monthly_reports.py
 import logging
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, List
 from database import get_session
 from database.models import User, Challenge, Survey, Organization, ChallengeStatus
+from utils.time import count_local_days, get_org_timezone, get_user_timezone, to_local_dates, to_survey_periods
 
 logger = logging.getLogger(__name__)
 
+SURVEY_PERIODS = ("morning", "afternoon", "evening")
+
+
+def _periods_breakdown(periods) -> Dict[str, int]:
+    """Сколько опросов пройдено утром, днем и вечером"""
+    counts = Counter(str(period) for period in periods)
+    return {period: counts[period] for period in SURVEY_PERIODS}
+
 async def generate_user_monthly_report(user_id: int) -> Dict:
     """Создать месячный отчет для пользователя - ФУНКЦИЯ"""
     session = get_session()
@@ -20,7 +30,7 @@ async def generate_user_monthly_report(user_id: int) -> Dict:
             logger.warning(f"❌ Пользователь Telegram ID {user_id} не найден в базе данных")
             return {"error": "Пользователь не найден в системе. Пожалуйста, зарегистрируйтесь или обратитесь к администратору."}
         
-        print(f"✅ Найден пользователь: {user.name}")
+        logger.info(f"✅ Найден пользователь: {user.name}")
         
         # Период: последние 30 дней
         end_date = datetime.now()
@@ -34,7 +44,7 @@ async def generate_user_monthly_report(user_id: int) -> Dict:
             Challenge.completed_at <= end_date
         ).order_by(Challenge.completed_at.desc()).all()
         
-        print(f"📊 Выполнено челленджей: {len(completed_challenges)}")
+        logger.info(f"📊 Выполнено челленджей: {len(completed_challenges)}")
         
         # 2. Опросы за период
         surveys = session.query(Survey).filter(
@@ -43,14 +53,18 @@ async def generate_user_monthly_report(user_id: int) -> Dict:
             Survey.date <= end_date
         ).all()
         
-        print(f"📋 Пройдено опросов: {len(surveys)}")
+        logger.info(f"📋 Пройдено опросов: {len(surveys)}")
         
         # 3. Простая статистика
         total_points = sum(c.points for c in completed_challenges)
         avg_energy = sum(s.energy for s in surveys) / len(surveys) if surveys else 0
         
         # 4. Рассчитываем прогресс
-        days_active = len(set(s.date.date() for s in surveys)) if surveys else 0
+        # Активные дни и периоды опросов считаем по локальному времени организации, одним проходом
+        timezone_str = get_user_timezone(user_id)
+        survey_times = [s.date for s in surveys]
+        days_active = count_local_days(survey_times, timezone_str) if surveys else 0
+        surveys_by_period = _periods_breakdown(to_survey_periods(survey_times, timezone_str) if surveys else [])
         completion_rate = (len(completed_challenges) / 30) * 100 if completed_challenges else 0
         
         # 5. Формируем отчет для ReportFormatter (личный отчет)
@@ -71,6 +85,7 @@ async def generate_user_monthly_report(user_id: int) -> Dict:
                 "total_points": total_points,
                 "avg_energy": round(avg_energy, 1),
                 "active_days": days_active,
+                "surveys_by_period": surveys_by_period,
                 "completion_rate": round(completion_rate, 1)
             },
             "progress": {
@@ -94,7 +109,7 @@ async def generate_user_monthly_report(user_id: int) -> Dict:
             }
         }
         
-        print(f"✅ Отчет сгенерирован для {user.name}")
+        logger.info(f"✅ Отчет сгенерирован для {user.name}")
         return report
         
     except Exception as e:
@@ -109,23 +124,23 @@ async def generate_trainer_monthly_report(org_id: int) -> Dict:
     """Создать месячный отчет для тренера - ФУНКЦИЯ"""
     session = get_session()
     try:
-        print(f"🔍 Генерация отчета тренера для организации ID: {org_id}")
+        logger.info(f"🔍 Генерация отчета тренера для организации ID: {org_id}")
         
         org = session.query(Organization).filter(Organization.id == org_id).first()
         if not org:
-            print("❌ Организация не найдена")
+            logger.error("❌ Организация не найдена")
             return {"error": "Организация не найдена"}
         
-        print(f"✅ Организация: {org.name}")
+        logger.info(f"✅ Организация: {org.name}")
         
         # Получаем всех пользователей
         users = session.query(User).filter(User.org_id == org_id).all()
         
         if not users:
-            print("❌ Нет пользователей в организации")
+            logger.error("❌ Нет пользователей в организации")
             return {"error": "В организации нет пользователей"}
         
-        print(f"📊 Найдено пользователей: {len(users)}")
+        logger.info(f"📊 Найдено пользователей: {len(users)}")
         
         # Период
         end_date = datetime.now()
@@ -134,6 +149,24 @@ async def generate_trainer_monthly_report(org_id: int) -> Dict:
         member_reports = []
         total_challenges = 0
         
+        # Опросы всей команды одним запросом; локальные даты и периоды - одним проходом
+        team_surveys = session.query(Survey.user_id, Survey.date, Survey.energy).filter(
+            Survey.user_id.in_([u.id for u in users]),
+            Survey.date >= start_date,
+            Survey.date <= end_date
+        ).all()
+        timezone_str = get_org_timezone(org_id)
+        survey_times = [s.date for s in team_surveys]
+        local_dates = to_local_dates(survey_times, timezone_str) if team_surveys else []
+        periods = to_survey_periods(survey_times, timezone_str) if team_surveys else []
+        
+        surveys_by_user = defaultdict(lambda: {"energy": [], "days": set(), "periods": []})
+        for survey, day, period in zip(team_surveys, local_dates, periods):
+            member = surveys_by_user[survey.user_id]
+            member["energy"].append(survey.energy)
+            member["days"].add(day)
+            member["periods"].append(period)
+        
         for user in users:
             # Выполненные челленджи
             challenges = session.query(Challenge).filter(
@@ -143,11 +176,8 @@ async def generate_trainer_monthly_report(org_id: int) -> Dict:
                 Challenge.completed_at <= end_date
             ).all()
             
-            surveys = session.query(Survey).filter(
-                Survey.user_id == user.id,
-                Survey.date >= start_date,
-                Survey.date <= end_date
-            ).all()
+            surveys = surveys_by_user.get(user.id, {"energy": [], "days": set(), "periods": []})
+            energy = surveys["energy"]
             
             user_challenges = len(challenges)
             total_challenges += user_challenges
@@ -160,8 +190,10 @@ async def generate_trainer_monthly_report(org_id: int) -> Dict:
                     "total_challenges": user_challenges,
                     "completed_challenges": user_challenges,
                     "completion_rate": round((user_challenges / 30) * 100, 1),
-                    "recent_surveys": len(surveys),
-                    "avg_energy": sum(s.energy for s in surveys) / len(surveys) if surveys else 0
+                    "recent_surveys": len(energy),
+                    "avg_energy": sum(energy) / len(energy) if energy else 0,
+                    "active_days": len(surveys["days"]),
+                    "surveys_by_period": _periods_breakdown(surveys["periods"])
                 },
                 "ai_analysis": {
                     "player_summary": f"Выполнил {user_challenges} челленджей за месяц",
@@ -184,7 +216,7 @@ async def generate_trainer_monthly_report(org_id: int) -> Dict:
             "total_members": len(users)
         }
         
-        print(f"✅ Отчет тренера сгенерирован! Пользователей: {len(users)}")
+        logger.info(f"✅ Отчет тренера сгенерирован! Пользователей: {len(users)}")
         return report
         
     except Exception as e:
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config import load_config
+from database import User, UserRole, get_session, get_admin_roles
+
+logger = logging.getLogger(__name__)
+
+# Роль меняется редко и после изменения кэш сбрасывается явно (invalidate);
+# TTL нужен, чтобы подхватывать изменения, сделанные на других репликах
+PERMISSION_CACHE_TTL = 30
+
+
+class PermissionService:
+    """Роль пользователя для проверок доступа: один запрос на TTL вместо 2-4 на клик
+
+    Снимок доступа - словарь с полями registered, role, org_id и
+    trainer_verified. Все is_* проверки админки читают его; ADMIN_IDS берутся
+    из load_config() на каждой проверке, чтобы reload_config() действовал сразу.
+    Код, меняющий роль, верификацию или организацию пользователя, вызывает
+    invalidate(user_id) после коммита.
+    """
+
+    def __init__(self, ttl: float = PERMISSION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[int, Tuple[dict, float]] = {}
+
+    def get(self, user_id: int) -> dict:
+        """Снимок доступа пользователя (из кэша или одним запросом)"""
+        entry = self._cache.get(user_id)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+
+        access = self._load(user_id)
+        with self._lock:
+            self._cache[user_id] = (access, now)
+        return access
+
+    @staticmethod
+    def _load(user_id: int) -> dict:
+        session = get_session()
+        try:
+            row = session.query(User.role, User.org_id, User.trainer_verified).filter(
+                User.user_id == user_id
+            ).first()
+        finally:
+            session.close()
+
+        return {
+            "registered": row is not None,
+            "role": row.role if row else None,
+            "org_id": row.org_id if row else None,
+            "trainer_verified": bool(row.trainer_verified) if row else False,
+        }
+
+    def invalidate(self, user_id: int):
+        """Сбросить кэш пользователя (после смены роли, верификации, организации)"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def is_env_admin(user_id: int) -> bool:
+        """Суперадмин из ADMIN_IDS"""
+        return user_id in load_config().admin_ids
+
+    def is_super_admin(self, user_id: int) -> bool:
+        return self.is_env_admin(user_id) or self.get(user_id)["role"] == UserRole.SUPER_ADMIN.value
+
+    def is_org_admin(self, user_id: int) -> bool:
+        """Суперадмин или админ организации"""
+        return self.is_super_admin(user_id) or self.get(user_id)["role"] in get_admin_roles()
+
+    def is_trainer(self, user_id: int) -> bool:
+        """Верифицированный тренер"""
+        access = self.get(user_id)
+        return access["role"] == UserRole.TRAINER.value and access["trainer_verified"]
+
+    def is_trainer_pending(self, user_id: int) -> bool:
+        """Тренер, ожидающий верификации"""
+        access = self.get(user_id)
+        return access["role"] == UserRole.TRAINER.value and not access["trainer_verified"]
+
+    def effective_role(self, user_id: int) -> str:
+        """Фактическая роль: неверифицированный тренер считается участником"""
+        access = self.get(user_id)
+        if not access["registered"] or self.is_trainer_pending(user_id):
+            return UserRole.MEMBER.value
+        return access["role"]
+
+    def can_manage_roles(self, user_id: int) -> bool:
+        """Управление ролями и верификация тренеров: роль в БД - суперадмин или админ организации"""
+        return self.get(user_id)["role"] in get_admin_roles()
+
+
+permission_service = PermissionService()
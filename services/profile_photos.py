@@ -0,0 +1,151 @@
+import asyncio
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import aiofiles
+from aiogram.types import FSInputFile, Message
+from PIL import Image, ImageOps
+
+from database import User, get_session
+from .media_registry import media_registry
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PHOTOS_DIR = "profile_photos"
+# Фото профиля хранится уменьшенным: большая сторона не больше этого значения
+PROFILE_PHOTO_MAX_SIDE = 1280
+PROFILE_PHOTO_QUALITY = 85
+
+STANDARD_PROFILE_PIC = media_registry.static('pictures/meprofile.png')
+
+
+def _downscale(data: bytes, max_side: int) -> bytes:
+    """Уменьшить фото и пересохранить в JPEG (вызывается в потоке)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=PROFILE_PHOTO_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+class ProfilePhotoService:
+    """Фото профиля: file_id Telegram вместо повторной загрузки файла
+
+    После первой отправки Telegram возвращает file_id, который сохраняется
+    в users.profile_photo_file_id. Дальше профиль открывается без чтения диска
+    и без загрузки байтов. Файл на диске остается запасным вариантом.
+    """
+
+    def __init__(self, photos_dir: str = PROFILE_PHOTOS_DIR, max_side: int = PROFILE_PHOTO_MAX_SIDE):
+        self.photos_dir = photos_dir
+        self.max_side = max_side
+        # user_id -> есть ли кастомное фото (чтобы не ходить в БД и на диск)
+        self._has_custom: Dict[int, bool] = {}
+        Path(photos_dir).mkdir(exist_ok=True)
+
+    def photo_path(self, user_id: int) -> str:
+        return os.path.join(self.photos_dir, f"user_{user_id}_profile.jpg")
+
+    def has_custom_photo(self, user_id: int) -> bool:
+        """Есть ли у пользователя свое фото (по флагу в БД, с кэшем)"""
+        if user_id not in self._has_custom:
+            session = get_session()
+            try:
+                flag = session.query(User.has_custom_photo).filter(User.user_id == user_id).scalar()
+            finally:
+                session.close()
+            self._has_custom[user_id] = bool(flag)
+        return self._has_custom[user_id]
+
+    def resolve(self, user: User) -> Union[str, FSInputFile]:
+        """Что отправлять как фото профиля: file_id, файл с диска или стандартную картинку"""
+        self._has_custom[user.user_id] = bool(user.has_custom_photo)
+
+        if not user.has_custom_photo:
+            return STANDARD_PROFILE_PIC
+        if user.profile_photo_file_id:
+            return user.profile_photo_file_id
+
+        # Фото загружено до появления file_id: один раз отправляем файл
+        path = user.profile_photo_path or self.photo_path(user.user_id)
+        return FSInputFile(path) if os.path.exists(path) else STANDARD_PROFILE_PIC
+
+    async def remember_file_id(self, user: User, sent: Optional[Message]):
+        """Сохранить file_id после отправки фото с диска"""
+        if not isinstance(sent, Message) or not sent.photo:
+            return
+        if not user.has_custom_photo or user.profile_photo_file_id:
+            return
+
+        file_id = sent.photo[-1].file_id
+        user.profile_photo_file_id = file_id
+        await asyncio.to_thread(self._update_user, user.user_id, profile_photo_file_id=file_id)
+
+    async def save(self, user_id: int, file_id: str, bot) -> bool:
+        """Скачать, один раз уменьшить и сохранить фото; file_id присланного фото запоминаем"""
+        try:
+            buffer = io.BytesIO()
+            await bot.download(file_id, destination=buffer)
+            data = await asyncio.to_thread(_downscale, buffer.getvalue(), self.max_side)
+
+            path = self.photo_path(user_id)
+            async with aiofiles.open(path, "wb") as f:
+                await f.write(data)
+
+            await asyncio.to_thread(
+                self._update_user, user_id,
+                profile_photo_path=path, has_custom_photo=True, profile_photo_file_id=file_id
+            )
+            self._has_custom[user_id] = True
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения фото профиля {user_id}: {e}")
+            return False
+
+    async def delete(self, user_id: int) -> bool:
+        """Удалить свое фото и вернуть стандартное"""
+        try:
+            path = self.photo_path(user_id)
+            existed = await asyncio.to_thread(self._remove_file, path)
+
+            updated = await asyncio.to_thread(
+                self._update_user, user_id,
+                profile_photo_path=None, has_custom_photo=False, profile_photo_file_id=None
+            )
+            self._has_custom[user_id] = False
+            return existed or updated
+        except Exception as e:
+            logger.error(f"❌ Ошибка удаления фото профиля {user_id}: {e}")
+            return False
+
+    @staticmethod
+    def _remove_file(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _update_user(user_id: int, **fields) -> bool:
+        session = get_session()
+        try:
+            updated = session.query(User).filter(User.user_id == user_id).update(
+                fields, synchronize_session=False
+            )
+            session.commit()
+            return bool(updated)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+profile_photos = ProfilePhotoService()
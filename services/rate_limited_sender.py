@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram допускает ~30 сообщений в секунду на бота, оставляем запас
+DEFAULT_RATE_PER_SECOND = 25
+DEFAULT_CONCURRENCY = 10
+
+class RateLimitedSender:
+    """Параллельная отправка сообщений с ограничением частоты под лимиты Telegram"""
+
+    def __init__(
+        self,
+        rate_per_second: float = DEFAULT_RATE_PER_SECOND,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = 2
+    ):
+        self._interval = 1.0 / rate_per_second
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+        self.max_retries = max_retries
+
+    async def _wait_for_slot(self):
+        """Равномерно раздаем слоты отправки: не чаще одного раза в interval"""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def send(self, send_func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить одну отправку с учетом лимитов и повтором после RetryAfter"""
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self._wait_for_slot()
+                try:
+                    return await send_func()
+                except TelegramRetryAfter as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    logger.warning(f"⏳ Flood control, ждем {e.retry_after} с")
+                    await asyncio.sleep(e.retry_after)
+
+    async def send_many(
+        self,
+        items: Iterable[Any],
+        send_func: Callable[[Any], Awaitable[Any]]
+    ) -> List[Tuple[Any, Any, Optional[Exception]]]:
+        """Отправить по каждому элементу; возвращает (элемент, результат, ошибка)"""
+
+        async def run(item):
+            try:
+                return item, await self.send(lambda: send_func(item)), None
+            except Exception as e:
+                return item, None, e
+
+        return await asyncio.gather(*(run(item) for item in items))
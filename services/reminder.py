@@ -1,14 +1,20 @@
 # services/reminder_service.py
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List
 
+from sqlalchemy import func
+
 from database import get_session
 from database.models import Challenge, User, ChallengeStatus, Organization
 from utils.time import get_current_org_time, get_org_timezone
 
 logger = logging.getLogger(__name__)
 
+# Час (по времени организации), в который отправляются напоминания
+REMINDER_HOUR = 18
+
 class SimpleReminderService:
     """ПРОСТОЙ сервис напоминаний о невыполненных челленджах"""
     
@@ -39,6 +45,36 @@ class SimpleReminderService:
         finally:
             session.close()
     
+    async def send_reminders_for_timezone(self, timezone_name: str):
+        """Отправляем напоминания организациям одного часового пояса (вызывается в 18:00 по их времени)"""
+        session = get_session()
+        try:
+            organizations = session.query(Organization.id, Organization.name).filter(
+                Organization.timezone == timezone_name
+            ).all()
+        finally:
+            session.close()
+        
+        logger.info(f"🔔 Напоминания для {timezone_name}: {len(organizations)} организаций")
+        
+        for org in organizations:
+            try:
+                await self._send_for_org(org.id, org.name)
+            except Exception as e:
+                logger.error(f"❌ Ошибка для организации {org.name}: {e}")
+    
+    @staticmethod
+    def get_reminder_timezones() -> List[str]:
+        """Часовые пояса, в которых есть организации"""
+        session = get_session()
+        try:
+            rows = session.query(Organization.timezone).filter(
+                Organization.timezone.isnot(None)
+            ).distinct().all()
+            return [row.timezone for row in rows]
+        finally:
+            session.close()
+    
     async def _check_and_send_for_org(self, org: Organization):
         """Проверяем и отправляем напоминания для одной организации"""
         if not org.timezone:
@@ -51,65 +87,69 @@ class SimpleReminderService:
             return
         
         # Отправляем в 18:00 по местному времени (просто вечером)
-        if org_time.hour != 18:
+        if org_time.hour != REMINDER_HOUR:
             return
         
-        session = get_session()
-        try:
-            # Получаем пользователей с невыполненными челленджами
-            users = self._get_users_with_pending_challenges(org.id)
-            
-            logger.info(f"📋 Организация {org.name}: {len(users)} пользователей с челленджами")
-            
-            for user in users:
-                try:
-                    await self._send_simple_reminder(user)
-                    # Пауза между сообщениями
-                    import asyncio
-                    await asyncio.sleep(0.05)
-                except Exception as e:
-                    logger.error(f"❌ Не удалось отправить пользователю {user.get('user_id')}: {e}")
-                    continue
-                    
-        finally:
-            session.close()
+        await self._send_for_org(org.id, org.name)
+    
+    async def _send_for_org(self, org_id: int, org_name: str):
+        """Отправляем напоминания пользователям организации"""
+        # Получаем пользователей с невыполненными челленджами
+        users = self._get_users_with_pending_challenges(org_id)
+        
+        logger.info(f"📋 Организация {org_name}: {len(users)} пользователей с челленджами")
+        
+        for user in users:
+            try:
+                await self._send_simple_reminder(user)
+                # Пауза между сообщениями
+                await asyncio.sleep(0.05)
+            except Exception as e:
+                logger.error(f"❌ Не удалось отправить пользователю {user.get('user_id')}: {e}")
+                continue
     
     def _get_users_with_pending_challenges(self, org_id: int) -> List[dict]:
         """Получаем пользователей с невыполненными челленджами"""
         session = get_session()
         try:
-            # Простой запрос - находим пользователей с активными челленджами
-            users = session.query(User).filter(
+            # Один запрос: оконные функции считают челленджи пользователя
+            # и нумеруют их от новых к старым, наружу отдаем первые 3
+            ranked = session.query(
+                User.user_id,
+                User.name,
+                User.chat_id,
+                Challenge.text,
+                func.count(Challenge.id).over(
+                    partition_by=Challenge.user_id
+                ).label('challenge_count'),
+                func.row_number().over(
+                    partition_by=Challenge.user_id,
+                    order_by=Challenge.created_at.desc()
+                ).label('rn')
+            ).join(
+                User, User.user_id == Challenge.user_id
+            ).filter(
                 User.org_id == org_id,
                 User.chat_id.isnot(None),
-                User.is_active == True
-            ).all()
-            
-            result = []
-            
-            for user in users:
-                # Считаем активные челленджи для пользователя
-                challenge_count = session.query(Challenge).filter(
-                    Challenge.user_id == user.user_id,
-                    Challenge.status.in_([ChallengeStatus.PENDING.value, ChallengeStatus.ACTIVE.value])
-                ).count()
-                
-                if challenge_count > 0:
-                    # Получаем первые 3 челленджа для примера
-                    challenges = session.query(Challenge).filter(
-                        Challenge.user_id == user.user_id,
-                        Challenge.status.in_([ChallengeStatus.PENDING.value, ChallengeStatus.ACTIVE.value])
-                    ).order_by(Challenge.created_at.desc()).limit(3).all()
-                    
-                    result.append({
-                        'user_id': user.user_id,
-                        'name': user.name,
-                        'chat_id': user.chat_id,
-                        'challenge_count': challenge_count,
-                        'challenges': [challenge.text for challenge in challenges]
-                    })
-            
-            return result
+                Challenge.status.in_([ChallengeStatus.PENDING.value, ChallengeStatus.ACTIVE.value])
+            ).subquery()
+            
+            rows = session.query(ranked).filter(
+                ranked.c.rn <= 3
+            ).order_by(ranked.c.user_id, ranked.c.rn).all()
+            
+            result = {}
+            for row in rows:
+                user_data = result.setdefault(row.user_id, {
+                    'user_id': row.user_id,
+                    'name': row.name,
+                    'chat_id': row.chat_id,
+                    'challenge_count': row.challenge_count,
+                    'challenges': []
+                })
+                user_data['challenges'].append(row.text)
+            
+            return list(result.values())
             
         except Exception as e:
             logger.error(f"Ошибка получения пользователей: {e}")
@@ -0,0 +1,40 @@
+import logging
+from typing import Dict, List
+
+from config import load_config
+from database import database as db
+from database.partitioning import ensure_partitions, archive_expired_partitions
+
+logger = logging.getLogger(__name__)
+
+class PartitionRetentionService:
+    """Обслуживание партиций журнальных таблиц: создание впрок и архивация старых"""
+
+    def run(self) -> Dict[str, List[str]]:
+        """Создать партиции на будущие месяцы и свернуть устаревшие"""
+        config = load_config()
+        retention = {
+            "message_sent_logs": config.message_log_retention_months,
+            "surveys": config.survey_retention_months,
+        }
+
+        if db.engine is None:
+            db.init_engine()
+
+        try:
+            ensure_partitions(db.engine)
+        except Exception as e:
+            # Архивацию уже партиционированных таблиц это не отменяет
+            logger.error(f"❌ {e}")
+
+        archived = {}
+        for table, months in retention.items():
+            try:
+                archived[table] = archive_expired_partitions(db.engine, table, months)
+            except Exception as e:
+                logger.error(f"❌ Ошибка архивации {table}: {e}", exc_info=True)
+                archived[table] = []
+
+        total = sum(len(names) for names in archived.values())
+        logger.info(f"✅ Обслуживание партиций завершено, архивировано: {total}")
+        return archived
@@ -0,0 +1,86 @@
+"""Запуск фоновых планировщиков вместе с диспетчером
+
+Планировщики стартуют по startup диспетчера и останавливаются по shutdown,
+поэтому работают при любом способе приема апдейтов (main.py, webhook.py,
+sharding.py). При шардировании они запускаются только в процессе
+SCHEDULER_SHARD; между узлами рассылки дополнительно делит scheduler_leader.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from config import load_config
+from services.leader_election import scheduler_leader
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerRunner:
+    """Задачи APScheduler, очередь челленджей и рассылки по часовым поясам"""
+
+    def __init__(self):
+        self.bot_scheduler = None
+        self.challenge_scheduler = None
+        self.timezone_scheduler = None
+        self._timezone_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.bot_scheduler is not None
+
+    async def start(self, bot):
+        """Запустить все планировщики (повторный вызов ничего не делает)"""
+        if self.running:
+            return
+        config = load_config()
+        if config.shard_id is not None and config.shard_id != config.scheduler_shard:
+            logger.info(f"⏸ Шард {config.shard_id}: планировщики работают в шарде {config.scheduler_shard}")
+            return
+
+        from handlers.admins.modules.schedule import BotScheduler
+        from services.challenge_sheduler import ChallengeScheduler
+        from services.timezone_scheduler import TimezoneMessageScheduler
+
+        self.bot_scheduler = BotScheduler(bot)
+        self.bot_scheduler.start()
+
+        self.challenge_scheduler = ChallengeScheduler(bot)
+        await self.challenge_scheduler.start()
+
+        # start() рассылок по часовым поясам - сам цикл, поэтому в отдельной задаче
+        self.timezone_scheduler = TimezoneMessageScheduler(bot)
+        self._timezone_task = asyncio.create_task(self.timezone_scheduler.start())
+
+    async def stop(self):
+        """Остановить планировщики и отдать лидерство"""
+        if not self.running:
+            return
+        await self.timezone_scheduler.stop()
+        if self._timezone_task is not None:
+            self._timezone_task.cancel()
+            await asyncio.gather(self._timezone_task, return_exceptions=True)
+        await self.challenge_scheduler.stop()
+        self.bot_scheduler.shutdown()
+        await scheduler_leader.stop()
+
+        self.bot_scheduler = None
+        self.challenge_scheduler = None
+        self.timezone_scheduler = None
+        self._timezone_task = None
+
+
+scheduler_runner = SchedulerRunner()
+
+
+async def _on_startup(bot):
+    await scheduler_runner.start(bot)
+
+
+async def _on_shutdown():
+    await scheduler_runner.stop()
+
+
+def setup_schedulers(dp):
+    """Запускать планировщики при старте диспетчера и останавливать при завершении"""
+    dp.startup.register(_on_startup)
+    dp.shutdown.register(_on_shutdown)
@@ -3,6 +3,9 @@ import sys
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.fonts import addMapping
+import logging
+
+logger = logging.getLogger(__name__)
 
 def setup_fonts():
     """Настройка шрифтов для ReportLab"""
@@ -36,7 +39,7 @@ def setup_fonts():
                 try:
                     pdfmetrics.registerFont(TTFont('Arial', path))
                     found_fonts.append(('Arial', path))
-                    print(f"✅ Шрифт Arial загружен: {path}")
+                    logger.info(f"✅ Шрифт Arial загружен: {path}")
                     break
                 except Exception as e:
                     continue
@@ -48,7 +51,7 @@ def setup_fonts():
                     try:
                         pdfmetrics.registerFont(TTFont('Arial-Bold', path))
                         found_fonts.append(('Arial-Bold', path))
-                        print(f"✅ Шрифт Arial-Bold загружен: {path}")
+                        logger.info(f"✅ Шрифт Arial-Bold загружен: {path}")
                         break
                     except:
                         continue
@@ -61,16 +64,17 @@ def setup_fonts():
                 else:
                     addMapping('Arial', 0, 0, font_name)  # normal
             
-            print("✅ Шрифты настроены успешно")
+            logger.info("✅ Шрифты настроены успешно")
             return True
         
-        print("⚠️ Шрифты Arial не найдены")
+        logger.warning("⚠️ Шрифты Arial не найдены")
         return False
         
     except Exception as e:
-        print(f"❌ Ошибка настройки шрифтов: {e}")
+        logger.error(f"❌ Ошибка настройки шрифтов: {e}")
         return False
 
 # Запускаем настройку
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     setup_fonts()
\ No newline at end of file
@@ -1,5 +1,4 @@
-from datetime import datetime, time, timedelta
-import pytz
+from datetime import datetime, time, timedelta, timezone
 from typing import List, Optional, Dict, Tuple
 from database import get_session
 from database.models import MessageSchedule, Organization, User, MessageScheduleStatus
@@ -13,12 +12,8 @@ class ScheduleManager:
     @staticmethod
     def get_organization_timezone(org_id: int) -> str:
         """Получить часовой пояс организации"""
-        session = get_session()
-        try:
-            org = session.query(Organization).filter(Organization.id == org_id).first()
-            return org.timezone if org and org.timezone else "Asia/Novosibirsk"
-        finally:
-            session.close()
+        from utils.time import get_org_timezone
+        return get_org_timezone(org_id)
     
     @staticmethod
     def convert_to_utc(local_time: time, timezone_str: str, date: datetime = None) -> datetime:
@@ -26,16 +21,8 @@ class ScheduleManager:
         if date is None:
             date = datetime.now()
         
-        # Создаем datetime с локальным временем
-        local_dt = datetime.combine(date.date(), local_time)
-        
-        # Применяем часовой пояс
-        local_tz = pytz.timezone(timezone_str)
-        local_dt = local_tz.localize(local_dt)
-        
-        # Конвертируем в UTC
-        utc_dt = local_dt.astimezone(pytz.UTC)
-        return utc_dt
+        from utils.time import local_to_utc
+        return local_to_utc(date.date(), local_time, timezone_str)
     
     @staticmethod
     def get_schedules_page(org_id: int, page: int = 0, page_size: int = 5) -> Tuple[List[MessageSchedule], int, int]:
@@ -215,16 +202,17 @@ class ScheduleManager:
             org_timezone = ScheduleManager.get_organization_timezone(schedule.org_id)
         
         # Получаем текущее время в часовом поясе организации
-        org_tz = pytz.timezone(org_timezone)
-        now_org = datetime.now(pytz.UTC).astimezone(org_tz)
+        from utils.time import get_zone
+        org_tz = get_zone(org_timezone)
+        now_org = datetime.now(org_tz)
         
         # Создаем datetime для времени отправки
         send_time_local = schedule.scheduled_time
-        send_datetime_local = org_tz.localize(datetime.combine(now_org.date(), send_time_local))
+        send_datetime_local = datetime.combine(now_org.date(), send_time_local, tzinfo=org_tz)
         
         # Если время уже прошло сегодня, планируем на завтра
         if send_datetime_local < now_org:
             send_datetime_local += timedelta(days=1)
         
         # Конвертируем в UTC для хранения
-        return send_datetime_local.astimezone(pytz.UTC)
\ No newline at end of file
+        return send_datetime_local.astimezone(timezone.utc)
\ No newline at end of file
@@ -1,16 +1,24 @@
 from aiogram import Bot
 import asyncio
 import logging
-from datetime import datetime, time, timedelta
-import pytz
-from typing import Dict, List, Set, Tuple
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from typing import Dict, List, Optional, Set, Tuple
 import hashlib
 
+from sqlalchemy import insert, update, or_
+
 from database import get_session
 from database.models import MessageSchedule, User, Organization, MessageScheduleStatus, MessageSentLog
+from services.leader_election import scheduler_leader
+from services.monitoring import record_broadcast, tracked_sleep
+from utils.time import get_zone
 
 logger = logging.getLogger(__name__)
 
+# Сколько записей MessageSentLog вставлять одним executemany
+LOG_BATCH_SIZE = 500
+
 class TimezoneMessageScheduler:
     """Планировщик сообщений с учетом часового пояса организации"""
     
@@ -23,12 +31,18 @@ class TimezoneMessageScheduler:
     async def start(self):
         """Запуск планировщика"""
         self.is_running = True
+        scheduler_leader.ensure_started()
         logger.info("🚀 Планировщик сообщений (с учетом часового пояса) запущен")
         
         while self.is_running:
             try:
+                # Рассылки ведет только узел-лидер
+                if not scheduler_leader.is_leader:
+                    await asyncio.sleep(scheduler_leader.check_interval)
+                    continue
+                
                 # Получаем текущее время с часовым поясом UTC
-                current_utc = datetime.now(pytz.UTC)
+                current_utc = datetime.now(timezone.utc)
                 
                 # Проверяем, наступил ли новый день
                 await self._check_new_day(current_utc)
@@ -37,7 +51,7 @@ class TimezoneMessageScheduler:
                 await self._check_and_send_messages(current_utc)
                 
                 # Ждем 60 секунд
-                await asyncio.sleep(60)
+                await tracked_sleep("timezone_messages", 60)
                     
             except Exception as e:
                 logger.error(f"Ошибка в планировщике: {e}", exc_info=True)
@@ -60,7 +74,7 @@ class TimezoneMessageScheduler:
         try:
             # Убедимся, что current_utc осведомленный
             if current_utc.tzinfo is None:
-                current_utc_aware = current_utc.replace(tzinfo=pytz.UTC)
+                current_utc_aware = current_utc.replace(tzinfo=timezone.utc)
             else:
                 current_utc_aware = current_utc
             
@@ -88,14 +102,11 @@ class TimezoneMessageScheduler:
                     org_timezone = org.timezone if org.timezone else "Asia/Novosibirsk"
                     
                     # Получаем текущее время в часовом поясе организации
-                    try:
-                        org_tz = pytz.timezone(org_timezone)
-                        current_org_time = current_utc_aware.astimezone(org_tz)
-                    except pytz.exceptions.UnknownTimeZoneError:
-                        logger.error(f"Неизвестный часовой пояс: {org_timezone}, использую Asia/Novosibirsk")
-                        org_tz = pytz.timezone("Asia/Novosibirsk")
-                        current_org_time = current_utc_aware.astimezone(org_tz)
-                        org_timezone = "Asia/Novosibirsk"
+                    org_tz = get_zone(org_timezone)
+                    if org_tz.key != org_timezone:
+                        logger.error(f"Неизвестный часовой пояс: {org_timezone}, использую {org_tz.key}")
+                        org_timezone = org_tz.key
+                    current_org_time = current_utc_aware.astimezone(org_tz)
                     
                     # Проверяем, нужно ли отправлять сообщение
                     should_send = await self._should_send_schedule(
@@ -114,7 +125,9 @@ class TimezoneMessageScheduler:
                         )
                         
                         # Отправляем сообщение
-                        sent_count = await self._send_scheduled_message(schedule, org, current_utc_aware)
+                        sent_count = await self._send_scheduled_message(
+                            schedule, org, current_utc_aware, current_org_time.date()
+                        )
                         
                         if sent_count > 0:
                             logger.info(f"✅ Сообщение '{schedule.title}' отправлено {sent_count} пользователям")
@@ -134,25 +147,29 @@ class TimezoneMessageScheduler:
         schedule: MessageSchedule, 
         current_utc: datetime,
         current_org_time: datetime,
-        org_tz: pytz.BaseTzInfo
+        org_tz: ZoneInfo
     ) -> bool:
         """Проверить, нужно ли отправлять сообщение по расписанию"""
-        session = get_session()
         try:
+            # Уже отправляли сегодня (по дате организации) - в лог не смотрим
+            if schedule.last_sent_local_date == current_org_time.date():
+                logger.debug(f"Сообщение {schedule.id} уже отправлено {schedule.last_sent_local_date}")
+                return False
+            
             # Проверяем по времени
             schedule_time = schedule.scheduled_time
             
             # Создаем datetime для времени расписания на текущий день в часовом поясе организации
-            schedule_datetime_local = org_tz.localize(
-                datetime.combine(current_org_time.date(), schedule_time)
+            schedule_datetime_local = datetime.combine(
+                current_org_time.date(), schedule_time, tzinfo=org_tz
             )
             
             # Конвертируем в UTC для сравнения
-            schedule_datetime_utc = schedule_datetime_local.astimezone(pytz.UTC)
+            schedule_datetime_utc = schedule_datetime_local.astimezone(timezone.utc)
             
             # Убеждаемся, что current_utc также осведомленный (aware)
             if current_utc.tzinfo is None:
-                current_utc_aware = current_utc.replace(tzinfo=pytz.UTC)
+                current_utc_aware = current_utc.replace(tzinfo=timezone.utc)
             else:
                 current_utc_aware = current_utc
             
@@ -162,40 +179,50 @@ class TimezoneMessageScheduler:
             if time_diff > 300:  # 5 минут
                 return False
             
-            # Проверяем, не отправлялось ли уже сегодня это сообщение
-            # Ищем запись в логах за сегодня
-            today_start_utc = current_utc_aware.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            existing_log = session.query(MessageSentLog).filter(
-                MessageSentLog.schedule_id == schedule.id,
-                MessageSentLog.sent_at >= today_start_utc
-            ).first()
-            
-            if existing_log:
-                logger.debug(f"Сообщение {schedule.id} уже отправлено сегодня в {existing_log.sent_at}")
-                return False
-            
             return True
             
         except Exception as e:
             logger.error(f"Ошибка проверки отправки: {e}", exc_info=True)
             return False
-        finally:
-            session.close()
     
     async def _send_scheduled_message(
         self, 
         schedule: MessageSchedule, 
         org: Organization,
-        sent_time: datetime
+        sent_time: datetime,
+        local_date: Optional[date] = None
     ) -> int:
         """Отправить запланированное сообщение"""
         session = get_session()
         sent_count = 0
+        failed_count = 0
+        log_rows = []
+        
+        if local_date is None:
+            local_date = sent_time.date()
         
         try:
-            # Получаем пользователей организации
-            users = session.query(User).filter(
+            # Занимаем отправку за этот день: условный UPDATE атомарен,
+            # поэтому повторный проход (или второй процесс) ничего не отправит
+            claimed = session.execute(
+                update(MessageSchedule)
+                .where(
+                    MessageSchedule.id == schedule.id,
+                    or_(
+                        MessageSchedule.last_sent_local_date.is_(None),
+                        MessageSchedule.last_sent_local_date != local_date
+                    )
+                )
+                .values(last_sent_local_date=local_date)
+            ).rowcount
+            session.commit()
+            
+            if not claimed:
+                logger.debug(f"Сообщение {schedule.id} уже отправлено {local_date}")
+                return 0
+            
+            # Получаем пользователей организации (только нужные колонки)
+            users = session.query(User.id, User.user_id, User.chat_id).filter(
                 User.org_id == org.id,
                 User.chat_id.isnot(None)
             ).all()
@@ -205,6 +232,7 @@ class TimezoneMessageScheduler:
                 return 0
             
             logger.info(f"📤 Отправка сообщения '{schedule.title}' для организации {org.name} ({len(users)} пользователей)")
+            started = asyncio.get_running_loop().time()
             
             for user in users:
                 try:
@@ -214,13 +242,13 @@ class TimezoneMessageScheduler:
                     )
                     
                     # Логируем отправку
-                    log_entry = MessageSentLog(
-                        schedule_id=schedule.id,
-                        user_id=user.id,
-                        sent_at=sent_time,
-                        status="sent"
-                    )
-                    session.add(log_entry)
+                    log_rows.append({
+                        "schedule_id": schedule.id,
+                        "user_id": user.id,
+                        "sent_at": sent_time,
+                        "status": "sent",
+                        "error_message": None
+                    })
                     
                     sent_count += 1
                     
@@ -231,15 +259,15 @@ class TimezoneMessageScheduler:
                         await asyncio.sleep(0.2)
                         
                 except Exception as e:
+                    failed_count += 1
                     error_msg = str(e).lower()
-                    log_entry = MessageSentLog(
-                        schedule_id=schedule.id,
-                        user_id=user.id,
-                        sent_at=sent_time,
-                        status="failed",
-                        error_message=str(e)[:500]
-                    )
-                    session.add(log_entry)
+                    log_rows.append({
+                        "schedule_id": schedule.id,
+                        "user_id": user.id,
+                        "sent_at": sent_time,
+                        "status": "failed",
+                        "error_message": str(e)[:500]
+                    })
                     
                     if "chat not found" in error_msg or "user is deactivated" in error_msg:
                         logger.warning(f"Пользователь {user.user_id} недоступен (org: {org.id})")
@@ -247,8 +275,12 @@ class TimezoneMessageScheduler:
                         logger.warning(f"Бот заблокирован пользователем {user.user_id}")
                     else:
                         logger.warning(f"Ошибка отправки пользователю {user.user_id}: {e}")
+                
+                if len(log_rows) >= LOG_BATCH_SIZE:
+                    self._flush_sent_logs(session, log_rows)
             
-            session.commit()
+            self._flush_sent_logs(session, log_rows)
+            record_broadcast("schedule", sent_count, failed_count, asyncio.get_running_loop().time() - started)
             return sent_count
             
         except Exception as e:
@@ -258,6 +290,15 @@ class TimezoneMessageScheduler:
         finally:
             session.close()
     
+    @staticmethod
+    def _flush_sent_logs(session, log_rows: List[dict]):
+        """Записать накопленные логи одним executemany"""
+        if not log_rows:
+            return
+        session.execute(insert(MessageSentLog), log_rows)
+        session.commit()
+        log_rows.clear()
+    
     async def send_test_with_timezone(self, schedule_id: int, test_chat_id: int) -> str:
         """Отправить тестовое сообщение с информацией о часовом поясе"""
         try:
@@ -281,14 +322,14 @@ class TimezoneMessageScheduler:
             # Получаем текущее время
             current_utc = datetime.utcnow()
             try:
-                org_tz = pytz.timezone(org_timezone)
-                current_org_time = current_utc.replace(tzinfo=pytz.UTC).astimezone(org_tz)
+                org_tz = get_zone(org_timezone)
+                current_org_time = current_utc.replace(tzinfo=timezone.utc).astimezone(org_tz)
                 org_time_str = current_org_time.strftime('%H:%M:%S')
                 
                 # Рассчитываем время следующей отправки
                 schedule_time = schedule.scheduled_time
-                schedule_datetime_local = org_tz.localize(
-                    datetime.combine(current_org_time.date(), schedule_time)
+                schedule_datetime_local = datetime.combine(
+                    current_org_time.date(), schedule_time, tzinfo=org_tz
                 )
                 
                 # Если время уже прошло сегодня, показываем завтра
@@ -296,7 +337,7 @@ class TimezoneMessageScheduler:
                     schedule_datetime_local += timedelta(days=1)
                 
                 next_send_str = schedule_datetime_local.strftime('%d.%m.%Y %H:%M')
-                next_send_utc = schedule_datetime_local.astimezone(pytz.UTC).strftime('%d.%m.%Y %H:%M UTC')
+                next_send_utc = schedule_datetime_local.astimezone(timezone.utc).strftime('%d.%m.%Y %H:%M UTC')
                 
             except Exception as tz_error:
                 org_time_str = f"ошибка: {tz_error}"
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VACANCIES_PATH = "assets/vacancies.json"
+# Как часто проверять mtime файла (правки руками или с другой реплики)
+MTIME_CHECK_INTERVAL = 5
+# Права нового файла, если прежнего еще нет
+DEFAULT_FILE_MODE = 0o644
+
+
+class VacancyStore:
+    """Каталог вакансий в памяти с перечитыванием по mtime и атомарной записью
+
+    Обработчики читают из памяти; файл перечитывается, только если его mtime
+    изменился. Добавление и удаление пишут новый файл во временный и заменяют
+    старый через os.replace, поэтому читатель никогда не увидит половину JSON.
+    """
+
+    def __init__(self, path: str = VACANCIES_PATH, check_interval: float = MTIME_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._vacancies: Tuple[dict, ...] = ()
+        self._mtime: Optional[float] = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def _load(self):
+        """Прочитать файл и перестроить индексы"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Файл вакансий {self.path} не найден")
+            mtime, data = None, {"vacancies": []}
+
+        self._set(data.get("vacancies", []), mtime)
+        logger.info(f"💼 Загружено вакансий: {len(self._vacancies)}")
+
+    def _set(self, vacancies: List[dict], mtime: Optional[float]):
+        self._vacancies = tuple(vacancies)
+        self._mtime = mtime
+        self._loaded = True
+
+    def _refresh(self):
+        """Перечитать файл, если он изменился (mtime проверяется не чаще check_interval)"""
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if not self._loaded or mtime != self._mtime:
+                self._load()
+
+    def all(self) -> Tuple[dict, ...]:
+        """Все вакансии (не изменять: это общий кэш)"""
+        self._refresh()
+        return self._vacancies
+
+    def count(self) -> int:
+        return len(self.all())
+
+    def _write(self, vacancies: List[dict]):
+        """Атомарно записать каталог и сразу обновить память"""
+        directory = os.path.dirname(self.path) or "."
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = DEFAULT_FILE_MODE
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".vacancies_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"vacancies": vacancies}, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp создает файл с правами 0600: возвращаем права прежнего файла
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._set(vacancies, os.path.getmtime(self.path))
+        self._checked_at = time.monotonic()
+
+    def _add(self, vacancy: dict) -> int:
+        with self._lock:
+            vacancies = list(self._vacancies)
+            vacancy = dict(vacancy, id=len(vacancies) + 1)
+            vacancies.append(vacancy)
+            self._write(vacancies)
+            return len(vacancies)
+
+    def _delete(self, index: int) -> Optional[dict]:
+        with self._lock:
+            if not 0 <= index < len(self._vacancies):
+                return None
+            vacancies = [dict(vacancy) for vacancy in self._vacancies]
+            deleted = vacancies.pop(index)
+            for i, vacancy in enumerate(vacancies):
+                vacancy["id"] = i + 1
+            self._write(vacancies)
+            return deleted
+
+    async def add(self, vacancy: dict) -> int:
+        """Добавить вакансию; возвращает новое количество вакансий"""
+        self._refresh()
+        return await asyncio.to_thread(self._add, vacancy)
+
+    async def delete(self, index: int) -> Optional[dict]:
+        """Удалить вакансию по позиции; возвращает удаленную или None"""
+        self._refresh()
+        return await asyncio.to_thread(self._delete, index)
+
+
+vacancy_store = VacancyStore()
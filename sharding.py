@@ -0,0 +1,221 @@
+"""Несколько процессов-обработчиков с распределением апдейтов по user_id
+
+    python sharding.py
+
+Супервизор один раз готовит БД, запускает SHARD_WORKERS процессов и сам
+забирает апдейты через getUpdates. Каждый апдейт уходит в процесс
+user_id % SHARD_WORKERS, поэтому все апдейты пользователя обрабатывает один
+и тот же процесс и его кэш FSM остается верным. Планировщики работают только
+в процессе SCHEDULER_SHARD (см. services.scheduler_runner). Упавший
+процесс супервизор перезапускает. По SIGTERM или Ctrl+C супервизор
+прекращает прием и дает шардам доработать свои очереди.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from queue import Full
+from typing import List, Optional
+
+from config import load_config
+from utils.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Сколько апдейтов может ждать в очереди одного процесса
+SHARD_QUEUE_SIZE = 1000
+# Сколько апдейтов процесс обрабатывает одновременно
+SHARD_CONCURRENCY = 32
+POLLING_TIMEOUT = 30
+# Сколько ждать места в очереди шарда, прежде чем проверить, жив ли он
+QUEUE_PUT_TIMEOUT = 5
+
+LOG_FORMAT = "%(asctime)s [%(processName)s] %(name)s %(levelname)s %(message)s"
+
+
+def update_user_id(update) -> Optional[int]:
+    """ID пользователя апдейта (или чата, если пользователя нет)"""
+    try:
+        event = update.event
+    except Exception:
+        return None
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, "chat", None)
+    if chat is None and getattr(event, "message", None) is not None:
+        chat = event.message.chat
+    return chat.id if chat is not None else None
+
+
+def shard_for(user_id: Optional[int], shards: int, update_id: int = 0) -> int:
+    """Номер процесса для апдейта; без пользователя - по update_id"""
+    return (user_id if user_id is not None else update_id) % shards
+
+
+def _worker_main(shard_id: int, queue: multiprocessing.Queue):
+    """Точка входа процесса-обработчика"""
+    os.environ["SHARD_ID"] = str(shard_id)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup_logging(text_format=LOG_FORMAT)
+    asyncio.run(_worker_loop(shard_id, queue))
+
+
+async def _worker_loop(shard_id: int, queue: multiprocessing.Queue):
+    from webhook import build_dispatcher, create_bot
+
+    bot = create_bot()
+    dispatcher = build_dispatcher(init_database=False)
+    await dispatcher.emit_startup(bot=bot, dispatcher=dispatcher)
+    logger.info(f"🧩 Шард {shard_id} запущен")
+
+    semaphore = asyncio.Semaphore(SHARD_CONCURRENCY)
+    tasks = set()
+
+    async def process(payload: dict):
+        try:
+            await dispatcher.feed_raw_update(bot, payload)
+        except Exception as e:
+            logger.error(f"❌ Шард {shard_id}: ошибка апдейта {payload.get('update_id')}: {e}")
+        finally:
+            semaphore.release()
+
+    try:
+        while True:
+            payload = await asyncio.to_thread(queue.get)
+            if payload is None:
+                break
+            await semaphore.acquire()
+            task = asyncio.create_task(process(payload))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await dispatcher.emit_shutdown(bot=bot, dispatcher=dispatcher)
+        await dispatcher.storage.close()
+        await bot.session.close()
+        logger.info(f"🛑 Шард {shard_id} остановлен")
+
+
+class ShardSupervisor:
+    """Запуск процессов-шардов и раздача им апдейтов из getUpdates"""
+
+    def __init__(self, shards: int):
+        self.shards = max(1, shards)
+        self._context = multiprocessing.get_context("spawn")
+        self.queues: List[multiprocessing.Queue] = [
+            self._context.Queue(maxsize=SHARD_QUEUE_SIZE) for _ in range(self.shards)
+        ]
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * self.shards
+        self._stopping = False
+
+    def _spawn(self, shard_id: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard_id, self.queues[shard_id]),
+            name=f"shard-{shard_id}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[shard_id] = process
+
+    def _check_workers(self):
+        for shard_id, process in enumerate(self.processes):
+            if process is None or not process.is_alive():
+                if process is not None:
+                    logger.error(f"❌ Шард {shard_id} завершился (код {process.exitcode}), перезапускаю")
+                self._spawn(shard_id)
+
+    async def dispatch(self, update):
+        """Отправить апдейт в процесс его пользователя"""
+        shard_id = shard_for(update_user_id(update), self.shards, update.update_id)
+        payload = update.model_dump(mode="json", by_alias=True, exclude_none=True)
+        # put ждет, если шард не успевает: так же тормозим и getUpdates.
+        # С таймаутом, чтобы упавший шард перезапускался, а не вешал супервизор
+        while True:
+            try:
+                await asyncio.to_thread(self.queues[shard_id].put, payload, True, QUEUE_PUT_TIMEOUT)
+                return
+            except Full:
+                logger.warning(f"⚠️ Очередь шарда {shard_id} заполнена")
+                self._check_workers()
+
+    async def run(self):
+        from webhook import create_bot
+
+        # SIGTERM (systemd, docker stop) останавливает прием так же, как Ctrl+C
+        polling = asyncio.current_task()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._request_stop, polling)
+
+        bot = create_bot()
+        offset = None
+        try:
+            self._check_workers()
+            await bot.delete_webhook(drop_pending_updates=False)
+            logger.info(f"🚀 Супервизор: {self.shards} шардов, прием через getUpdates")
+
+            while not self._stopping:
+                self._check_workers()
+                try:
+                    updates = await bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ getUpdates: {e}")
+                    await asyncio.sleep(1)
+                    continue
+
+                for update in updates:
+                    await self.dispatch(update)
+                    offset = update.update_id + 1
+        except asyncio.CancelledError:
+            if not self._stopping:
+                raise
+            logger.info("🛑 SIGTERM: остановка супервизора")
+        finally:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+            await bot.session.close()
+
+    def _request_stop(self, polling: asyncio.Task):
+        self._stopping = True
+        polling.cancel()
+
+    def stop(self):
+        """Остановить прием и дать шардам доработать очереди"""
+        self._stopping = True
+        for shard_id, process in enumerate(self.processes):
+            if process is None or not process.is_alive():
+                continue
+            try:
+                self.queues[shard_id].put(None, timeout=QUEUE_PUT_TIMEOUT)
+            except Full:
+                logger.warning(f"⚠️ Шард {shard_id} не разбирает очередь, завершаю принудительно")
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+
+
+def main():
+    config = load_config()
+    setup_logging(config, text_format=LOG_FORMAT)
+
+    from database import init_db
+    # Таблицы, миграции и партиции готовит супервизор, а не каждый шард
+    init_db()
+
+    supervisor = ShardSupervisor(config.shard_workers)
+    try:
+        asyncio.run(supervisor.run())
+    except KeyboardInterrupt:
+        logger.info("🛑 Остановка супервизора")
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
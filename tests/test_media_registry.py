@@ -0,0 +1,64 @@
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+from aiogram.methods import SendPhoto
+from aiogram.types import Chat, FSInputFile, Message, PhotoSize
+
+from services.media_registry import MediaRegistry, MediaRegistryMiddleware
+
+
+def _send_twice(registry: MediaRegistry, picture: str) -> list:
+    """Дважды отправить одну картинку через middleware, вернуть отправленные photo"""
+    middleware = MediaRegistryMiddleware(registry)
+    bot = SimpleNamespace(id=1)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method.photo)
+        return Message(
+            message_id=len(sent), date=datetime.now(), chat=Chat(id=1, type="private"),
+            photo=[PhotoSize(file_id="cached_id", file_unique_id="u", width=1, height=1)],
+        )
+
+    async def run():
+        for _ in range(2):
+            await middleware(make_request, bot, SendPhoto(chat_id=1, photo=registry.static(picture)))
+
+    asyncio.run(run())
+    return sent
+
+
+def test_second_send_uses_cached_file_id(tmp_path):
+    picture = tmp_path / "menu.jpg"
+    picture.write_bytes(b"picture")
+    registry = MediaRegistry(str(tmp_path / "file_ids.json"))
+
+    sent = _send_twice(registry, str(picture))
+
+    assert isinstance(sent[0], FSInputFile)
+    assert sent[1] == "cached_id"
+
+
+def test_file_id_survives_restart(tmp_path):
+    picture = tmp_path / "menu.jpg"
+    picture.write_bytes(b"picture")
+    path = str(tmp_path / "file_ids.json")
+
+    _send_twice(MediaRegistry(path), str(picture))
+
+    assert MediaRegistry(path).get(1, str(picture)) == "cached_id"
+
+
+def test_changed_picture_is_uploaded_again(tmp_path):
+    picture = tmp_path / "menu.jpg"
+    picture.write_bytes(b"picture")
+    registry = MediaRegistry(str(tmp_path / "file_ids.json"))
+    _send_twice(registry, str(picture))
+
+    stat = picture.stat()
+    picture.write_bytes(b"new picture")
+    os.utime(picture, (stat.st_atime, stat.st_mtime + 10))
+
+    assert registry.get(1, str(picture)) is None
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from database import instrumentation
+from database.instrumentation import QueryBudgetExceeded, instrument_engine, query_budget, track_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    # Первое подключение диалекта не должно попадать в замеры
+    with engine.connect():
+        pass
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def strict(monkeypatch):
+    """QUERY_BUDGET_STRICT=true: превышение бюджета - исключение"""
+    monkeypatch.setattr(instrumentation, "_settings", lambda: (5, 0, True))
+
+
+def _select(engine, times: int):
+    with engine.connect() as conn:
+        for _ in range(times):
+            conn.execute(text("SELECT 1"))
+
+
+def test_handler_within_budget_passes(engine, strict):
+    @query_budget(3)
+    def handler():
+        _select(engine, 3)
+        return "ok"
+
+    assert handler() == "ok"
+
+
+def test_handler_over_budget_fails(engine, strict):
+    @query_budget(2)
+    def handler():
+        _select(engine, 3)
+
+    with pytest.raises(QueryBudgetExceeded):
+        handler()
+
+
+def test_async_handler_over_budget_fails(engine, strict):
+    @query_budget(1)
+    async def handler():
+        await asyncio.to_thread(_select, engine, 2)
+
+    with pytest.raises(QueryBudgetExceeded):
+        asyncio.run(handler())
+
+
+def test_over_budget_only_warns_when_not_strict(engine, monkeypatch):
+    monkeypatch.setattr(instrumentation, "_settings", lambda: (5, 0, False))
+
+    @query_budget(1)
+    def handler():
+        _select(engine, 2)
+        return "ok"
+
+    assert handler() == "ok"
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(engine, strict):
+    with track_queries() as stats:
+        with engine.connect() as conn:
+            for user_id in range(6):
+                conn.execute(text("SELECT :id"), {"id": user_id})
+
+    assert stats.count == 6
+    assert stats.repeated() == [("SELECT ?", 6)]
+
+
+def test_failed_statement_does_not_leak_timing_state(engine):
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+        with track_queries() as stats:
+            conn.execute(text("SELECT 1"))
+        assert "query_started_at" not in conn.info
+
+    assert stats.count == 1
+    assert stats.duration >= 0
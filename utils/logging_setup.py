@@ -0,0 +1,163 @@
+"""Неблокирующее логирование: QueueHandler + фоновый QueueListener
+
+Код, который пишет в лог, только кладет запись в очередь; форматирование и
+запись в поток делает отдельный поток QueueListener. Каждая запись получает
+поля контекста (update_id, user_id, event_type), которые ставит
+LogContextMiddleware, и в режиме LOG_FORMAT=json выводится одной JSON-строкой.
+
+LOG_SAMPLING задает долю записей ниже WARNING, которые сохраняются для
+шумных логгеров: "bot.events=0.1,aiogram.event=0.1". Решение принимается по
+update_id, поэтому апдейт попадает в лог либо целиком, либо никак.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from config import load_config
+
+_log_context: ContextVar[dict] = ContextVar("log_context", default={})
+_listener: Optional[QueueListener] = None
+
+TEXT_FORMAT = "%(asctime)s %(name)s %(levelname)s %(message)s"
+
+
+def get_log_context() -> dict:
+    return _log_context.get()
+
+
+@contextmanager
+def log_context(**fields):
+    """Добавить поля ко всем записям лога внутри блока"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def redact_text(text: Optional[str]) -> str:
+    """Текст пользователя в лог не попадает: только его длина"""
+    if not text:
+        return "<пусто>"
+    return f"<{len(text)} симв.>"
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """'bot.events=0.1,aiogram.event=0.05' -> {'bot.events': 0.1, 'aiogram.event': 0.05}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """Копирует контекст апдейта в запись (выполняется в потоке, который пишет лог)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.ctx = _log_context.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Оставляет заданную долю записей ниже WARNING для шумных логгеров"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Более длинное имя - более точное правило
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _rate(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        update_id = getattr(record, "ctx", {}).get("update_id")
+        if update_id is None:
+            return random.random() < rate
+        return (zlib.crc32(str(update_id).encode()) % 10000) / 10000 < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна JSON-строка с полями контекста"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "process": record.processName,
+        }
+        payload.update(getattr(record, "ctx", {}))
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler, который сохраняет traceback отдельно от текста"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def setup_logging(config=None, text_format: str = TEXT_FORMAT):
+    """Перенаправить корневой логгер в очередь с фоновым потоком записи (один раз на процесс)"""
+    global _listener
+    if _listener is not None:
+        return
+    config = config or load_config()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if config.log_format == "json" else logging.Formatter(text_format))
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter(parse_sampling(config.log_sampling)))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(config.log_level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,9 +1,21 @@
-import pytz
-from datetime import datetime, timezone as tz
-from typing import Optional, Tuple
+import time
+from datetime import date, datetime, time as dtime, timezone as tz
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from database import get_session
 from database.models import Organization, User
 
+DEFAULT_TIMEZONE = "Asia/Novosibirsk"
+
+# Кэш org_id -> часовой пояс и user_id -> org_id. Админка сбрасывает записи при
+# изменениях, а TTL нужен, чтобы изменения с других реплик тоже подхватывались
+TIMEZONE_CACHE_TTL = 300
+
+_org_timezone_cache: Dict[int, Tuple[str, float]] = {}
+_user_org_cache: Dict[int, Tuple[Optional[int], float]] = {}
+
 # Периоды опросов (можно оставить как есть или подстроить)
 SURVEY_PERIODS = {
     "morning": {"start": 6, "end": 11},    # 6:00 - 12:00
@@ -12,18 +24,64 @@ SURVEY_PERIODS = {
     "none": {"start": 22, "end": 6}         # Ночью недоступно
 }
 
-def get_current_survey_period_for_org(org_id: int) -> str:
-    """Определить текущий период опроса для конкретной организации"""
-    timezone_str = get_org_timezone(org_id)
+def _cache_get(cache: dict, key: int):
+    """Вернуть (найдено, значение) с учетом TTL"""
+    entry = cache.get(key)
+    if entry is not None and time.monotonic() - entry[1] < TIMEZONE_CACHE_TTL:
+        return True, entry[0]
+    return False, None
+
+def invalidate_org_timezone(org_id: int):
+    """Сбросить закэшированный часовой пояс организации (после изменения в админке)"""
+    _org_timezone_cache.pop(org_id, None)
+
+def invalidate_user_org(user_id: int):
+    """Сбросить закэшированную организацию пользователя"""
+    _user_org_cache.pop(user_id, None)
+
+def clear_timezone_cache():
+    """Полностью очистить кэш часовых поясов"""
+    _org_timezone_cache.clear()
+    _user_org_cache.clear()
+
+def get_user_org_id(user_id: int) -> Optional[int]:
+    """Получить org_id пользователя (из кэша или одним запросом вместе с часовым поясом)"""
+    found, org_id = _cache_get(_user_org_cache, user_id)
+    if found:
+        return org_id
     
+    session = get_session()
     try:
-        org_tz = pytz.timezone(timezone_str)
-    except pytz.exceptions.UnknownTimeZoneError:
-        org_tz = pytz.timezone('Asia/Novosibirsk')
+        row = session.query(User.org_id, Organization.timezone).outerjoin(
+            Organization, Organization.id == User.org_id
+        ).filter(User.user_id == user_id).first()
+    finally:
+        session.close()
     
-    now = datetime.now(org_tz)
-    hour = now.hour
+    now = time.monotonic()
+    org_id = row.org_id if row else None
+    _user_org_cache[user_id] = (org_id, now)
+    if org_id is not None:
+        _org_timezone_cache[org_id] = (row.timezone or DEFAULT_TIMEZONE, now)
+    return org_id
+
+@lru_cache(maxsize=None)
+def get_zone(timezone_str: Optional[str]) -> ZoneInfo:
+    """Объект часового пояса по имени (один на имя на весь процесс)
     
+    Неизвестный или пустой пояс заменяется на DEFAULT_TIMEZONE.
+    """
+    try:
+        return ZoneInfo(timezone_str or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+def get_org_tz(org_id: int) -> ZoneInfo:
+    """Получить объект часового пояса организации"""
+    return get_zone(get_org_timezone(org_id))
+
+def get_period_for_hour(hour: int) -> str:
+    """Период опроса по локальному часу"""
     if 6 <= hour < 12:      
         return "morning"
     elif 12 <= hour < 18:   
@@ -33,17 +91,16 @@ def get_current_survey_period_for_org(org_id: int) -> str:
     else:
         return "none"    
 
+def get_current_survey_period_for_org(org_id: int) -> str:
+    """Определить текущий период опроса для конкретной организации"""
+    return get_period_for_hour(datetime.now(get_org_tz(org_id)).hour)
+
 def get_current_survey_period_for_user(user_id: int) -> str:
     """Определить текущий период опроса для конкретного пользователя"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user and user.org_id:
-            return get_current_survey_period_for_org(user.org_id)
-        else:
-            return get_current_survey_period()  # fallback
-    finally:
-        session.close()
+    org_id = get_user_org_id(user_id)
+    if org_id:
+        return get_current_survey_period_for_org(org_id)
+    return get_current_survey_period()  # fallback
 
 def get_current_survey_period() -> str:
     """Определить текущий период опроса (старая функция для обратной совместимости)"""
@@ -82,49 +139,91 @@ def is_survey_available_for_user(user_id: int) -> Tuple[bool, str, Optional[str]
         return False, "🌙 Сейчас не время для опросов", None
     
     # Получаем время в часовом поясе организации
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user and user.org_id:
-            org_time = get_current_org_time(user.org_id)
-            time_str = org_time.strftime("%H:%M")
-        else:
-            time_str = "неизвестно"
-    finally:
-        session.close()
+    org_id = get_user_org_id(user_id)
+    if org_id:
+        time_str = get_current_org_time(org_id).strftime("%H:%M")
+    else:
+        time_str = "неизвестно"
     
     return True, f"🕐 Текущее время: {time_str}", period
 
 def get_org_timezone(org_id: int) -> str:
     """Получить часовой пояс организации"""
+    found, timezone_str = _cache_get(_org_timezone_cache, org_id)
+    if found:
+        return timezone_str
+    
     session = get_session()
     try:
-        org = session.query(Organization).filter(Organization.id == org_id).first()
-        return org.timezone if org and org.timezone else "Asia/Novosibirsk"
+        org = session.query(Organization.timezone).filter(Organization.id == org_id).first()
+        timezone_str = org.timezone if org and org.timezone else DEFAULT_TIMEZONE
     finally:
         session.close()
+    
+    _org_timezone_cache[org_id] = (timezone_str, time.monotonic())
+    return timezone_str
 
 def get_user_timezone(user_id: int) -> str:
     """Получить часовой пояс пользователя (через его организацию)"""
-    session = get_session()
-    try:
-        user = session.query(User).filter(User.user_id == user_id).first()
-        if user and user.org_id:
-            return get_org_timezone(user.org_id)
-        return "Asia/Novosibirsk"
-    finally:
-        session.close()
+    org_id = get_user_org_id(user_id)
+    if org_id:
+        return get_org_timezone(org_id)
+    return DEFAULT_TIMEZONE
 
 def convert_utc_to_local(utc_time: datetime, timezone_str: str) -> datetime:
     """Конвертировать UTC время в локальное время организации"""
     if utc_time.tzinfo is None:
         utc_time = utc_time.replace(tzinfo=tz.utc)
     
-    try:
-        local_tz = pytz.timezone(timezone_str)
-        return utc_time.astimezone(local_tz)
-    except:
-        return utc_time.astimezone(pytz.timezone("Asia/Novosibirsk"))
+    return utc_time.astimezone(get_zone(timezone_str))
+
+def local_to_utc(day: date, local_time: dtime, timezone_str: str) -> datetime:
+    """Локальные дата и время организации -> aware datetime в UTC"""
+    local_dt = datetime.combine(day, local_time, tzinfo=get_zone(timezone_str))
+    return local_dt.astimezone(tz.utc)
+
+def local_day_bounds_utc(timezone_str: str, day: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """Границы локальных суток [начало, конец) в UTC; по умолчанию - сегодня"""
+    zone = get_zone(timezone_str)
+    if day is None:
+        day = datetime.now(zone).date()
+    start = datetime.combine(day, dtime.min, tzinfo=zone)
+    end = datetime.combine(date.fromordinal(day.toordinal() + 1), dtime.min, tzinfo=zone)
+    return start.astimezone(tz.utc), end.astimezone(tz.utc)
+
+def _to_local_index(timestamps: Iterable[datetime], timezone_str: str) -> "pd.DatetimeIndex":
+    """Массив меток UTC (naive считаются UTC) -> DatetimeIndex в поясе организации
+
+    pandas импортируется здесь, а не на уровне модуля: utils.time нужен почти
+    каждому обработчику, а массивы меток - только отчетам.
+    """
+    import pandas as pd
+
+    index = pd.DatetimeIndex(pd.to_datetime(list(timestamps), utc=True))
+    return index.tz_convert(get_zone(timezone_str))
+
+def to_local_dates(timestamps: Iterable[datetime], timezone_str: str) -> "np.ndarray":
+    """Локальные даты для массива меток UTC за один проход (datetime64[D], None -> NaT)"""
+    local = _to_local_index(timestamps, timezone_str)
+    return local.tz_localize(None).values.astype("datetime64[D]")
+
+def to_survey_periods(timestamps: Iterable[datetime], timezone_str: str) -> "np.ndarray":
+    """Периоды опроса (morning/afternoon/evening/none) для массива меток UTC, как get_period_for_hour"""
+    import numpy as np
+
+    hours = _to_local_index(timestamps, timezone_str).hour.to_numpy(dtype=float, na_value=np.nan)
+    return np.select(
+        [(hours >= 6) & (hours < 12), (hours >= 12) & (hours < 18), (hours >= 18) & (hours < 22)],
+        ["morning", "afternoon", "evening"],
+        default="none"
+    )
+
+def count_local_days(timestamps: Iterable[datetime], timezone_str: str) -> int:
+    """Количество различных локальных дней среди меток UTC"""
+    import numpy as np
+
+    dates = to_local_dates(timestamps, timezone_str)
+    return int(np.unique(dates[~np.isnat(dates)]).size)
 
 def format_datetime(dt: datetime, timezone_str: str, format_str: str = "%d.%m.%Y %H:%M") -> str:
     """Отформатировать дату-время с учетом часового пояса"""
@@ -133,8 +232,7 @@ def format_datetime(dt: datetime, timezone_str: str, format_str: str = "%d.%m.%Y
 
 def get_current_org_time(org_id: int) -> datetime:
     """Получить текущее время в часовом поясе организации"""
-    timezone_str = get_org_timezone(org_id)
-    return datetime.now(pytz.timezone(timezone_str))
+    return datetime.now(get_org_tz(org_id))
 
 def create_timezone_keyboard():
     """Создать клавиатуру для выбора часового пояса"""
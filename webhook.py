@@ -0,0 +1,181 @@
+"""Прием апдейтов через webhook (aiohttp) вместо long polling
+
+    python webhook.py
+
+Telegram присылает апдейты POST-запросами на WEBHOOK_PATH; запрос без верного
+X-Telegram-Bot-Api-Secret-Token отклоняется. Ответ 200 отдается сразу, а
+апдейт обрабатывается в фоне: одновременно не больше WEBHOOK_CONCURRENCY
+апдейтов, при заполнении ответ задерживается, и Telegram притормаживает сам.
+GET /health - состояние процесса для балансировщика.
+
+Если задан TELEGRAM_API_URL, бот ходит не в api.telegram.org, а в указанный
+сервер (заглушку Bot API для нагрузочных тестов).
+"""
+import asyncio
+import hmac
+import logging
+import time
+from typing import Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from config import load_config
+from services.loop_monitor import loop_monitor
+from utils.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """aiohttp-приложение: прием апдейтов, ограничение параллельности и /health"""
+
+    def __init__(self, bot: Bot, dispatcher: Dispatcher, path: str, secret: str = "",
+                 concurrency: int = 64, webhook_url: str = "", **workflow_data):
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.path = path
+        self.secret = secret
+        self.concurrency = concurrency
+        self.webhook_url = webhook_url
+        self.workflow_data = workflow_data
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._started_at = time.monotonic()
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/health", self.health)
+        app.on_startup.append(self._on_startup)
+        app.on_shutdown.append(self._on_shutdown)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            logger.warning(f"⚠️ Webhook: неверный secret token от {request.remote}")
+            return web.Response(status=401)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        self.received += 1
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, payload: dict):
+        try:
+            await self.dispatcher.feed_raw_update(self.bot, payload, **self.workflow_data)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Ошибка обработки апдейта {payload.get('update_id')}: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "uptime": round(time.monotonic() - self._started_at),
+            "in_flight": len(self._tasks),
+            "concurrency": self.concurrency,
+            "received": self.received,
+            "processed": self.processed,
+            "failed": self.failed,
+            "loop_lag": loop_monitor.percentiles(),
+        })
+
+    async def _on_startup(self, app: web.Application):
+        await self.dispatcher.emit_startup(bot=self.bot, dispatcher=self.dispatcher, **self.workflow_data)
+        if self.webhook_url:
+            await self.bot.set_webhook(
+                url=self.webhook_url,
+                secret_token=self.secret or None,
+                max_connections=min(self.concurrency, 100),
+                allowed_updates=self.dispatcher.resolve_used_update_types(),
+            )
+            logger.info(f"🌐 Webhook установлен: {self.webhook_url}")
+        else:
+            logger.info("🌐 WEBHOOK_BASE_URL не задан: setWebhook пропущен")
+
+    async def _on_shutdown(self, app: web.Application):
+        if self._tasks:
+            logger.info(f"⏳ Дожидаюсь обработки апдейтов: {len(self._tasks)}")
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.dispatcher.emit_shutdown(bot=self.bot, dispatcher=self.dispatcher, **self.workflow_data)
+        await self.dispatcher.storage.close()
+        await self.bot.session.close()
+
+
+def create_bot(config=None) -> Bot:
+    """Bot с учетом TELEGRAM_API_URL"""
+    config = config or load_config()
+    session = None
+    if config.telegram_api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(config.telegram_api_url))
+        logger.info(f"🧪 Bot API: {config.telegram_api_url}")
+    return Bot(token=config.token, session=session)
+
+
+def create_webhook_server(bot: Bot, dispatcher: Dispatcher, config=None, **workflow_data) -> WebhookServer:
+    config = config or load_config()
+    webhook_url = f"{config.webhook_base_url}{config.webhook_path}" if config.webhook_base_url else ""
+    return WebhookServer(
+        bot, dispatcher,
+        path=config.webhook_path,
+        secret=config.webhook_secret,
+        concurrency=config.webhook_concurrency,
+        webhook_url=webhook_url,
+        **workflow_data,
+    )
+
+
+def run_webhook(bot: Bot, dispatcher: Dispatcher, config=None, **workflow_data):
+    """Запустить aiohttp-сервер (блокирует до остановки)"""
+    config = config or load_config()
+    server = create_webhook_server(bot, dispatcher, config, **workflow_data)
+    logger.info(
+        f"🚀 Webhook на {config.webhook_host}:{config.webhook_port}{config.webhook_path}, "
+        f"параллельность {config.webhook_concurrency}"
+    )
+    web.run_app(server.create_app(), host=config.webhook_host, port=config.webhook_port, print=None)
+
+
+def build_dispatcher(init_database: bool = True, schedulers: bool = True) -> Dispatcher:
+    """Dispatcher с постоянным хранилищем FSM, всеми обработчиками и планировщиками"""
+    from database import init_db
+    from handlers import register_all_handlers
+    from services.fsm_storage import create_fsm_storage
+    from services.scheduler_runner import setup_schedulers
+
+    if init_database:
+        init_db()
+    dispatcher = Dispatcher(storage=create_fsm_storage())
+    register_all_handlers(dispatcher)
+    if schedulers:
+        setup_schedulers(dispatcher)
+    return dispatcher
+
+
+def main():
+    config = load_config()
+    setup_logging(config)
+    if not config.webhook_secret and config.webhook_base_url:
+        logger.warning("⚠️ WEBHOOK_SECRET не задан: запросы к webhook не проверяются")
+    run_webhook(create_bot(config), build_dispatcher(), config)
+
+
+if __name__ == "__main__":
+    main()